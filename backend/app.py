@@ -1,35 +1,279 @@
-from turtle import title
-from flask import Flask, jsonify, request, make_response, g
+from flask import Flask, Blueprint, Response, current_app, jsonify, request, make_response, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
 import requests
 import os
 from datetime import datetime, timedelta, timezone
 import jwt
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, monitoring
 from dotenv import load_dotenv
 from bson import ObjectId
-from pymongo.errors import BulkWriteError
-from werkzeug.security import generate_password_hash, check_password_hash
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
+from werkzeug.local import LocalProxy
 import time, math 
+import threading
+import hashlib
+import logging
+import uuid
+from zoneinfo import ZoneInfo
 from functools import wraps
+from collections import OrderedDict
+from serialization import dumps_bytes
+from compression import ENCODINGS, COMPRESSIBLE_MIMETYPES, compress
+from odds_api import ODDS_API_BASE, CircuitOpenError, OddsApiClient, is_upstream_failure
+from circuit_breaker import CircuitBreaker
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from logs import configure_logging
+from credit_budget import CreditBudget, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from password_hashing import PasswordHasher, PasswordHasherBusy
+from claims_cache import ClaimsCache
+from bet_view import DETAIL_VIEW, LIST_VIEW
+from pricing import PriceRejected, price_bet
+from broadcast import KEEPALIVE, Broadcaster, sse_frame
+
+log = logging.getLogger('gambling.app')
+request_log = logging.getLogger('gambling.request')
+
+class FastJSONProvider(DefaultJSONProvider):
+    # orjson-backed jsonify; datetimes and ObjectIds serialize without a to_iso pass
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, sort_keys=self.sort_keys) + b"\n", mimetype=self.mimetype)
+
+# Process-wide metrics, exposed at /metrics
+METRICS = Registry()
+HTTP_LATENCY = METRICS.histogram(
+    'http_request_duration_seconds', 'Request latency by route', ('route', 'method', 'status'))
+HTTP_MONGO_COMMANDS = METRICS.histogram(
+    'http_request_mongo_commands', 'Mongo round-trips per request', ('route',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100))
+MONGO_COMMANDS = METRICS.counter(
+    'mongo_commands_total', 'Mongo commands by route and command', ('route', 'command'))
+MONGO_COMMAND_SECONDS = METRICS.counter(
+    'mongo_command_seconds_total', 'Time spent in Mongo commands', ('route', 'command'))
+ODDS_API_REQUESTS = METRICS.counter(
+    'odds_api_requests_total', 'Calls to The Odds API', ('endpoint', 'status'))
+ODDS_API_LATENCY = METRICS.histogram(
+    'odds_api_request_duration_seconds', 'Latency of The Odds API calls', ('endpoint',))
+ODDS_API_CREDITS_USED = METRICS.counter(
+    'odds_api_credits_used_total', 'Credits reported by x-requests-last', ('endpoint',))
+ODDS_API_CREDITS_REMAINING = METRICS.gauge(
+    'odds_api_credits_remaining', 'Last x-requests-remaining seen')
+ODDS_API_BUDGET_DENIALS = METRICS.counter(
+    'odds_api_budget_denials_total', 'Refreshes skipped by the credit budget', ('sport', 'reason'))
+CACHE_RESPONSES = METRICS.counter(
+    'http_cache_responses_total', 'Responses from cached routes', ('policy',))
+CACHE_NOT_MODIFIED = METRICS.counter(
+    'http_cache_not_modified_total', '304 responses from cached routes', ('policy',))
+CACHE_BYTES_SAVED = METRICS.counter(
+    'http_cache_bytes_saved_total', 'Body bytes not sent thanks to 304s', ('policy',))
+SETTLEMENT_PHASE_SECONDS = METRICS.histogram(
+    'settlement_phase_seconds', 'Time per settlement phase', ('phase',))
+SETTLEMENT_BETS = METRICS.counter(
+    'settlement_bets_total', 'Bets settled')
+SETTLEMENT_BETS_PER_SECOND = METRICS.gauge(
+    'settlement_bets_per_second', 'Throughput of the most recent settlement')
+PASSWORD_HASH_REJECTED = METRICS.counter(
+    'password_hash_rejected_total', 'Requests refused because password hashing was saturated', ('route',))
+JWT_CLAIMS_CACHE = METRICS.counter(
+    'jwt_claims_cache_total', 'Token checks served from the claims cache (hit) or by jwt.decode (miss)', ('result',))
+ODDS_STREAM_CLIENTS = METRICS.gauge(
+    'odds_stream_clients', 'Open /api/games/stream connections', ('sport',))
+ODDS_STREAM_EVENTS = METRICS.counter(
+    'odds_stream_events_total', 'Odds change events published', ('sport',))
+ODDS_STREAM_DROPPED = METRICS.counter(
+    'odds_stream_dropped_total', 'Stream clients dropped for falling behind', ('sport',))
+USER_EVENTS_CLIENTS = METRICS.gauge(
+    'user_events_clients', 'Open /api/users/<user_id>/events connections')
+USER_EVENTS_PUBLISHED = METRICS.counter(
+    'user_events_published_total', 'Change-stream events pushed to connected users', ('event',))
+CREDIT_REFILLS = METRICS.counter(
+    'daily_credit_refills_total', 'Balances refilled to DAILY_CREDIT on first use in a new credit period', ('source',))
+PASSWORD_REHASHES = METRICS.counter(
+    'password_rehashes_total', 'Stored hashes upgraded to PASSWORD_HASH_METHOD at login')
+BET_PRICE_REJECTED = METRICS.counter(
+    'bet_price_rejected_total', 'Placements refused because a leg could not be priced as asked', ('reason',))
+
+def metrics_route() -> str:
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    # Sync pymongo publishes events on the calling thread, so they can be
+    # attributed to the request being served
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        seconds = event.duration_micros / 1e6
+        if has_request_context():
+            route = metrics_route()
+            g.mongo_commands = g.get('mongo_commands', 0) + 1
+            g.mongo_seconds = g.get('mongo_seconds', 0.0) + seconds
+        else:
+            route = 'background'
+        MONGO_COMMANDS.inc(route=route, command=event.command_name)
+        MONGO_COMMAND_SECONDS.inc(seconds, route=route, command=event.command_name)
+
+def record_odds_api_call(endpoint: str, response, elapsed: float):
+    # OddsApiClient observer; response is None when the call raised
+    status = str(response.status_code) if response is not None else 'error'
+    ODDS_API_REQUESTS.inc(endpoint=endpoint, status=status)
+    ODDS_API_LATENCY.observe(elapsed, endpoint=endpoint)
+    if response is None:
+        return
+    try:
+        ODDS_API_CREDITS_USED.inc(float(response.headers.get('x-requests-last', 0)), endpoint=endpoint)
+        remaining = response.headers.get('x-requests-remaining')
+        if remaining is not None:
+            ODDS_API_CREDITS_REMAINING.set(float(remaining))
+    except ValueError:
+        pass
+
+# Default Cache-Control per read route; max_age can be overridden via config
+CACHE_POLICIES = {
+    'games_upcoming':  {'scope': 'public',  'max_age': 30},
+    'games_completed': {'scope': 'public',  'max_age': 300},
+    'health':          {'scope': 'public',  'max_age': 5},
+    'leaderboard':     {'scope': 'public',  'max_age': 0},
+    'bet_detail':      {'scope': 'private', 'max_age': 0},
+    'user_profile':    {'scope': 'private', 'max_age': 0},
+}
 
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
+def config_from_env() -> dict:
+    # Read once per create_app, not at import, so missing vars can't break imports
+    return {
+        'MONGODB_URI':           os.getenv('MONGODB_URI'),
+        'MONGO_DB_NAME':         os.getenv('MONGO_DB_NAME', 'Gambling-App'),
+        'MONGO_MAX_POOL_SIZE':   int(os.getenv('MONGO_MAX_POOL_SIZE', '100')),
+        'ODDS_API_KEY':          os.getenv('ODDS_API'),
+        # Overridable so benchmarks can point at a local replay server
+        'ODDS_API_BASE':         os.getenv('ODDS_API_BASE', ODDS_API_BASE),
+        'JWT_SECRET':            os.getenv('JWT_SECRET'),
+        'JWT_ISSUER':            os.getenv('JWT_ISSUER'),
+        'JWT_AUDIENCE':          os.getenv('JWT_AUDIENCE'),
+        'JWT_EXP_SECONDS':       int(os.getenv('JWT_EXP_SECONDS', '3600')),
+        # Verified tokens remembered per worker (see claims_cache.py); 0 disables
+        'JWT_CLAIMS_CACHE_SIZE': int(os.getenv('JWT_CLAIMS_CACHE_SIZE', '10000')),
+        'COOKIE_SECURE':         os.getenv('COOKIE_SECURE', '0') == '1',
+        # Lean responses drop verbose, informational fields (e.g. api_usage.cost_breakdown).
+        # Enable globally with JSON_LEAN=1 or per request with ?lean=1
+        'JSON_LEAN':             os.getenv('JSON_LEAN', '0') == '1',
+        # Responses smaller than this (bytes) are sent uncompressed
+        'COMPRESS_MIN_SIZE':     int(os.getenv('COMPRESS_MIN_SIZE', '1024')),
+        # Leaderboard pages are cached per worker and a settlement or reset only clears the worker that
+        # ran it, so other workers can serve a stale page (and 304 its old ETag) for up to this long
+        'LEADERBOARD_CACHE_TTL': int(os.getenv('LEADERBOARD_CACHE_TTL', '30')),
+        # Idle /api/games/stream connections get a comment this often, so proxies keep them open
+        'STREAM_KEEPALIVE_SECONDS': float(os.getenv('STREAM_KEEPALIVE_SECONDS', '15')),
+        'ODDS_CACHE_TTL':        int(os.getenv('ODDS_CACHE_TTL', '60')),
+        'SCORES_REFRESH_SECONDS': int(os.getenv('SCORES_REFRESH_SECONDS', '60')),
+        # Placement re-prices legs from the odds cache (pricing.py): a leg's price may differ from the
+        # cached one by this fraction of its decimal odds, and the cache may be at most this old
+        'PRICE_TOLERANCE':       float(os.getenv('PRICE_TOLERANCE', '0.02')),
+        'PRICE_MAX_AGE_SECONDS': float(os.getenv('PRICE_MAX_AGE_SECONDS', '120')),
+        # Settled/cancelled bets placed longer ago than this move to BetsArchive (tools/archive_bets.py)
+        'BETS_ARCHIVE_DAYS':     int(os.getenv('BETS_ARCHIVE_DAYS', '180')),
+        # Largest ?limit= page the bet list and history routes serve; without ?limit they return every bet
+        'BETS_QUERY_LIMIT':      int(os.getenv('BETS_QUERY_LIMIT', '500')),
+        # Odds API credit budget (see credit_budget.py), for the whole deployment. The buckets live in
+        # each process, so each gets 1/ODDS_BUDGET_PROCESSES of the hourly rates: set that to the total
+        # number of serving processes on all hosts. Defaults to 1 (flask run, a single ASGI worker);
+        # gunicorn.conf.py sets it to its worker count, uvicorn or hypercorn --workers N need it set
+        'ODDS_CREDITS_PER_HOUR':       float(os.getenv('ODDS_CREDITS_PER_HOUR', '120')),
+        'ODDS_SPORT_CREDITS_PER_HOUR': float(os.getenv('ODDS_SPORT_CREDITS_PER_HOUR', '45')),
+        'ODDS_BUDGET_PROCESSES':       int(os.getenv('ODDS_BUDGET_PROCESSES', '1')),
+        'ODDS_CREDIT_RESERVE':         int(os.getenv('ODDS_CREDIT_RESERVE', '100')),
+        # Upstream timeout and circuit breaker: open after N consecutive failures, retry after M seconds
+        'ODDS_API_TIMEOUT':            float(os.getenv('ODDS_API_TIMEOUT', '10')),
+        'ODDS_BREAKER_FAILURES':       int(os.getenv('ODDS_BREAKER_FAILURES', '5')),
+        'ODDS_BREAKER_RESET_SECONDS':  float(os.getenv('ODDS_BREAKER_RESET_SECONDS', '30')),
+        # Games starting within this many minutes (or in progress) make a sport high priority
+        'ODDS_KICKOFF_WINDOW_MINUTES': int(os.getenv('ODDS_KICKOFF_WINDOW_MINUTES', '180')),
+        # Daily credit rolls over at midnight here
+        'CREDIT_TIMEZONE':             os.getenv('CREDIT_TIMEZONE', 'America/Toronto'),
+        # werkzeug method string, e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000; older hashes are upgraded at login
+        'PASSWORD_HASH_METHOD':        os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+        # Hashing processes per web worker (0 = hash on the request thread) and how many more may queue
+        'PASSWORD_HASH_WORKERS':       int(os.getenv('PASSWORD_HASH_WORKERS', '1')),
+        'PASSWORD_HASH_MAX_PENDING':   int(os.getenv('PASSWORD_HASH_MAX_PENDING', '8')),
+        # DEBUG enables per-bet settlement traces
+        'LOG_LEVEL':             os.getenv('LOG_LEVEL', 'INFO'),
+        # Fraction of ordinary request logs kept; slow requests and 5xx are always logged
+        'LOG_REQUEST_SAMPLE_RATE': float(os.getenv('LOG_REQUEST_SAMPLE_RATE', '1.0')),
+        'LOG_SLOW_REQUEST_MS':   int(os.getenv('LOG_SLOW_REQUEST_MS', '1000')),
+        # Per-route overrides, e.g. CACHE_MAX_AGE_GAMES_UPCOMING=60
+        'CACHE_MAX_AGE': {
+            name: int(os.environ[f"CACHE_MAX_AGE_{name.upper()}"])
+            for name in CACHE_POLICIES if f"CACHE_MAX_AGE_{name.upper()}" in os.environ
+        },
+    }
 
-# MongoDB connection
-client = MongoClient(os.getenv('MONGODB_URI'))
-db = client['Gambling-App']
+class LazyMongo:
+    # MongoClient isn't fork-safe, so it is built on first use and per process:
+    # each gunicorn worker connects after fork, never in the master.
+    def __init__(self, uri: str, db_name: str, max_pool_size: int, event_listeners: list = None):
+        self.uri = uri
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.event_listeners = event_listeners or []
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def client(self) -> MongoClient:
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = MongoClient(
+                        self.uri, maxPoolSize=self.max_pool_size, event_listeners=self.event_listeners,
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    def db(self):
+        return self.client()[self.db_name]
+
+    def close(self):
+        # Close our own client; one inherited across fork is only dropped
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+def get_db():
+    return current_app.extensions['mongo'].db()
+
+def get_credit_budget() -> CreditBudget:
+    return current_app.extensions['credit_budget']
+
+def get_odds_api() -> OddsApiClient:
+    return current_app.extensions['odds_api']
+
+def get_password_hasher() -> PasswordHasher:
+    return current_app.extensions['password_hasher']
+
+def hasher_busy_response():
+    PASSWORD_HASH_REJECTED.inc(route=metrics_route())
+    resp = jsonify({'status': 'error', 'message': 'Too many sign-ins right now; try again shortly'})
+    resp.headers['Retry-After'] = '1'
+    return resp, 503
+
+db = LocalProxy(get_db)
+
+api = Blueprint('api', __name__)
 
-JWT_SECRET       = os.getenv("JWT_SECRET")
 JWT_ALG          = "HS256"
-JWT_ISSUER       = os.getenv("JWT_ISSUER")
-JWT_AUDIENCE     = os.getenv("JWT_AUDIENCE")
-JWT_EXP_SECONDS  = int(os.getenv("JWT_EXP_SECONDS")) 
-COOKIE_SECURE    = os.getenv("COOKIE_SECURE", "0") == "1"     
 COOKIE_NAME      = "auth_token"
 
-
 # Initial daily credit for users
 DAILY_CREDIT = 1000
 
@@ -53,34 +297,336 @@ SPORT_MAPPING = {
     'soccer_usa_mls': {'sport': 'soccer', 'league': 'MLS'}
 }
 
+# Months each league plays (regular season through playoffs), for credit priority
+SPORT_SEASONS = {
+    'americanfootball_nfl': {9, 10, 11, 12, 1, 2},
+    'basketball_nba': {10, 11, 12, 1, 2, 3, 4, 5, 6},
+    'baseball_mlb': {3, 4, 5, 6, 7, 8, 9, 10, 11},
+    'icehockey_nhl': {10, 11, 12, 1, 2, 3, 4, 5, 6},
+    'americanfootball_ncaaf': {8, 9, 10, 11, 12, 1},
+    'basketball_ncaab': {11, 12, 1, 2, 3, 4},
+    'soccer_usa_mls': {2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12},
+}
+
+# Documented upstream costs per call
+ODDS_CREDIT_COST = 3    # 3 markets x 1 region
+SCORES_CREDIT_COST = 2  # scores with daysFrom
+
+# A game that started this recently may still be in progress
+IN_PROGRESS_WINDOW = timedelta(hours=4)
+
+# Daily credit is applied lazily. Each user carries the credit period their
+# balance belongs to (credit_day in CREDIT_TIMEZONE plus credit_gen); the first
+# balance read or write in a newer period refills it to DAILY_CREDIT with one
+# conditional update. /api/reset only bumps the generation in db.Meta, and
+# tools/credit_sweeper.py catches up users who don't come back.
+CREDIT_META_ID = 'daily_credit'
+CREDIT_FIELDS = {'balance': 1, 'credit_day': 1, 'credit_gen': 1}
+CREDIT_GENERATION_TTL = 5  # seconds read-only balance listings may lag behind a reset
+_credit_lock = threading.Lock()
+_credit_generation = (0, None)  # (generation, fetched_at)
+
+def credit_day(now: datetime = None) -> str:
+    tz = ZoneInfo(current_app.config['CREDIT_TIMEZONE'])
+    return (now or datetime.now(timezone.utc)).astimezone(tz).date().isoformat()
+
+def cached_credit_generation():
+    # None once the cached value is too old to trust
+    with _credit_lock:
+        generation, fetched_at = _credit_generation
+        if fetched_at is None or time.monotonic() - fetched_at > CREDIT_GENERATION_TTL:
+            return None
+        return generation
+
+def remember_credit_generation(meta) -> int:
+    global _credit_generation
+    generation = (meta or {}).get('generation', 0)
+    with _credit_lock:
+        _credit_generation = (generation, time.monotonic())
+    return generation
+
+def credit_period(fresh: bool = False) -> dict:
+    # fresh reads the generation from Meta instead of this worker's cache; every path that
+    # refills or spends a balance passes it, so a reset applies at once whichever worker serves it
+    generation = None if fresh else cached_credit_generation()
+    if generation is None:
+        return credit_period_of(db.Meta.find_one({'_id': CREDIT_META_ID}, {'generation': 1}))
+    return {'credit_day': credit_day(), 'credit_gen': generation}
+
+def credit_period_of(meta) -> dict:
+    # The current period from a fresh read of the Meta generation (shared with asgi.refresh_credit)
+    return {'credit_day': credit_day(), 'credit_gen': remember_credit_generation(meta)}
+
+def credit_is_current(user: dict, period: dict) -> bool:
+    return user.get('credit_day') == period['credit_day'] and user.get('credit_gen') == period['credit_gen']
+
+def credit_stale_filter(period: dict) -> dict:
+    # Users whose balance belongs to an older period
+    return {'$or': [{'credit_day': {'$ne': period['credit_day']}}, {'credit_gen': {'$ne': period['credit_gen']}}]}
+
+def credit_refill_update(period: dict) -> dict:
+    return {'$set': {'balance': DAILY_CREDIT, **period}}
+
+def credit_refill(username: str, period: dict) -> tuple:
+    # (filter, update) refilling `username` unless a concurrent request already moved it to `period`
+    return {'username': username, **credit_stale_filter(period)}, credit_refill_update(period)
+
+def effective_balance(user: dict, period: dict) -> float:
+    # The balance a user will see once refilled; for read-only listings
+    return user.get('balance', 0) if credit_is_current(user, period) else DAILY_CREDIT
+
+def refresh_credit(username: str, user: dict, period: dict) -> float:
+    """
+    Apply the daily refill to `user` (read with CREDIT_FIELDS) if it is from
+    an older period, and return the current balance.
+    """
+    if credit_is_current(user, period):
+        return user.get('balance', 0)
+    refreshed = db.Users.find_one_and_update(
+        *credit_refill(username, period),
+        projection={'balance': 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if refreshed is None:
+        # A concurrent request refilled it first
+        refreshed = db.Users.find_one({'username': username}, {'balance': 1}) or {}
+    else:
+        CREDIT_REFILLS.inc(source='request')
+    return refreshed.get('balance', 0)
+
+# Leaderboard cache. Profits only move on settlement or reset, so pages are
+# cached per (limit, offset) and dropped whenever those routes bump the version.
+# The version is per worker: a bump doesn't reach other workers, whose pages
+# stay until LEADERBOARD_CACHE_TTL expires them, so that is how stale a page
+# (or a matching 304) can be after a write.
+_leaderboard_lock = threading.Lock()
+_leaderboard_version = 1
+_leaderboard_cache = {}  # (limit, offset) -> (version, cached_at, etag, payload)
+
+def bump_leaderboard_version():
+    # Called whenever profits change so cached pages go stale
+    global _leaderboard_version
+    with _leaderboard_lock:
+        _leaderboard_version += 1
+        _leaderboard_cache.clear()
+
+def leaderboard_etag(payload: dict) -> str:
+    # Content hash so identical pages share an ETag across recomputes and workers
+    return hashlib.sha1(dumps_bytes(payload, sort_keys=True)).hexdigest()
+
+def get_cached_leaderboard(limit: int, offset: int):
+    # Returns (etag, payload) for this page if it is still current
+    with _leaderboard_lock:
+        entry = _leaderboard_cache.get((limit, offset))
+        if not entry:
+            return None
+        version, cached_at, etag, payload = entry
+        if version != _leaderboard_version or time.monotonic() - cached_at > current_app.config['LEADERBOARD_CACHE_TTL']:
+            _leaderboard_cache.pop((limit, offset), None)
+            return None
+        return etag, payload
+
+def store_cached_leaderboard(limit: int, offset: int, version: int, etag: str, payload: dict):
+    with _leaderboard_lock:
+        # Don't store a page computed before a concurrent bump
+        if version == _leaderboard_version:
+            _leaderboard_cache[(limit, offset)] = (version, time.monotonic(), etag, payload)
+
+# HTTP caching for read endpoints (see cache_response)
+CACHE_BODY_SIZES_MAX = 4096
+_cache_sizes_lock = threading.Lock()
+_cache_body_sizes = OrderedDict()  # (policy, etag) -> body size, for 304s answered before the handler runs; LRU
+
+def remember_body_size(policy: str, etag: str, size: int):
+    with _cache_sizes_lock:
+        _cache_body_sizes[(policy, etag)] = size
+        _cache_body_sizes.move_to_end((policy, etag))
+        if len(_cache_body_sizes) > CACHE_BODY_SIZES_MAX:
+            _cache_body_sizes.popitem(last=False)
+
+def cached_body_size(policy: str, etag: str) -> int:
+    with _cache_sizes_lock:
+        size = _cache_body_sizes.get((policy, etag))
+        if size is None:
+            return 0
+        _cache_body_sizes.move_to_end((policy, etag))
+        return size
+
+def record_cache_hit(policy: str, not_modified: bool, size: int):
+    CACHE_RESPONSES.inc(policy=policy)
+    if not_modified:
+        CACHE_NOT_MODIFIED.inc(policy=policy)
+        CACHE_BYTES_SAVED.inc(size, policy=policy)
+
+def cache_control_header(policy: str) -> str:
+    settings = CACHE_POLICIES[policy]
+    max_age = current_app.config['CACHE_MAX_AGE'].get(policy, settings['max_age'])
+    cache_control = f"{settings['scope']}, max-age={max_age}"
+    if max_age == 0:
+        cache_control += ", must-revalidate"
+    return cache_control
+
+def cache_response(policy: str, etag_fn=None):
+    """
+    Decorator for GET routes: sets Cache-Control from CACHE_POLICIES, tags
+    200 responses with a strong ETag (sha1 of the body unless the handler set
+    one) and answers If-None-Match with 304.
+
+    etag_fn(*args, **kwargs) may return the current ETag from a data version
+    so unchanged resources skip the handler entirely.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_control = cache_control_header(policy)
+
+            if etag_fn and request.if_none_match:
+                etag = etag_fn(*args, **kwargs)
+                if etag and request.if_none_match.contains_weak(etag):
+                    resp = make_response('', 304)
+                    resp.set_etag(etag)
+                    resp.headers['Cache-Control'] = cache_control
+                    record_cache_hit(policy, True, cached_body_size(policy, etag))
+                    return resp
+
+            resp = make_response(fn(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+
+            etag, _ = resp.get_etag()
+            if not etag:
+                resp.add_etag()
+                etag, _ = resp.get_etag()
+            size = resp.content_length or len(resp.get_data())
+            remember_body_size(policy, etag, size)
+
+            resp.headers['Cache-Control'] = cache_control
+            resp.make_conditional(request)
+            record_cache_hit(policy, resp.status_code == 304, size)
+            return resp
+        return wrapper
+    return decorator
+
+@api.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.mongo_commands = 0
+    g.mongo_seconds = 0.0
+
+def observe_request(route: str, method: str, path: str, status: int, elapsed: float,
+                    mongo_commands: int, mongo_seconds: float, slow_ms: float):
+    # Latency metrics and the request log line; shared with the async routes in asgi.py
+    HTTP_LATENCY.observe(elapsed, route=route, method=method, status=status)
+    HTTP_MONGO_COMMANDS.observe(mongo_commands, route=route)
+
+    duration_ms = round(elapsed * 1000, 2)
+    if status >= 500:
+        level = logging.ERROR
+    elif duration_ms >= slow_ms:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    request_log.log(level, 'request', extra={
+        'method': method,
+        'route': route,
+        'path': path,
+        'status': status,
+        'duration_ms': duration_ms,
+        'mongo_commands': mongo_commands,
+        'mongo_ms': round(mongo_seconds * 1000, 2),
+    })
+
+# Registered before compress_response so it runs after it and times the whole response
+@api.after_app_request
+def record_request_metrics(resp):
+    started = g.get('request_started')
+    if started is not None:
+        observe_request(
+            metrics_route(), request.method, request.path, resp.status_code, time.perf_counter() - started,
+            g.get('mongo_commands', 0), g.get('mongo_seconds', 0.0), current_app.config['LOG_SLOW_REQUEST_MS'],
+        )
+        resp.headers['X-Request-ID'] = g.request_id
+    return resp
+
+def negotiate_encoding():
+    # Best Content-Encoding the client accepts, or None for identity
+    return request.accept_encodings.best_match(ENCODINGS)
+
+@api.after_app_request
+def compress_response(resp):
+    # Compress large text responses; routes that precompress set Content-Encoding themselves
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or 'Content-Encoding' in resp.headers or resp.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return resp
+    resp.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if not encoding:
+        return resp
+    data = resp.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return resp
+    resp.set_data(compress(data, encoding))
+    resp.headers['Content-Encoding'] = encoding
+    # Same entity, different bytes: the ETag can only vouch for it weakly
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
 def generate_jwt(claims: dict) -> str:
     # Encode signed JWT, must include username in claims
+    config = current_app.config
     now = int(time.time())
     payload = {
-        "iss": JWT_ISSUER,      # Issuer of JWT
-        "aud": JWT_AUDIENCE,    # Audience of JWT   
+        "iss": config['JWT_ISSUER'],      # Issuer of JWT
+        "aud": config['JWT_AUDIENCE'],    # Audience of JWT   
         "iat": now,             # Issued at
         "nbf": now,             # Not before
-        "exp": now + JWT_EXP_SECONDS,  # Expiration time
+        "exp": now + config['JWT_EXP_SECONDS'],  # Expiration time
         **claims,               # Put the username in type shi 
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
+    return jwt.encode(payload, config['JWT_SECRET'], algorithm=JWT_ALG)
 
 def verify_jwt(token: str):
-    # Decode and verify JWT 
+    # Decode and verify JWT, or reuse the claims from an earlier verification
+    cache = current_app.extensions['claims_cache']
+    now = time.time()
+    claims = cache.get(token, now)
+    if claims is not None:
+        JWT_CLAIMS_CACHE.inc(result='hit')
+        return claims
+    JWT_CLAIMS_CACHE.inc(result='miss')
+
+    config = current_app.config
     try:
-        return jwt.decode(
+        claims = jwt.decode(
             token,
-            JWT_SECRET,
+            config['JWT_SECRET'],
             algorithms=[JWT_ALG],
-            issuer=JWT_ISSUER,
-            audience=JWT_AUDIENCE,
+            issuer=config['JWT_ISSUER'],
+            audience=config['JWT_AUDIENCE'],
             options={"require": ["exp", "iat", "iss", "aud"]},
             leeway=10, # incase of clock skew 
         )
     except jwt.PyJWTError:
         return None
+    cache.put(token, claims, now)
+    return claims
+
+
+# Users carry a token_gen (absent = 0) and tokens a matching `gen` claim. change_password bumps
+# token_gen, which revokes every token issued before it on every worker, cached claims included
+AUTH_FIELDS = {'token_gen': 1}
 
+def token_current(claims: dict, user) -> bool:
+    # The token's user still exists and hasn't rotated tokens since it was issued
+    return bool(user) and claims.get('gen', 0) == user.get('token_gen', 0)
+
+def token_claims(token: str):
+    # Verified claims naming a user, or None; callers then check them against the user (token_current)
+    claims = verify_jwt(token) if token else None
+    return claims if claims and claims.get('sub') else None
 
 def get_token_from_request():
     # Get token from cookies
@@ -90,16 +636,10 @@ def auth_required(fn):
     # Decorator to protect routes by verifying JWT 
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        token = get_token_from_request()
-        claims = verify_jwt(token) if token else None
-        if not claims:
-            return jsonify({"status": "error", "message": "unauthorized"}), 401
-        
-        # ensure user still exists
-        uname = claims.get("sub")
-        if not uname or not db.Users.find_one({"username": uname}):
+        claims = token_claims(get_token_from_request())
+        # ensure user still exists and the token wasn't revoked; checked on cache hits too
+        if not claims or not token_current(claims, db.Users.find_one({"username": claims["sub"]}, AUTH_FIELDS)):
             return jsonify({"status": "error", "message": "unauthorized"}), 401
-        from flask import g
         g.user_claims = claims
         return fn(*args, **kwargs)
     return wrapper
@@ -108,21 +648,29 @@ def set_auth_cookie(resp, token: str):
     resp.set_cookie(
         COOKIE_NAME,
         token,
-        max_age=JWT_EXP_SECONDS,
+        max_age=current_app.config['JWT_EXP_SECONDS'],
         httponly=True,           
         samesite="Lax",         
-        secure=COOKIE_SECURE,    # True in prod
+        secure=current_app.config['COOKIE_SECURE'],    # True in prod
         path="/",
     )
     return resp
 
 def clear_auth_cookie(resp):
-    resp.set_cookie(COOKIE_NAME, "", max_age=0, httponly=True, samesite="Lax", secure=COOKIE_SECURE, path="/")
+    resp.set_cookie(COOKIE_NAME, "", max_age=0, httponly=True, samesite="Lax", secure=current_app.config['COOKIE_SECURE'], path="/")
     return resp
 
-def to_iso(v):
-    from datetime import datetime as dt
-    return v.isoformat() if isinstance(v, dt) else v
+def lean_response() -> bool:
+    return current_app.config['JSON_LEAN'] or request.args.get('lean', '').lower() in ('1', 'true')
+
+def api_usage(credits_used, credits_remaining, cost_breakdown: str, lean: bool) -> dict:
+    usage = {
+        'credits_used': credits_used,
+        'credits_remaining': credits_remaining,
+    }
+    if not lean:
+        usage['cost_breakdown'] = cost_breakdown
+    return usage
 
 def parse_iso_z(s: str) -> datetime:
     # The Odds API returns ISO with trailing 'Z'. Make it tz-aware.
@@ -133,21 +681,198 @@ def parse_iso_z(s: str) -> datetime:
 def fetch_events_for_sport(sport_key: str, event_ids: list[str]) -> dict:
     # Calls /v4/sports/{sport}/events?apiKey=...&dateFormat=iso&eventIds=...
     # Returns dict[id] -> event_json. Raises on HTTP error.
-    base_url = "https://api.the-odds-api.com/v4"
-    params = {
-        'apiKey': os.getenv('ODDS_API'),
-        'dateFormat': 'iso',
-        'eventIds': ','.join(map(str, event_ids))
-    }
-    url = f"{base_url}/sports/{sport_key}/events"
-    resp = requests.get(url, params=params, timeout=10)
+    resp = get_odds_api().events(sport_key, event_ids)
     if resp.status_code != 200:
         raise RuntimeError(f"Events API error {resp.status_code} for sport={sport_key}")
     events = resp.json() or []
     return {e.get('id'): e for e in events}
 
 
-@app.route('/api/games/upcoming', methods=['GET'])
+def format_odds_games(games_data: list, sport: str) -> list:
+    # Organize each upstream game's bookmaker markets into our odds tree
+    formatted_games = []
+    sport_info = SPORT_MAPPING[sport]
+
+    # Process each game
+    for game in games_data:
+        # Organize odds by market type for easy access
+        organized_odds = {
+            'moneyline': {},
+            'spread': {},
+            'total': {}
+        }
+        
+        # Process all bookmakers for this game
+        for bookmaker in game.get('bookmakers', []):
+            book_name = bookmaker['key']
+            
+            for market in bookmaker.get('markets', []):
+                market_key = market['key']
+                
+                if market_key == 'h2h':  # Moneyline
+                    for outcome in market['outcomes']:
+                        organized_odds['moneyline'][outcome['name']] = {
+                            'odds': outcome['price'],
+                            'bookmaker': book_name
+                        }
+                
+                elif market_key == 'spreads':
+                    for outcome in market['outcomes']:
+                        organized_odds['spread'][outcome['name']] = {
+                            'odds': outcome['price'],
+                            'line': outcome.get('point'),
+                            'bookmaker': book_name
+                        }
+                
+                elif market_key == 'totals':
+                    for outcome in market['outcomes']:
+                        key = 'over' if 'over' in outcome['name'].lower() else 'under'
+                        organized_odds['total'][key] = {
+                            'odds': outcome['price'],
+                            'line': outcome.get('point'),
+                            'bookmaker': book_name
+                        }
+        
+        # Create game response
+        game_response = {
+            'game_id': game['id'],
+            'sport': sport_info['sport'],
+            'league': sport_info['league'],
+            'home_team': game['home_team'],
+            'away_team': game['away_team'],
+            'game_time': game['commence_time'],
+            'odds': organized_odds,
+            'total_bookmakers': len(game.get('bookmakers', []))
+        }
+        
+        formatted_games.append(game_response)
+
+    return formatted_games
+
+STALE_WARNING = '110 - "Response is Stale"'
+
+def refresh_priority(sport: str, game_times, now: datetime) -> int:
+    # HIGH with a game near kickoff or in progress, LOW out of season, else NORMAL
+    window = timedelta(minutes=current_app.config['ODDS_KICKOFF_WINDOW_MINUTES'])
+    for game_time in game_times:
+        try:
+            start = parse_iso_z(game_time)
+        except (TypeError, ValueError):
+            continue
+        if now - IN_PROGRESS_WINDOW <= start <= now + window:
+            return PRIORITY_HIGH
+    if now.month not in SPORT_SEASONS.get(sport, range(1, 13)):
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+def spend_credits(sport: str, cost: int, game_times, have_cache: bool) -> tuple:
+    # Returns (allowed, reason); game_times are the cached games' start times, if any
+    priority = refresh_priority(sport, game_times, datetime.now(timezone.utc))
+    allowed, reason = get_credit_budget().acquire(sport, cost, priority, have_cache, time.monotonic())
+    if not allowed:
+        ODDS_API_BUDGET_DENIALS.inc(sport=sport, reason=reason)
+        log.info("credit budget skipped refresh", extra={'sport': sport, 'reason': reason, 'have_cache': have_cache})
+    return allowed, reason
+
+def circuit_open_response(e: CircuitOpenError):
+    # Upstream is failing and nothing is cached to fall back on
+    resp = jsonify({
+        'status': 'error',
+        'message': 'The Odds API is unavailable; try again later',
+        'error': str(e)
+    })
+    resp.headers['Retry-After'] = str(e.retry_after)
+    return resp, 503
+
+class OddsUnavailable(Exception):
+    """No odds to serve for a sport; `payload` is the error body, sent with `status`."""
+
+    def __init__(self, status: int, payload: dict, retry_after: int = None):
+        super().__init__(payload['message'])
+        self.status = status
+        self.payload = payload
+        self.retry_after = retry_after
+
+def budget_exhausted_payload(sport: str, reason: str) -> dict:
+    # Nothing cached to fall back on
+    return {
+        'status': 'error',
+        'message': 'The Odds API credit budget is exhausted; try again later',
+        'reason': reason,
+        'sport': sport
+    }
+
+# Upcoming odds cache. One upstream call per sport per ODDS_CACHE_TTL; each entry
+# also keeps its serialized (and compressed) bodies so every variant is encoded
+# once per refresh rather than once per request.
+_odds_cache_lock = threading.Lock()
+_odds_cache = {}  # sport -> {'fetched_at', 'games', 'credits_used', 'credits_remaining', 'bodies'}
+
+def get_cached_odds(sport: str, allow_stale: bool = False):
+    # allow_stale returns the last entry whatever its age (for when refreshing isn't allowed)
+    with _odds_cache_lock:
+        entry = _odds_cache.get(sport)
+    if entry and (allow_stale or time.time() - entry['fetched_at'] < current_app.config['ODDS_CACHE_TTL']):
+        return entry
+    return None
+
+def store_cached_odds(sport: str, games: list, credits_used, credits_remaining) -> dict:
+    # Every refresh, whichever route or mode made it, goes through here and is pushed to stream clients
+    entry = {
+        'fetched_at': time.time(),
+        'games': games,
+        'credits_used': credits_used,
+        'credits_remaining': credits_remaining,
+        'bodies': {},  # (lean, encoding, stale) -> (body, etag, encoding)
+        'games_by_id': {game['game_id']: game for game in games},  # for pricing placements
+    }
+    with _odds_cache_lock:
+        previous = _odds_cache.get(sport)
+        _odds_cache[sport] = entry
+    if ODDS_STREAM.subscribers(sport):
+        publish_odds_changes(sport, previous['games'] if previous else [], entry)
+    return entry
+
+def upcoming_games_payload(sport: str, entry: dict, lean: bool, stale: bool = False) -> dict:
+    return {
+        'status': 'success',
+        'data': {
+            'games': entry['games'],
+            'total_games': len(entry['games']),
+            'sport': sport,
+            'league': SPORT_MAPPING[sport]['league'],
+            'fetch_timestamp': datetime.fromtimestamp(entry['fetched_at']).isoformat(),
+            'source': 'The Odds API',
+            # True when served past ODDS_CACHE_TTL because refreshing failed or wasn't budgeted
+            'stale': stale
+        },
+        'api_usage': api_usage(entry['credits_used'], entry['credits_remaining'], '3 markets × 1 region = 3 credits', lean)
+    }
+
+def cached_odds_body(sport: str, entry: dict, lean: bool, encoding, stale: bool = False):
+    # Returns (body, etag, encoding) for this variant, encoding it on first use
+    key = (lean, encoding, stale)
+    with _odds_cache_lock:
+        cached = entry['bodies'].get(key)
+    if cached:
+        return cached
+
+    if encoding is None:
+        payload = upcoming_games_payload(sport, entry, lean, stale)
+        body = dumps_bytes(payload, sort_keys=current_app.json.sort_keys) + b"\n"
+        result = (body, hashlib.sha1(body).hexdigest(), None)
+    else:
+        body, etag, _ = cached_odds_body(sport, entry, lean, None, stale)
+        if len(body) < current_app.config['COMPRESS_MIN_SIZE']:
+            result = (body, etag, None)
+        else:
+            result = (compress(body, encoding), etag, encoding)
+    with _odds_cache_lock:
+        entry['bodies'][key] = result
+    return result
+
+@api.route('/api/games/upcoming', methods=['GET'])
+@cache_response('games_upcoming')
 def get_upcoming_games():
     """
     Get upcoming games using The Odds API (optimized for minimal costs)
@@ -156,8 +881,6 @@ def get_upcoming_games():
     - sport: Required - specific sport (e.g., "baseball_mlb", "basketball_nba")
     """
     try:
-        print("🚀 Fetching upcoming games from The Odds API...")
-        
         # Get required sport parameter
         sport = request.args.get('sport', '').strip().lower()
         
@@ -176,112 +899,29 @@ def get_upcoming_games():
                 'available_sports': list(SPORT_MAPPING.keys())
             }), 400
         
-        api_key = os.getenv('ODDS_API')
-        base_url = "https://api.the-odds-api.com/v4"
-        
-        print(f"🔍 Fetching {sport} games...")
-        
-        # Optimized request - single sport, single region, all markets
-        params = {
-            'apiKey': api_key,
-            'regions': 'us',  # Single region to minimize cost
-            'markets': 'h2h,spreads,totals',  # 3 markets
-            'oddsFormat': 'american'
-        }
-        
-        # Make API request
-        url = f"{base_url}/sports/{sport}/odds"
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code != 200:
-            return jsonify({
-                'status': 'error',
-                'message': f'The Odds API error: {response.status_code}',
-                'sport': sport
-            }), 500
-        
-        games_data = response.json()
-        
-        # Get credit usage from headers
-        credits_used = response.headers.get('x-requests-last', '3')  # Default to 3 (3 markets × 1 region)
-        credits_remaining = response.headers.get('x-requests-remaining', 'unknown')
-        
-        formatted_games = []
-        sport_info = SPORT_MAPPING[sport]
-        
-        # Process each game
-        for game in games_data:
-            # Organize odds by market type for easy access
-            organized_odds = {
-                'moneyline': {},
-                'spread': {},
-                'total': {}
-            }
-            
-            # Process all bookmakers for this game
-            for bookmaker in game.get('bookmakers', []):
-                book_name = bookmaker['key']
-                
-                for market in bookmaker.get('markets', []):
-                    market_key = market['key']
-                    
-                    if market_key == 'h2h':  # Moneyline
-                        for outcome in market['outcomes']:
-                            organized_odds['moneyline'][outcome['name']] = {
-                                'odds': outcome['price'],
-                                'bookmaker': book_name
-                            }
-                    
-                    elif market_key == 'spreads':
-                        for outcome in market['outcomes']:
-                            organized_odds['spread'][outcome['name']] = {
-                                'odds': outcome['price'],
-                                'line': outcome.get('point'),
-                                'bookmaker': book_name
-                            }
-                    
-                    elif market_key == 'totals':
-                        for outcome in market['outcomes']:
-                            key = 'over' if 'over' in outcome['name'].lower() else 'under'
-                            organized_odds['total'][key] = {
-                                'odds': outcome['price'],
-                                'line': outcome.get('point'),
-                                'bookmaker': book_name
-                            }
-            
-            # Create game response
-            game_response = {
-                'game_id': game['id'],
-                'sport': sport_info['sport'],
-                'league': sport_info['league'],
-                'home_team': game['home_team'],
-                'away_team': game['away_team'],
-                'game_time': game['commence_time'],
-                'odds': organized_odds,
-                'total_bookmakers': len(game.get('bookmakers', []))
-            }
-            
-            formatted_games.append(game_response)
-        
-        print(f" Retrieved {len(formatted_games)} upcoming games")
-        
-        return jsonify({
-            'status': 'success',
-            'data': {
-                'games': formatted_games,
-                'total_games': len(formatted_games),
-                'sport': sport,
-                'league': sport_info['league'],
-                'fetch_timestamp': datetime.now().isoformat(),
-                'source': 'The Odds API'
-            },
-            'api_usage': {
-                'credits_used': credits_used,
-                'credits_remaining': credits_remaining,
-                'cost_breakdown': '3 markets × 1 region = 3 credits'
-            }
-        }), 200
-        
+        entry, stale = current_odds(sport)
+
+        # Serve the precompressed body for this client's encoding
+        body, etag, encoding = cached_odds_body(sport, entry, lean_response(), negotiate_encoding(), stale)
+        resp = make_response(body, 200)
+        resp.mimetype = 'application/json'
+        resp.set_etag(etag, weak=encoding is not None)
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+        if stale:
+            resp.headers['Warning'] = STALE_WARNING
+        resp.vary.add('Accept-Encoding')
+        return resp
+        
+    except OddsUnavailable as e:
+        resp = jsonify(e.payload)
+        if e.retry_after:
+            resp.headers['Retry-After'] = str(e.retry_after)
+        return resp, e.status
+
+    except CircuitOpenError as e:
+        return circuit_open_response(e)
+
     except requests.exceptions.Timeout:
         return jsonify({
             'status': 'error',
@@ -296,25 +936,486 @@ def get_upcoming_games():
         }), 500
         
     except Exception as e:
-        print(f" Error in get_upcoming_games: {e}")
+        log.exception("get_upcoming_games failed")
         return jsonify({
             'status': 'error',
             'message': 'Internal server error',
             'error': str(e)
         }), 500
 
-@app.route('/api/games/completed', methods=['GET'])
+# Live odds over Server-Sent Events. Stream clients share one broadcaster per
+# process: each refresh is diffed against the previous slate once and the
+# encoded diff goes to every open connection. While a sport has listeners, a
+# poller thread refreshes it every ODDS_CACHE_TTL (within the credit budget),
+# so listeners cost one upstream poll between them, not one each.
+STREAM_QUEUE_SIZE = 100  # events buffered per client before it is dropped
+ODDS_STREAM = Broadcaster(STREAM_QUEUE_SIZE)
+_odds_pollers_lock = threading.Lock()
+_odds_pollers = {}  # sport -> poller thread in this process
+_odds_refresh_locks = {}  # sport -> lock, so concurrent current_odds callers make one upstream call
+
+def diff_odds_games(old_games: list, new_games: list) -> dict:
+    # Added games in full, changed games with only the markets/fields that moved, removed game ids
+    old_by_id = {game['game_id']: game for game in old_games}
+    added, changed = [], []
+    for game in new_games:
+        before = old_by_id.pop(game['game_id'], None)
+        if before is None:
+            added.append(game)
+            continue
+        if before == game:
+            continue
+        delta = {'game_id': game['game_id']}
+        markets = {market: prices for market, prices in game['odds'].items() if before['odds'].get(market) != prices}
+        if markets:
+            delta['odds'] = markets
+        for field in ('game_time', 'total_bookmakers'):
+            if before.get(field) != game.get(field):
+                delta[field] = game.get(field)
+        changed.append(delta)
+    return {'added': added, 'changed': changed, 'removed': list(old_by_id)}
+
+def publish_odds_changes(sport: str, old_games: list, entry: dict):
+    diff = diff_odds_games(old_games, entry['games'])
+    if not (diff['added'] or diff['changed'] or diff['removed']):
+        return
+    diff['sport'] = sport
+    diff['fetch_timestamp'] = datetime.fromtimestamp(entry['fetched_at']).isoformat()
+    delivered, dropped = ODDS_STREAM.publish(sport, 'odds', dumps_bytes(diff))
+    ODDS_STREAM_EVENTS.inc(sport=sport)
+    if dropped:
+        ODDS_STREAM_DROPPED.inc(dropped, sport=sport)
+        ODDS_STREAM_CLIENTS.set(ODDS_STREAM.subscribers(sport), sport=sport)
+
+def odds_snapshot(sport: str, entry) -> bytes:
+    # First event on every connection: the whole cached slate (empty until the first refresh)
+    return dumps_bytes({
+        'sport': sport,
+        'games': entry['games'] if entry else [],
+        'fetch_timestamp': datetime.fromtimestamp(entry['fetched_at']).isoformat() if entry else None,
+    })
+
+def current_odds(sport: str):
+    """
+    (entry, stale) for `sport`: the cached odds, refreshed from The Odds API
+    once they expire. Every caller goes through here (both apps' upcoming
+    routes, stream pollers, bet pricing), so a burst of requests on an
+    expired sport makes one upstream call per process. Falls back to the
+    last slate when the budget or upstream says no; raises OddsUnavailable
+    (or the upstream error) when there is none.
+    """
+    entry = get_cached_odds(sport)
+    if entry is not None:
+        return entry, False
+    with _odds_pollers_lock:
+        lock = _odds_refresh_locks.setdefault(sport, threading.Lock())
+    with lock:
+        # Whoever held the lock may have just refreshed it
+        entry = get_cached_odds(sport)
+        if entry is not None:
+            return entry, False
+        return refresh_odds(sport)
+
+def refresh_odds(sport: str):
+    # current_odds with the sport's refresh lock held
+    last = get_cached_odds(sport, allow_stale=True)
+    allowed, reason = spend_credits(
+        sport, ODDS_CREDIT_COST, [game['game_time'] for game in last['games']] if last else [], last is not None,
+    )
+    if not allowed:
+        if last is None:
+            raise OddsUnavailable(503, budget_exhausted_payload(sport, reason), retry_after=60)
+        return last, True
+
+    log.info("fetching upcoming games from The Odds API", extra={'sport': sport})
+    try:
+        # Optimized request - single sport, single region, all markets
+        response = get_odds_api().odds(sport)
+        upstream_failed = is_upstream_failure(response.status_code)
+    except requests.exceptions.RequestException:
+        if last is None:
+            raise
+        response, upstream_failed = None, True
+
+    if upstream_failed and last is not None:
+        log.warning("serving stale odds; upstream unavailable", extra={'sport': sport})
+        return last, True
+    if response.status_code != 200:
+        raise OddsUnavailable(500, {
+            'status': 'error',
+            'message': f'The Odds API error: {response.status_code}',
+            'sport': sport
+        })
+
+    # Credit usage from headers; default to 3 (3 markets × 1 region)
+    entry = store_cached_odds(
+        sport, format_odds_games(response.json(), sport),
+        response.headers.get('x-requests-last', '3'), response.headers.get('x-requests-remaining', 'unknown'),
+    )
+    log.info("retrieved upcoming games", extra={'sport': sport, 'games': len(entry['games'])})
+    return entry, False
+
+def poll_odds(sport: str):
+    # One refresh on behalf of stream listeners or bet pricing; a no-op while the cache is fresh
+    try:
+        current_odds(sport)
+    except OddsUnavailable as e:
+        log.warning("odds refresh failed", extra={'sport': sport, 'status': e.status})
+
+def run_odds_poller(app: Flask, sport: str):
+    while True:
+        with _odds_pollers_lock:
+            # Decided under the lock so a concurrent subscribe either sees this thread or starts a new one
+            if not ODDS_STREAM.subscribers(sport):
+                _odds_pollers.pop(sport, None)
+                return
+        with app.app_context():
+            try:
+                poll_odds(sport)
+            except Exception:
+                log.exception("stream refresh failed", extra={'sport': sport})
+            interval = app.config['ODDS_CACHE_TTL']
+        time.sleep(interval)
+
+def ensure_odds_poller(app: Flask, sport: str):
+    with _odds_pollers_lock:
+        poller = _odds_pollers.get(sport)
+        if poller is None or not poller.is_alive():
+            poller = threading.Thread(target=run_odds_poller, args=(app, sport), name=f"odds-poller-{sport}", daemon=True)
+            _odds_pollers[sport] = poller
+            poller.start()
+
+def open_odds_stream(sport: str, loop=None):
+    """
+    Subscribe to `sport` and return (subscription, snapshot frame). Subscribing
+    before reading the cache means no refresh can fall between the two.
+    """
+    sub = ODDS_STREAM.subscribe(sport, loop)
+    ODDS_STREAM_CLIENTS.set(ODDS_STREAM.subscribers(sport), sport=sport)
+    ensure_odds_poller(current_app._get_current_object(), sport)
+    return sub, sse_frame('snapshot', odds_snapshot(sport, get_cached_odds(sport, allow_stale=True)))
+
+def close_odds_stream(sub):
+    sub.close()
+    ODDS_STREAM_CLIENTS.set(ODDS_STREAM.subscribers(sub.topic), sport=sub.topic)
+
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def stream_frame(sub, frame):
+    # What to send after waiting on `sub`: its frame, a keepalive if the wait timed out, None once dropped
+    if sub.dropped:
+        return None
+    return frame if frame is not None else KEEPALIVE
+
+def sse_response(sub, first: bytes, on_close) -> Response:
+    # Stream `first`, then the subscription's frames, with keepalives while idle
+    keepalive = current_app.config['STREAM_KEEPALIVE_SECONDS']
+
+    def events():
+        try:
+            yield first
+            while True:
+                frame = stream_frame(sub, sub.get(keepalive))
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            on_close(sub)
+
+    return Response(events(), mimetype='text/event-stream', headers=STREAM_HEADERS)
+
+@api.route('/api/games/stream', methods=['GET'])
+def stream_odds():
+    """
+    Server-Sent Events for one sport: a `snapshot` event with the cached
+    games, then an `odds` event ({added, changed, removed}) on every price
+    change. Under gunicorn each open stream holds a worker thread; serve
+    large audiences from the ASGI app (asgi.py), which streams the same events.
+    """
+    sport = request.args.get('sport', '').strip().lower()
+    if sport not in SPORT_MAPPING:
+        return jsonify({
+            'status': 'error',
+            'message': f'Invalid sport: {sport}' if sport else 'sport parameter is required',
+            'available_sports': list(SPORT_MAPPING.keys())
+        }), 400
+
+    sub, snapshot = open_odds_stream(sport)
+    return sse_response(sub, snapshot, close_odds_stream)
+
+# Per-user notifications. One change stream per process watches Bets and
+# Users; each change becomes a small event for the user it belongs to, and is
+# only encoded when that user has a stream open. A settlement then reaches
+# connected users as pushes instead of a round of bets/balance/stats refetches.
+# Change streams need a replica set (a single-node one is enough).
+USER_EVENTS = Broadcaster(STREAM_QUEUE_SIZE)
+BET_EVENT_FIELDS = ('user_id', 'status', 'outcome', 'wagered_amount', 'payout', 'profit', 'settled_at')
+BALANCE_EVENT_FIELDS = ('username', 'balance', 'profit', 'losses', 'rank')
+USER_EVENTS_PIPELINE = [
+    {'$match': {'ns.coll': {'$in': ['Bets', 'Users']}, 'operationType': {'$in': ['insert', 'update', 'replace']}}},
+    {'$project': {
+        'ns': 1, 'documentKey': 1,
+        **{f'fullDocument.{field}': 1 for field in dict.fromkeys(BET_EVENT_FIELDS + BALANCE_EVENT_FIELDS)},
+    }},
+]
+_user_watcher_lock = threading.Lock()
+_user_watcher = None  # change-stream thread in this process
+
+def user_change_event(change: dict):
+    # (user_id, event, payload) for a change, or None if it isn't for a user
+    doc = change.get('fullDocument')
+    if not doc:
+        return None  # deleted before the lookup
+    if change['ns']['coll'] == 'Bets':
+        payload = {'bet_id': str(change['documentKey']['_id'])}
+        payload.update((field, doc.get(field)) for field in BET_EVENT_FIELDS[1:])
+        return doc.get('user_id'), 'bet', payload
+    payload = {field: doc.get(field) for field in BALANCE_EVENT_FIELDS[1:]}
+    return doc.get('username'), 'balance', payload
+
+def publish_user_change(change: dict):
+    event = user_change_event(change)
+    if event is None:
+        return
+    user_id, name, payload = event
+    if not USER_EVENTS.subscribers(user_id):
+        return
+    delivered, _ = USER_EVENTS.publish(user_id, name, dumps_bytes(payload))
+    if delivered:
+        USER_EVENTS_PUBLISHED.inc(delivered, event=name)
+
+def user_watcher_wanted() -> bool:
+    global _user_watcher
+    with _user_watcher_lock:
+        # Decided under the lock so a concurrent subscribe either sees this thread or starts a new one
+        if USER_EVENTS.total():
+            return True
+        _user_watcher = None
+        return False
+
+def run_user_events_watcher(app: Flask):
+    resume_token, backoff = None, 1
+    while user_watcher_wanted():
+        try:
+            with app.app_context():
+                stream = get_db().watch(
+                    USER_EVENTS_PIPELINE, full_document='updateLookup', resume_after=resume_token, max_await_time_ms=1000,
+                )
+            with stream:
+                backoff = 1
+                # try_next returns None at least every second, so an unwatched stream is closed promptly
+                while user_watcher_wanted():
+                    change = stream.try_next()
+                    if change is not None:
+                        publish_user_change(change)
+                    resume_token = stream.resume_token
+            return
+        except PyMongoError as e:
+            if isinstance(e, OperationFailure) and e.code == 286:
+                resume_token = None  # ChangeStreamHistoryLost: the oplog moved past our token
+            log.warning("user events change stream failed; retrying", exc_info=True, extra={'retry_in': backoff})
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+def ensure_user_events_watcher(app: Flask):
+    global _user_watcher
+    with _user_watcher_lock:
+        if _user_watcher is None or not _user_watcher.is_alive():
+            _user_watcher = threading.Thread(
+                target=run_user_events_watcher, args=(app,), name='user-events-watcher', daemon=True,
+            )
+            _user_watcher.start()
+
+def user_events_snapshot(user_id: str) -> bytes:
+    # Sent on connect so the client starts from current numbers
+    user = db.Users.find_one({'username': user_id}, {'profit': 1, 'losses': 1, 'rank': 1, **CREDIT_FIELDS}) or {}
+    return sse_frame('balance', dumps_bytes({
+        'balance': effective_balance(user, credit_period()),
+        'profit': user.get('profit', 0),
+        'losses': user.get('losses', 0),
+        'rank': user.get('rank'),
+    }))
+
+def open_user_events(user_id: str, loop=None):
+    # Returns (subscription, first frame); subscribes before reading so no change falls between
+    sub = USER_EVENTS.subscribe(user_id, loop)
+    USER_EVENTS_CLIENTS.set(USER_EVENTS.total())
+    ensure_user_events_watcher(current_app._get_current_object())
+    return sub, user_events_snapshot(user_id)
+
+def close_user_events(sub):
+    sub.close()
+    USER_EVENTS_CLIENTS.set(USER_EVENTS.total())
+
+@api.route('/api/users/<user_id>/events', methods=['GET'])
+@auth_required
+def stream_user_events(user_id):
+    """
+    Server-Sent Events for the signed-in user: a `balance` event on connect
+    and whenever their user document changes, and a `bet` event
+    ({bet_id, status, outcome, wagered_amount, payout, profit, settled_at})
+    whenever one of their bets is placed, settled or cancelled.
+    """
+    if g.user_claims.get('sub') != user_id:
+        return jsonify({'status': 'error', 'message': 'forbidden'}), 403
+    sub, snapshot = open_user_events(user_id)
+    return sse_response(sub, snapshot, close_user_events)
+
+def format_completed_games(games_data: list, sport: str) -> list:
+    # Settlement-ready records for the upstream games that have finished
+    completed_games = []
+    sport_info = SPORT_MAPPING[sport]
+
+    # Process only completed games
+    for game in games_data:
+        if not game.get('completed', False):
+            continue  # Skip non-completed games
+        
+        # Extract scores
+        scores = {}
+        home_score = None
+        away_score = None
+        
+        for score in game.get('scores', []):
+            team_name = score['name']
+            team_score = int(score['score'])
+            scores[team_name] = team_score
+            
+            if team_name == game['home_team']:
+                home_score = team_score
+            elif team_name == game['away_team']:
+                away_score = team_score
+        
+        # Calculate betting outcomes
+        if home_score is not None and away_score is not None:
+            total_score = home_score + away_score
+            home_won = home_score > away_score
+            
+            # Create settlement-ready response
+            completed_game = {
+                'game_id': game['id'],
+                'sport': sport_info['sport'],
+                'league': sport_info['league'],
+                'home_team': game['home_team'],
+                'away_team': game['away_team'],
+                'game_time': game['commence_time'],
+                'completed': True,
+                'scores': {
+                    'home_score': home_score,
+                    'away_score': away_score,
+                    'total_score': total_score
+                },
+                'settlement_data': {
+                    'needs_settlement': True,
+                    'winner': 'home' if home_won else 'away',
+                    'betting_outcomes': {
+                        'moneyline': {
+                            'home_result': 'win' if home_won else 'loss',
+                            'away_result': 'loss' if home_won else 'win'
+                        },
+                        'total_score': total_score
+                    }
+                },
+                'last_update': game.get('last_update')
+            }
+            
+            completed_games.append(completed_game)
+
+    return completed_games
+
+# Completed games are persisted once in CompletedGames (a final score never
+# changes). Per sport we remember the games from the last /scores call;
+# upstream is only queried again once one we saw unfinished has started, the
+# odds cache shows a started game that call didn't know about, or the entry
+# is older than SCORES_MAX_AGE_MULTIPLE refresh intervals (games scheduled
+# after the last call).
+_scores_cache_lock = threading.Lock()
+_scores_cache = {}  # sport -> {'fetched_at', 'pending_times', 'game_ids', 'credits_used', 'credits_remaining'}
+
+# Scores calls cost the same for any daysFrom, so always fetch the widest window
+SCORES_DAYS_FROM = 3
+SCORES_MAX_AGE_MULTIPLE = 10
+
+def get_cached_scores(sport: str):
+    with _scores_cache_lock:
+        return _scores_cache.get(sport)
+
+def store_cached_scores(sport: str, games_data: list, credits_used, credits_remaining) -> dict:
+    entry = {
+        'fetched_at': time.time(),
+        # Start times of unfinished games (live or upcoming)
+        'pending_times': [game['commence_time'] for game in games_data if not game.get('completed', False)],
+        'game_ids': {game.get('id') for game in games_data},
+        'credits_used': credits_used,
+        'credits_remaining': credits_remaining,
+    }
+    with _scores_cache_lock:
+        _scores_cache[sport] = entry
+    return entry
+
+def scores_refresh_needed(sport: str, entry, now: datetime) -> bool:
+    # Never fetched in this process, or (at most once per SCORES_REFRESH_SECONDS) a game
+    # has started that the last call saw unfinished or didn't know about, or it's just old
+    if entry is None:
+        return True
+    age = time.time() - entry['fetched_at']
+    interval = current_app.config['SCORES_REFRESH_SECONDS']
+    if age < interval:
+        return False
+    if age >= interval * SCORES_MAX_AGE_MULTIPLE:
+        return True
+    for game_time in entry['pending_times']:
+        try:
+            if parse_iso_z(game_time) <= now:
+                return True
+        except (TypeError, ValueError):
+            return True
+    odds = get_cached_odds(sport, allow_stale=True)
+    for game in odds['games'] if odds else ():
+        if game['game_id'] not in entry['game_ids'] and game_started(game, now):
+            return True
+    return False
+
+def store_completed_games(sport: str, completed_games: list):
+    # Insert-once: a stored result is never rewritten
+    if not completed_games:
+        return
+    now = datetime.now(timezone.utc)
+    try:
+        db.CompletedGames.insert_many([
+            {
+                '_id': game['game_id'],
+                'sport': sport,
+                'commence_time': parse_iso_z(game['game_time']),
+                'game': game,
+                'stored_at': now,
+            }
+            for game in completed_games
+        ], ordered=False)
+    except BulkWriteError as e:
+        # Already-stored games fail with duplicate key; anything else is real
+        if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+            raise
+
+def load_completed_games(sport: str, since: datetime) -> list:
+    cursor = db.CompletedGames.find(
+        {'sport': sport, 'commence_time': {'$gte': since}},
+        {'_id': 0, 'game': 1},
+    ).sort('commence_time', 1)
+    return [doc['game'] for doc in cursor]
+
+@api.route('/api/games/completed', methods=['GET'])
+@cache_response('games_completed')
 def get_completed_games():
     """
-    Get completed games with scores using The Odds API (optimized for minimal costs)
+    Get completed games with scores. Served from the CompletedGames store;
+    The Odds API is only called once a game we last saw unfinished has started.
     
     Query Parameters:
     - sport: Required - specific sport (e.g., "baseball_mlb", "basketball_nba")
     - days_back: Optional - days back to search (1-3, default: 1)
     """
     try:
-        print(" Fetching completed games from The Odds API...")
-        
         # Get required sport parameter
         sport = request.args.get('sport', '').strip().lower()
         days_back = int(request.args.get('days_back', 1))
@@ -341,111 +1442,65 @@ def get_completed_games():
                 'provided': days_back
             }), 400
         
-        api_key = os.getenv('ODDS_API')
-        base_url = "https://api.the-odds-api.com/v4"
-        
-        print(f"🔍 Fetching completed {sport} games from last {days_back} days...")
-        
-        # Optimized scores request - single sport, costs 2 credits
-        params = {
-            'apiKey': api_key,
-            'daysFrom': days_back,
-            'dateFormat': 'iso'
-        }
-        
-        url = f"{base_url}/sports/{sport}/scores"
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code != 200:
-            return jsonify({
-                'status': 'error',
-                'message': f'The Odds API error: {response.status_code}',
-                'sport': sport
-            }), 500
-        
-        games_data = response.json()
-        
-        # Get credit usage from headers
-        credits_used = response.headers.get('x-requests-last', '2')  # Should be 2 for scores with daysFrom
-        credits_remaining = response.headers.get('x-requests-remaining', 'unknown')
-        
-        completed_games = []
-        sport_info = SPORT_MAPPING[sport]
-        
-        # Process only completed games
-        for game in games_data:
-            if not game.get('completed', False):
-                continue  # Skip non-completed games
-            
-            # Extract scores
-            scores = {}
-            home_score = None
-            away_score = None
-            
-            for score in game.get('scores', []):
-                team_name = score['name']
-                team_score = int(score['score'])
-                scores[team_name] = team_score
-                
-                if team_name == game['home_team']:
-                    home_score = team_score
-                elif team_name == game['away_team']:
-                    away_score = team_score
-            
-            # Calculate betting outcomes
-            if home_score is not None and away_score is not None:
-                total_score = home_score + away_score
-                home_won = home_score > away_score
-                
-                # Create settlement-ready response
-                completed_game = {
-                    'game_id': game['id'],
-                    'sport': sport_info['sport'],
-                    'league': sport_info['league'],
-                    'home_team': game['home_team'],
-                    'away_team': game['away_team'],
-                    'game_time': game['commence_time'],
-                    'completed': True,
-                    'scores': {
-                        'home_score': home_score,
-                        'away_score': away_score,
-                        'total_score': total_score
-                    },
-                    'settlement_data': {
-                        'needs_settlement': True,
-                        'winner': 'home' if home_won else 'away',
-                        'betting_outcomes': {
-                            'moneyline': {
-                                'home_result': 'win' if home_won else 'loss',
-                                'away_result': 'loss' if home_won else 'win'
-                            },
-                            'total_score': total_score
-                        }
-                    },
-                    'last_update': game.get('last_update')
-                }
-                
-                completed_games.append(completed_game)
-        
-        print(f"✅ Found {len(completed_games)} completed games")
-        
-        return jsonify({
+        now = datetime.now(timezone.utc)
+        last = get_cached_scores(sport)
+        stale = False
+        credits_used = '0'
+        if scores_refresh_needed(sport, last, now):
+            allowed, _ = spend_credits(sport, SCORES_CREDIT_COST, last['pending_times'] if last else [], last is not None)
+            stale = not allowed
+            if allowed:
+                log.info("fetching scores from The Odds API", extra={'sport': sport})
+
+                # Optimized scores request - single sport, costs 2 credits
+                try:
+                    response = get_odds_api().scores(sport, SCORES_DAYS_FROM)
+                    upstream_failed = is_upstream_failure(response.status_code)
+                except requests.exceptions.RequestException:
+                    response, upstream_failed = None, True
+
+                if upstream_failed:
+                    # The store is the fallback; serve what it has
+                    log.warning("serving stored scores; upstream unavailable", extra={'sport': sport})
+                    stale = True
+                elif response.status_code != 200:
+                    return jsonify({
+                        'status': 'error',
+                        'message': f'The Odds API error: {response.status_code}',
+                        'sport': sport
+                    }), 500
+                else:
+                    games_data = response.json()
+                    # Get credit usage from headers
+                    credits_used = response.headers.get('x-requests-last', '2')  # Should be 2 for scores with daysFrom
+                    store_completed_games(sport, format_completed_games(games_data, sport))
+                    last = store_cached_scores(
+                        sport, games_data, credits_used, response.headers.get('x-requests-remaining', 'unknown'),
+                    )
+
+        completed_games = load_completed_games(sport, now - timedelta(days=days_back))
+        log.info("found completed games", extra={'sport': sport, 'games': len(completed_games), 'stale': stale})
+
+        resp = jsonify({
             'status': 'success',
             'data': {
                 'completed_games': completed_games,
                 'total_games': len(completed_games),
                 'sport': sport,
-                'league': sport_info['league'],
+                'league': SPORT_MAPPING[sport]['league'],
                 'days_searched': days_back,
-                'fetch_timestamp': datetime.now().isoformat(),
-                'source': 'The Odds API'
+                'fetch_timestamp': datetime.fromtimestamp(last['fetched_at']).isoformat() if last else None,
+                'source': 'The Odds API',
+                'stale': stale
             },
-            'api_usage': {
-                'credits_used': credits_used,
-                'credits_remaining': credits_remaining,
-                'cost_breakdown': f'1 sport scores with daysFrom = 2 credits'
-            }
-        }), 200
+            'api_usage': api_usage(
+                credits_used, last['credits_remaining'] if last else 'unknown',
+                '1 sport scores with daysFrom = 2 credits; 0 when served from CompletedGames', lean_response(),
+            )
+        })
+        if stale:
+            resp.headers['Warning'] = STALE_WARNING
+        return resp, 200
         
     except requests.exceptions.Timeout:
         return jsonify({
@@ -461,14 +1516,15 @@ def get_completed_games():
         }), 500
         
     except Exception as e:
-        print(f" Error in get_completed_games: {e}")
+        log.exception("get_completed_games failed")
         return jsonify({
             'status': 'error',
             'message': 'Internal server error',
             'error': str(e)
         }), 500
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
+@cache_response('health')
 def health_check():
     """Health check endpoint"""
     return jsonify({
@@ -479,6 +1535,26 @@ def health_check():
         'available_sports': list(SPORT_MAPPING.keys())
     })
 
+@api.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """304 rate and bytes saved per cached route"""
+    routes = {}
+    for labels, responses in CACHE_RESPONSES.items():
+        policy = labels['policy']
+        not_modified = CACHE_NOT_MODIFIED.value(policy=policy)
+        routes[policy] = {
+            'responses': int(responses),
+            'not_modified': int(not_modified),
+            'bytes_saved': int(CACHE_BYTES_SAVED.value(policy=policy)),
+            'not_modified_rate': round(not_modified / responses, 4) if responses else 0.0,
+        }
+    return jsonify({'status': 'success', 'routes': routes})
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(METRICS.render(), content_type=METRICS_CONTENT_TYPE)
+
 def calculate_payout(wager, odds):
     """Calculate payout from wager and odds"""
     if odds < 0:
@@ -486,6 +1562,87 @@ def calculate_payout(wager, odds):
     else:
         return wager + (wager * odds / 100)
 
+# Bet documents, schema_version 3: every leg lives in `legs` (one for a
+# single), nothing else. created_at, settled_at and event_ts are BSON dates;
+# event_ts is the bet's latest event (placed, then settled or cancelled) and
+# is what date-range history queries by, on (user_id, event_ts).
+# Version 1 also kept a legacy `leg` (a dict for singles, the list for
+# parlays) that settlement updated instead of `legs`; version 2 had no
+# event_ts and stored settled_at as an ISO string. tools/migrate_bets.py
+# rewrites both.
+# Bets placed since server-side pricing (pricing.py) also record the
+# decimal_odds and potential_payout they were accepted at.
+BET_SCHEMA_VERSION = 3
+LEG_FIELDS = ('game_id', 'sport', 'bet_type', 'selection', 'odds', 'line', 'status', 'outcome')
+
+def bet_timestamp() -> datetime:
+    # Naive local time, the clock created_at has always been written with
+    return datetime.now()
+
+def canonical_leg(leg: dict) -> dict:
+    # Known fields only, unset ones omitted
+    return {field: leg[field] for field in LEG_FIELDS if leg.get(field) is not None}
+
+def parlay_payout(wager, legs: list):
+    # Each won leg rolls the running payout into the next
+    payout = wager
+    for leg in legs:
+        payout = calculate_payout(payout, leg['odds'])
+    return payout
+
+def bet_payout(bet: dict, legs: list):
+    # A won bet pays what it was accepted at; bets placed before server-side pricing are recomputed
+    if bet.get('potential_payout') is not None:
+        return bet['potential_payout']
+    return parlay_payout(bet['wagered_amount'], legs)
+
+# Old settled and cancelled bets move to BetsArchive (tools/archive_bets.py) so
+# Bets and its indexes stay the size of the working set. Active bets are never
+# archived; reads over settled history union both collections through these.
+ARCHIVE_COLLECTION = 'BetsArchive'
+ARCHIVED_STATUSES = ['settled', 'cancelled']
+
+def with_archive(match: dict, stages: list = ()) -> list:
+    # Pipeline head over Bets plus BetsArchive; `match` and `stages` run on each side before the union
+    side = [{'$match': match}, *stages]
+    return [*side, {'$unionWith': {'coll': ARCHIVE_COLLECTION, 'pipeline': side}}]
+
+def find_bets(query: dict, projection: dict, sort: list, limit: int = None) -> list:
+    # db.Bets.find(query, projection).sort(sort).limit(limit), archive included. Each side sorts
+    # (and limits) on its own index before the union, so a page's merge sort only sees 2 * limit documents
+    sort = dict(sort)
+    stages = [{'$sort': sort}]
+    if limit is not None:
+        stages.append({'$limit': limit})
+    pipeline = with_archive(query, [*stages, {'$project': projection}]) + stages
+    return list(db.Bets.aggregate(pipeline, allowDiskUse=True))
+
+def bets_page_args():
+    # (limit, before) from ?limit= and ?before=<ISO datetime>, either None when absent; None if malformed.
+    # limit is capped at BETS_QUERY_LIMIT
+    limit = before = None
+    try:
+        if request.args.get('limit'):
+            limit = min(max(int(request.args['limit'].strip()), 1), current_app.config['BETS_QUERY_LIMIT'])
+        if request.args.get('before'):
+            before = datetime.fromisoformat(request.args['before'].strip())
+    except Exception:
+        return None
+    return limit, before
+
+def page_query(query: dict, field: str, before) -> dict:
+    # Keyset cursor: only bets whose `field` is older than `before`
+    if before is None:
+        return query
+    return {'$and': [query, {field: {'$lt': before}}]}
+
+def bets_page(bets: list, field: str, limit) -> tuple:
+    # (bets, has_more, next_before) from a list fetched with limit + 1; next_before is the next page's ?before=
+    if limit is None or len(bets) <= limit:
+        return bets, False, None
+    bets = bets[:limit]
+    return bets, True, bets[-1][field]
+
 def determine_bet_outcome(leg, winner, final_score):
     """Determine if a bet leg won or lost"""
     selection = leg.get('selection', '').strip()
@@ -497,7 +1654,13 @@ def determine_bet_outcome(leg, winner, final_score):
         return False
     
 
-@app.route('/api/bets/settle', methods=['POST'])
+def end_settlement_phase(phase: str, started: float) -> tuple:
+    # Returns (elapsed, now) so the next phase can start where this one ended
+    now = time.perf_counter()
+    SETTLEMENT_PHASE_SECONDS.observe(now - started, phase=phase)
+    return now - started, now
+
+@api.route('/api/bets/settle', methods=['POST'])
 def settle_bets():
     """
     Settle bets for a completed game
@@ -523,41 +1686,26 @@ def settle_bets():
                 'message': 'game_id and winner are required'
             }), 400
         
-        print(f" Settling bets for game {game_id}, winner: {winner}")
-        print(f" Game ID type: {type(game_id)}, value: '{game_id}'")
-        
-        # Debug: Check all bets first
-        all_bets = list(db.Bets.find({}))
-        print(f" Total bets in collection: {len(all_bets)}")
-        
-        for i, bet in enumerate(all_bets):
-            print(f" Bet {i+1}: game_id='{bet['leg']['game_id']}' (type: {type(bet['leg']['game_id'])}), status='{bet['status']}'")
-        
-        # Find all active bets for this game with multiple query attempts
-        print(f" Attempting query 1: exact match")
+        log.info("settling bets", extra={'game_id': game_id, 'winner': winner})
+        phase_started = settle_started = time.perf_counter()
+        timings = {}
+        debug = log.isEnabledFor(logging.DEBUG)
+
+        # Debug: dump every bet's game_id (a full collection scan, so only when asked for)
+        if debug:
+            all_bets = list(db.Bets.find({}, {"legs.game_id": 1, "status": 1}))
+            for i, bet in enumerate(all_bets):
+                log.debug("bet %d: game_ids=%r status=%r", i + 1, [leg.get('game_id') for leg in bet.get('legs', [])], bet['status'])
+
+        # Only the fields settlement reads
+        settle_fields = {"legs": 1, "user_id": 1, "wagered_amount": 1, "potential_payout": 1, "status": 1}
+
+        # Every active bet with a leg on this game, singles and parlays alike (index legs_game_id_status)
         active_bets = list(db.Bets.find({
-            "leg.game_id": game_id,
+            "legs.game_id": game_id,
             "status": "active"
-        }))
-        print(f" Query 1 results: {len(active_bets)} bets found")
-        
-        # If no results, try string conversion
-        if len(active_bets) == 0:
-            print(f" Attempting query 2: with string conversion")
-            active_bets = list(db.Bets.find({
-                "leg.game_id": str(game_id),
-                "status": "active"
-            }))
-            print(f" Query 2 results: {len(active_bets)} bets found")
-        
-        # If still no results, try just game_id
-        if len(active_bets) == 0:
-            print(f" Attempting query 3: game_id only")
-            game_id_bets = list(db.Bets.find({"leg.game_id": game_id}))
-            print(f" Query 3 results: {len(game_id_bets)} bets with matching game_id")
-            
-            active_bets = [bet for bet in game_id_bets if bet.get('status') == 'active']
-            print(f" Active bets from manual filter: {len(active_bets)}")
+        }, settle_fields))
+        log.debug("active bets on game: %d", len(active_bets))
         
         if not active_bets:
             return jsonify({
@@ -569,36 +1717,60 @@ def settle_bets():
                     'users_affected': 0
                 },
                 'debug_info': {
-                    'total_bets_in_db': len(all_bets),
+                    'total_bets_in_db': len(all_bets) if debug else db.Bets.estimated_document_count(),
                     'searched_game_id': game_id,
                     'searched_game_id_type': str(type(game_id))
                 }
             }), 200
         
-        print(f" Found {len(active_bets)} active bets to settle")
+        log.info("found active bets to settle", extra={'game_id': game_id, 'bets': len(active_bets)})
+        timings['lookup'], phase_started = end_settlement_phase('lookup', phase_started)
         
         # Process settlements
         settlement_results = []
         user_updates = {}
+        bets_pending = 0
         
         for bet in active_bets:
-            print(f" Processing bet ID: {bet['_id']}")
-            
-            leg = bet['leg']
             user_id = bet['user_id']
             wagered_amount = bet['wagered_amount']
-            odds = leg['odds']
-            
-            print(f" User: {user_id}, Wager: ${wagered_amount}, Odds: {odds}")
-            print(f" Selection: '{leg.get('selection')}', Winner: '{winner}'")
-            
-            # Determine outcome
-            won = determine_bet_outcome(leg, winner, final_score)
-            print(f"🎲 Bet won: {won}")
+
+            # Settle only this game's legs, in place: another game of the same parlay may be
+            # settling concurrently, so the legs array is never rewritten from our read
+            outcomes = {True: [], False: []}
+            for leg in bet['legs']:
+                if leg.get('game_id') == game_id:
+                    outcomes[determine_bet_outcome(leg, winner, final_score)].append(leg.get('selection'))
+            leg_update, array_filters = {}, []
+            for name, outcome in (('won', True), ('lost', False)):
+                if outcomes[outcome]:
+                    leg_update[f"legs.$[{name}].status"] = 'settled'
+                    leg_update[f"legs.$[{name}].outcome"] = outcome
+                    array_filters.append({f"{name}.game_id": game_id, f"{name}.selection": {"$in": outcomes[outcome]}})
+            after = db.Bets.find_one_and_update(
+                {"_id": bet["_id"], "status": "active"},
+                {"$set": leg_update},
+                projection={"legs": 1},
+                array_filters=array_filters,
+                return_document=ReturnDocument.AFTER,
+            )
+            if after is None:
+                log.warning("bet settled concurrently; skipped", extra={'bet_id': str(bet['_id']), 'game_id': game_id})
+                continue
+            legs = after['legs']
+
+            # A bet is lost on its first lost leg and won once every leg has won, judged on the
+            # document as it is now, including legs other games settled since we read it
+            won = all(leg.get('outcome') is True for leg in legs)
+            lost = any(leg.get('outcome') is False for leg in legs)
+            if not (won or lost):
+                # Parlay with legs still to play: this leg is recorded and the bet stays active
+                bets_pending += 1
+                continue
             
             # Calculate profit change
             if won:
-                payout = calculate_payout(wagered_amount, odds)
+                payout = bet_payout(bet, legs)
                 profit_change = payout - wagered_amount
                 bet_outcome = "win"
             else:
@@ -606,29 +1778,32 @@ def settle_bets():
                 profit_change = -wagered_amount
                 bet_outcome = "loss"
             
-            print(f" Outcome: {bet_outcome}, Payout: ${payout}, Profit: ${profit_change}")
-            
-            # Update bet document
-            print(f" Updating bet {bet['_id']} to settled status")
+            if debug:
+                log.debug(
+                    "bet %s: user=%s wager=%s legs=%s outcome=%s payout=%s profit=%s",
+                    bet['_id'], user_id, wagered_amount,
+                    [(leg.get('selection'), leg.get('odds'), leg.get('outcome')) for leg in legs],
+                    bet_outcome, payout, profit_change,
+                )
+
+            # Update bet document; the status guard keeps a concurrent settle from paying twice
+            settled_at = bet_timestamp()
             update_result = db.Bets.update_one(
-                {"_id": bet["_id"]},
+                {"_id": bet["_id"], "status": "active"},
                 {
                     "$set": {
                         "status": "settled",
                         "outcome": bet_outcome,
                         "payout": payout,
                         "profit": profit_change,
-                        "settled_at": datetime.now().isoformat(),
-                        "leg.status": "settled",
-                        "leg.outcome": won
+                        "settled_at": settled_at,
+                        "event_ts": settled_at
                     }
                 }
             )
-            print(f" Bet update result: matched={update_result.matched_count}, modified={update_result.modified_count}")
-            
-            # Verify bet was updated
-            updated_bet = db.Bets.find_one({"_id": bet["_id"]})
-            print(f" Bet after update: status='{updated_bet.get('status')}', leg.status='{updated_bet['leg'].get('status')}'")
+            if update_result.modified_count != 1:
+                log.warning("bet settled concurrently; skipped", extra={'bet_id': str(bet['_id']), 'game_id': game_id})
+                continue
             
             # Track user updates
             if user_id not in user_updates:
@@ -658,24 +1833,20 @@ def settle_bets():
                 'profit_change': profit_change
             })
         
+        timings['bets'], phase_started = end_settlement_phase('bets', phase_started)
+
         # Update user stats
         users_affected = []
         for user_id, updates in user_updates.items():
-            print(f" Looking for user with username: '{user_id}'")
-            
             # Check if user exists
-            existing_user = db.Users.find_one({"username": user_id})
+            existing_user = db.Users.find_one({"username": user_id}, {"username": 1, "profit": 1, "losses": 1})
             if not existing_user:
-                print(f" User '{user_id}' not found in Users collection")
-                # Try to find all users to debug
-                all_users = list(db.Users.find({}))
-                print(f"🔍 Available users: {[u.get('username') for u in all_users]}")
+                log.warning("settled bets for unknown user", extra={'user_id': user_id, 'game_id': game_id})
+                if debug:
+                    all_users = list(db.Users.find({}, {"username": 1}))
+                    log.debug("available users: %s", [u.get('username') for u in all_users])
                 continue
             
-            print(f" Found user: {existing_user['username']}")
-            print(f" Current user stats: profit={existing_user.get('profit')}, losses={existing_user.get('losses')}")
-            print(f" Applying changes: profit_change={updates['profit_change']}, losses_change={updates['losses_change']}")
-            
             # Update user document
             user_result = db.Users.update_one(
                 {"username": user_id},
@@ -686,11 +1857,15 @@ def settle_bets():
                     }
                 }
             )
-            print(f"📈 User update result: matched={user_result.matched_count}, modified={user_result.modified_count}")
-            
             # Get updated user info
-            updated_user = db.Users.find_one({"username": user_id})
-            print(f"📊 Updated user stats: profit={updated_user.get('profit')}, losses={updated_user.get('losses')}")
+            updated_user = db.Users.find_one({"username": user_id}, {"profit": 1, "losses": 1, "balance": 1})
+            if debug:
+                log.debug(
+                    "user %s: profit %s -> %s, losses %s -> %s (matched=%d modified=%d)",
+                    user_id, existing_user.get('profit'), updated_user.get('profit'),
+                    existing_user.get('losses'), updated_user.get('losses'),
+                    user_result.matched_count, user_result.modified_count,
+                )
             
             # Compute and update user's rank after bet settles
             try:
@@ -716,7 +1891,7 @@ def settle_bets():
                     }}
                 )
             except Exception as rank_e:
-                print(f"⚠️ Failed to compute/update rank for user {user_id}: {rank_e}")
+                log.warning("failed to compute/update rank", extra={'user_id': user_id, 'error': str(rank_e)})
             
             users_affected.append({
                 'user_id': user_id,
@@ -727,10 +1902,22 @@ def settle_bets():
                 'old_profit': existing_user.get('profit', 0),
                 'new_profit': updated_user.get('profit', 0),
                 'new_balance': updated_user.get('balance', 0),
-                'rank': db.Users.find_one({"username": user_id}).get('rank') if db else None,
+                'rank': (db.Users.find_one({"username": user_id}, {"rank": 1}) or {}).get('rank'),
             })
         
-        print(f" Successfully settled {len(active_bets)} bets for {len(user_updates)} users")
+        bump_leaderboard_version()
+        timings['users'], _ = end_settlement_phase('users', phase_started)
+        timings['total'], _ = end_settlement_phase('total', settle_started)
+        bets_per_second = len(active_bets) / timings['total'] if timings['total'] else 0.0
+        SETTLEMENT_BETS.inc(len(settlement_results))
+        SETTLEMENT_BETS_PER_SECOND.set(bets_per_second)
+        log.info("settled bets", extra={
+            'game_id': game_id,
+            'bets': len(settlement_results),
+            'pending': bets_pending,
+            'users': len(user_updates),
+            'bets_per_second': round(bets_per_second, 1),
+        })
         
         return jsonify({
             'status': 'success',
@@ -738,30 +1925,32 @@ def settle_bets():
                 'game_id': game_id,
                 'winner': winner,
                 'final_score': final_score,
-                'bets_settled': len(active_bets),
+                'bets_settled': len(settlement_results),
+                # Parlays with this leg settled and other legs still to play
+                'bets_pending': bets_pending,
                 'users_affected': len(user_updates),
-                'settled_at': datetime.now().isoformat()
+                'settled_at': datetime.now().isoformat(),
+                'timings_ms': {phase: round(seconds * 1000, 2) for phase, seconds in timings.items()},
+                'bets_per_second': round(bets_per_second, 1)
             },
             'user_updates': users_affected,
             'settlement_details': settlement_results
         }), 200
         
     except Exception as e:
-        print(f" Error in settle_bets: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("settle_bets failed")
         return jsonify({
             'status': 'error',
             'message': 'Failed to settle bets',
             'error': str(e)
         }), 500
     
-@app.route('/api/users/<user_id>/bets', methods=['GET'])
+@api.route('/api/users/<user_id>/bets', methods=['GET'])
 @auth_required
 def get_user_bets(user_id):
     try:
         # Verify user exists
-        user = db.Users.find_one({"username": user_id})
+        user = db.Users.find_one({"username": user_id}, {"_id": 1})
         if not user:
             return jsonify({
                 'status': 'error',
@@ -783,56 +1972,47 @@ def get_user_bets(user_id):
                     'message': 'active must be true or false'
                 }), 400
         
-        print(f" Query parameters: {query}")
+        # Optional keyset paging: ?limit=N&before=<next_before of the previous page>
+        page = bets_page_args()
+        if page is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'limit must be an integer and before an ISO datetime'
+            }), 400
+        limit, before = page
+        active_only = query.get("status") == "active"
+        query = page_query(query, "created_at", before)
+        fetch = None if limit is None else limit + 1
         
-        # Retrieve bets in the same way we access them in settle_bets
-        bets = list(db.Bets.find(query).sort([("created_at", -1)]))
+        log.debug("get_user_bets query: %s", query)
         
-        # converte date object to ISO format
-        def to_iso(v):
-            from datetime import datetime as dt
-            return v.isoformat() if isinstance(v, dt) else v
-    
-        data = []
-        for bet in bets:
-            # Use 'legs' field if exists, otherwise fallback to legacy 'leg'
-            legs = bet.get('legs', [])
-            data.append({
-            'bet_id': str(bet.get('_id')),
-            'user_id': bet.get('user_id'),
-            'title': bet.get('title', ''),
-            'status': bet.get('status'),
-            'wagered_amount': bet.get('wagered_amount'),
-            'outcome': bet.get('outcome'),
-            'payout': bet.get('payout'),
-            'profit': bet.get('profit'),
-            'created_at': to_iso(bet.get('created_at')),
-            'settled_at': to_iso(bet.get('settled_at')),
-            'legs': [
-                {
-                'game_id': leg.get('game_id'),
-                'selection': leg.get('selection'),
-                'odds': leg.get('odds'),
-                'status': leg.get('status')
-                } for leg in legs
-            ]
-            })
+        if active_only:
+            # Active bets are only ever in Bets
+            cursor = db.Bets.find(query, LIST_VIEW.projection).sort([("created_at", -1)])
+            bets = list(cursor if fetch is None else cursor.limit(fetch))
+        else:
+            bets = find_bets(query, LIST_VIEW.projection, [("created_at", -1)], fetch)
+        bets, has_more, next_before = bets_page(bets, "created_at", limit)
+
+        data = LIST_VIEW.render_all(bets)
 
         return jsonify({
             'status': 'success',
             'data': data,
-            'total_bets': len(data)
+            'total_bets': len(data),
+            'has_more': has_more,
+            'next_before': next_before
         }), 200
 
     except Exception as e:
-        print(f"Error in get_user_bets: {e}")
+        log.exception("get_user_bets failed")
         return jsonify({    
             'status': 'error',
             'message': 'Failed to retrieve user bets',
             'error': str(e)
         }), 500
     
-@app.route('/api/users/<user_id>/history', methods=['GET'])
+@api.route('/api/users/<user_id>/history', methods=['GET'])
 @auth_required
 def get_user_history(user_id):
     try:
@@ -857,8 +2037,16 @@ def get_user_history(user_id):
                 'error': str(e)
             }), 400
         
+        page = bets_page_args()
+        if page is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'limit must be an integer and before an ISO datetime'
+            }), 400
+        limit, before = page
+        
         # Verify user exists
-        user = db.Users.find_one({"username": user_id})
+        user = db.Users.find_one({"username": user_id}, {"_id": 1})
         if not user:
             return jsonify({
                 'status': 'error',
@@ -866,69 +2054,48 @@ def get_user_history(user_id):
             }), 404
         
         # Date filter
-        date_filter = {"$gte": start_date, "$lt": end_date}
+        # Bets placed, settled or cancelled in the window. event_ts is a bet's latest event, so it
+        # covers settlement and cancellation; created_at keeps bets placed in the window but settled
+        # after it. Each branch is a range on its own (user_id, ...) index
+        window = {"$gte": start_date, "$lt": end_date}
         query = {
             "user_id": user_id,
             "$or": [
-                {"created_at": date_filter},
-                {"settled_at": date_filter},
-                {"date": date_filter}
+                {"created_at": window},
+                {"event_ts": window}
             ]
         }
         
-        # Retrieve bets sort by created_at then settled_at
-        bets = list(db.Bets.find(query).sort([("created_at", -1), ("settled_at", -1)]))
+        # Retrieve bets (archive included), latest event first; ?limit/?before page like the bet list
+        bets = find_bets(page_query(query, "event_ts", before), DETAIL_VIEW.projection, [("event_ts", -1)],
+                         None if limit is None else limit + 1)
+        bets, has_more, next_before = bets_page(bets, "event_ts", limit)
         
-        def to_iso(v):
-            from datetime import datetime as dt
-            return v.isoformat() if isinstance(v, dt) else v
-        
-        data = []
-        for bet in bets:
-            legs = bet.get('leg', [])
-            data.append({
-                'bet_id': str(bet.get('_id')),
-                'user_id': bet.get('user_id'),
-                'bet_type': bet.get('bet_type'),
-                'leg': [
-                    {
-                        'game_id': leg.get('game_id'),
-                        'selection': leg.get('selection'),
-                        'odds': leg.get('odds'),
-                        'status': leg.get('status')
-                    } for leg in legs
-                ],
-                'wagered_amount': bet.get('wagered_amount'),
-                'status': bet.get('status'),
-                'outcome': bet.get('outcome'),
-                'payout': bet.get('payout'),
-                'profit': bet.get('profit'),
-                'created_at': to_iso(bet.get('created_at')),
-                'settled_at': to_iso(bet.get('settled_at')),
-
-            })
+        data = DETAIL_VIEW.render_all(bets)
         
         return jsonify({
             'status': 'success',
             'bets': data,
             'total_bets': len(data),
+            'has_more': has_more,
+            'next_before': next_before,
             'start': start,
             'end': end
         }), 200
     except Exception as e:
-        print(f"Error in get_user_history: {e}")
+        log.exception("get_user_history failed")
         return jsonify({
             'status': 'error',
             'message': 'Failed to retrieve user history',
             'error': str(e)
         }), 500
     
-@app.route('/api/users/<user_id>/balance', methods=['GET'])
+@api.route('/api/users/<user_id>/balance', methods=['GET'])
 @auth_required
 def get_user_balance(user_id):
     try:
         # Verify user exists by username to match other routes
-        user = db.Users.find_one({"username": user_id})
+        user = db.Users.find_one({"username": user_id}, CREDIT_FIELDS)
         if not user:
             return jsonify({
                 'status': 'error',
@@ -938,22 +2105,22 @@ def get_user_balance(user_id):
         return jsonify({
             'status': 'success',
             'user_id': user_id,
-            'balance': user.get('balance', 0)
+            'balance': refresh_credit(user_id, user, credit_period(fresh=True))
         }), 200
     except Exception as e:
-        print(f"Error in get_user_balance: {e}")
+        log.exception("get_user_balance failed")
         return jsonify({
             'status': 'error',
             'message': 'Failed to retrieve user balance',
             'error': str(e)
         }), 500
 
-@app.route('/api/users/<user_id>/rank', methods=['GET'])
+@api.route('/api/users/<user_id>/rank', methods=['GET'])
 @auth_required
 def get_user_rank(user_id):
     try:
         # Verify user exists by username
-        user = db.Users.find_one({"username": user_id})
+        user = db.Users.find_one({"username": user_id}, {"profit": 1})
         if not user:
             return jsonify({
                 'status': 'error',
@@ -964,7 +2131,7 @@ def get_user_rank(user_id):
         user_profit = user.get('profit', 0)
 
         # Build leaderboard: all users with a profit field, sorted by descending profit
-        leaderboard = list(db.Users.find({"profit": {"$exists": True}}).sort("profit", -1))
+        leaderboard = list(db.Users.find({"profit": {"$exists": True}}, {"profit": 1, "_id": 0}).sort("profit", -1))
         
         # Determine user's rank efficiently by counting how many users have a higher profit
         user_profit = user.get('profit', 0)
@@ -1013,7 +2180,7 @@ def get_user_rank(user_id):
             'spots_to_next_rank': spots_to_next_rank
         }), 200
     except Exception as e:
-        print(f"Error in get_user_rank: {e}")
+        log.exception("get_user_rank failed")
         return jsonify({
             'status': 'error',
             'message': 'Failed to retrieve user rank',
@@ -1021,13 +2188,13 @@ def get_user_rank(user_id):
         }), 500
 
 # get total profit of each day within range 
-@app.route('/api/users/<user_id>/profit_history', methods=['GET'])
+@api.route('/api/users/<user_id>/profit_history', methods=['GET'])
 @auth_required
 def get_user_daily_profits(user_id):
 
     try:
         # Verify user exists by username
-        user = db.Users.find_one({"username": user_id})
+        user = db.Users.find_one({"username": user_id}, {"_id": 1})
         if not user:
             return jsonify({'status': 'error', 'message': 'User not found'}), 404
 
@@ -1062,27 +2229,17 @@ def get_user_daily_profits(user_id):
 
         # Build pipeline for aggregation
         pipeline = [
-            {'$match': {
+            # settled bets in the window; a settled bet's event_ts is its settled_at
+            *with_archive({
                 'user_id': user_id,
-                'status': 'settled'
-            }},
-
-            # add ts field that converts settled_at/created_at to date objects
-            {'$addFields': {
-                '_ts': {
-                    '$ifNull': [
-                        {'$convert': {'input': '$settled_at', 'to': 'date', 'onError': None, 'onNull': None}},
-                        {'$convert': {'input': '$created_at', 'to': 'date', 'onError': None, 'onNull': None}}
-                    ]
-                }
-            }},
-            # match for bets created after start_date and before end_date
-            {'$match': {'_ts': {'$gte': start_date, '$lt': end_date}}},
+                'status': 'settled',
+                'event_ts': {'$gte': start_date, '$lt': end_date}
+            }),
 
             # group by day and sum profits from each bet 
             {'$group': {
                 '_id': {
-                    '$dateTrunc': { 'date': "$_ts", 'unit': "day", 'timezone': "America/Toronto" }
+                    '$dateTrunc': { 'date': "$event_ts", 'unit': "day", 'timezone': "America/Toronto" }
                 },
                 'profit': {'$sum': {'$ifNull': ['$profit', 0]}},
                 'wagered_amount': {'$sum': {'$ifNull': ['$wagered_amount', 0]}}
@@ -1107,7 +2264,7 @@ def get_user_daily_profits(user_id):
 
 #user login routes
 
-@app.route('/api/users', methods=['POST'])
+@api.route('/api/users', methods=['POST'])
 def register_user():
     try:
         data = request.get_json(force=True) or {}
@@ -1119,10 +2276,10 @@ def register_user():
         if len(password) < 6:
             return jsonify({'status': 'error', 'message': 'password must be at least 6 characters'}), 400
 
-        if db.Users.find_one({'username': username}):
+        if db.Users.find_one({'username': username}, {'_id': 1}):
             return jsonify({'status': 'error', 'message': 'Username already exists'}), 409
 
-        pwd_hash = generate_password_hash(password)
+        pwd_hash = get_password_hasher().hash(password)
 
         user_doc = {
             'username': username,
@@ -1133,12 +2290,13 @@ def register_user():
             'wagered_amount': 0,
             'losses': 0,
             'history_visible': True,
-            'created_at': datetime.now()
+            'created_at': datetime.now(),
+            **credit_period(),
         }
         db.Users.insert_one(user_doc)
 
         # Auto-login after register
-        token = generate_jwt({'sub': username})
+        token = generate_jwt({'sub': username, 'gen': 0})
         resp = make_response(jsonify({
             'status': 'success',
             'user': {
@@ -1149,33 +2307,39 @@ def register_user():
             'token': token
         }), 201)
         return set_auth_cookie(resp, token)
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         return jsonify({'status': 'error', 'message': 'Failed to register user', 'error': str(e)}), 500
 
-@app.route('/api/users/<user_id>', methods=['GET'])
+@api.route('/api/users/<user_id>', methods=['GET'])
+@cache_response('user_profile')
 def get_user_profile(user_id):
     # if g.user_claims.get('sub') != user_id:
     #     return jsonify({'status': 'error', 'message': 'forbidden'}), 403
 
-    user = db.Users.find_one({'username': user_id}, {'password': 0})
+    user = db.Users.find_one({'username': user_id}, {
+        'username': 1, 'profit': 1, 'losses': 1, 'rank': 1, 'wagered_amount': 1,
+        'history_visible': 1, 'created_at': 1, 'password_updated_at': 1, **CREDIT_FIELDS,
+    })
     if not user:
         return jsonify({'status': 'error', 'message': 'User not found'}), 404
 
     data = {
         'user_id': user.get('username'),
-        'balance': user.get('balance', 0),
+        'balance': effective_balance(user, credit_period()),
         'profit': user.get('profit', 0),
         'losses': user.get('losses', 0),
         'rank': user.get('rank', 'Bronze'),
         'wagered_amount': user.get('wagered_amount', 0),
         'history_visible': user.get('history_visible', True),
-        'created_at': to_iso(user.get('created_at')),
-        'password_updated_at': to_iso(user.get('password_updated_at')),
+        'created_at': user.get('created_at'),
+        'password_updated_at': user.get('password_updated_at'),
     }
     return jsonify({'status': 'success', 'data': data}), 200
 
 
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
 def login_user():
     try:
         data = request.get_json(force=True) or {}
@@ -1185,33 +2349,47 @@ def login_user():
         if not username or not password:
             return jsonify({'status': 'error', 'message': 'username and password are required'}), 400
 
-        user = db.Users.find_one({'username': username})
+        user = db.Users.find_one({'username': username}, {'username': 1, 'password': 1, 'rank': 1, **AUTH_FIELDS, **CREDIT_FIELDS})
         if not user or not user.get('password'):
             return jsonify({'status': 'error', 'message': 'invalid credentials'}), 401
 
-        if not check_password_hash(user['password'], password):
+        hasher = get_password_hasher()
+        if not hasher.verify(user['password'], password):
             return jsonify({'status': 'error', 'message': 'invalid credentials'}), 401
 
-        token = generate_jwt({'sub': user['username']})
+        if hasher.needs_rehash(user['password']):
+            # Hash settings changed since this password was stored; the plaintext is only here now
+            try:
+                db.Users.update_one(
+                    {'_id': user['_id'], 'password': user['password']},
+                    {'$set': {'password': hasher.hash(password)}}
+                )
+                PASSWORD_REHASHES.inc()
+            except PasswordHasherBusy:
+                pass  # try again next login
+
+        token = generate_jwt({'sub': user['username'], 'gen': user.get('token_gen', 0)})
         resp = make_response(jsonify({
             'status': 'success',
             'token': token,
             'user': {
                 'user_id': user['username'],
-                'balance': user.get('balance', 0),
+                'balance': effective_balance(user, credit_period()),
                 'rank': user.get('rank', 'Bronze'),
             }
         }), 200)
         return set_auth_cookie(resp, token)
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception as e:
         return jsonify({'status': 'error', 'message': 'Failed to login', 'error': str(e)}), 500
     
-@app.route('/api/logout', methods=['POST'])
+@api.route('/api/logout', methods=['POST'])
 def logout_user():
     resp = make_response(jsonify({'status': 'success', 'message': 'logged out'}), 200)
     return clear_auth_cookie(resp)
 
-@app.route('/api/users/<user_id>/password', methods=['PUT'])
+@api.route('/api/users/<user_id>/password', methods=['PUT'])
 @auth_required
 def change_password(user_id):
     # Caller must be the same user
@@ -1231,25 +2409,64 @@ def change_password(user_id):
     if not user or not user.get('password'):
         return jsonify({'status': 'error', 'message': 'user not found'}), 404
 
-    if not check_password_hash(user['password'], current_password):
-        return jsonify({'status': 'error', 'message': 'invalid current password'}), 401
+    hasher = get_password_hasher()
+    try:
+        if not hasher.verify(user['password'], current_password):
+            return jsonify({'status': 'error', 'message': 'invalid current password'}), 401
+
+        # Disallow reusing the same password. The stored hash just matched
+        # current_password, so comparing plaintexts is enough; no second hash
+        if new_password == current_password:
+            return jsonify({'status': 'error', 'message': 'new password must differ from current password'}), 400
 
-    # Disallow reusing the same password
-    if check_password_hash(user['password'], new_password):
-        return jsonify({'status': 'error', 'message': 'new password must differ from current password'}), 400
+        new_hash = hasher.hash(new_password)
+    except PasswordHasherBusy:
+        return hasher_busy_response()
 
-    # Update user's pw 
-    db.Users.update_one(
+    # Update user's pw and revoke every token issued so far (see token_current)
+    updated = db.Users.find_one_and_update(
         {'username': user_id},
-        {'$set': {'password': generate_password_hash(new_password)}}
+        {'$set': {'password': new_hash}, '$inc': {'token_gen': 1}},
+        projection=AUTH_FIELDS,
+        return_document=ReturnDocument.AFTER
     )
 
-    # Rotate JWT + refresh cookie
-    new_token = generate_jwt({'sub': user_id})
+    # Rotate JWT + refresh cookie; drop the old token's claims here rather than waiting for its exp
+    current_app.extensions['claims_cache'].invalidate(get_token_from_request())
+    new_token = generate_jwt({'sub': user_id, 'gen': updated['token_gen']})
     resp = make_response(jsonify({'status': 'success', 'message': 'password updated', 'token': new_token}), 200)
     return set_auth_cookie(resp, new_token)
 
-@app.route('/api/bets', methods=['POST'])
+def finite_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def valid_american_odds(odds) -> bool:
+    return finite_number(odds) and abs(odds) >= 100
+
+def game_started(game: dict, now: datetime) -> bool:
+    try:
+        return parse_iso_z(game['game_time']) <= now
+    except (KeyError, TypeError, ValueError):
+        return True
+
+def price_legs(legs: list, wager: float) -> dict:
+    # pricing.price_bet against this process's odds cache, refreshing (within the credit budget) when it has expired
+    slates = {}
+    for sport in {leg['sport'] for leg in legs}:
+        try:
+            poll_odds(sport)
+        except (requests.exceptions.RequestException, CircuitOpenError):
+            log.warning("odds refresh for pricing failed; using cached odds", extra={'sport': sport})
+        slates[sport] = get_cached_odds(sport, allow_stale=True)
+    now = datetime.now(timezone.utc)
+    return price_bet(
+        legs, slates, wager, time.time(),
+        max_age=current_app.config['PRICE_MAX_AGE_SECONDS'],
+        tolerance=current_app.config['PRICE_TOLERANCE'],
+        started=lambda game: game_started(game, now),
+    )
+
+@api.route('/api/bets', methods=['POST'])
 @auth_required
 def create_bet():
     try:
@@ -1272,51 +2489,123 @@ def create_bet():
             return jsonify({'status': 'error', 'message': 'wager must be a positive number'}), 400
         if not isinstance(legs, list) or len(legs) == 0:
             return jsonify({'status': 'error', 'message': 'legs must be a non-empty array'}), 400
+        if not all(isinstance(leg, dict) and leg.get('game_id') and isinstance(leg.get('selection'), str)
+                   and leg.get('sport') in SPORT_MAPPING and valid_american_odds(leg.get('odds'))
+                   and (leg.get('line') is None or finite_number(leg['line'])) for leg in legs):
+            return jsonify({
+                'status': 'error',
+                'message': 'each leg needs game_id, sport, selection and American odds (at or beyond +/-100); line, if given, must be a number'
+            }), 400
+        legs = [canonical_leg(leg) for leg in legs]
 
         # Verify user exists by username and has sufficient balance
-        user = db.Users.find_one({'username': user_id})
+        user = db.Users.find_one({'username': user_id}, CREDIT_FIELDS)
         if not user:
             return jsonify({'status': 'error', 'message': 'User not found'}), 404
-        balance = float(user.get('balance', 0))
+        balance = float(refresh_credit(user_id, user, credit_period(fresh=True)))
         if balance < wager:
             return jsonify({'status': 'error', 'message': 'Insufficient balance'}), 409
 
+        # Re-price every leg from the odds cache; the bet is placed at those prices, not the client's
+        try:
+            price = price_legs(legs, wager)
+        except PriceRejected as e:
+            BET_PRICE_REJECTED.inc(reason=e.reason)
+            return jsonify(e.payload()), 409
+        legs = price['legs']
+
         # Determine bet type from leg count
         bet_type = 'parlay' if len(legs) > 1 else 'single'
 
     
+        placed_at = bet_timestamp()
         bet = {
             'user_id': user_id,
             'bet_type': bet_type,
             'wagered_amount': wager,
             'legs': legs,            
+            'decimal_odds': price['decimal_odds'],
+            'potential_payout': price['potential_payout'],
             'status': 'active',
             'outcome': None,
             'payout': 0,
             'profit': 0,
-            'created_at': datetime.now(),
+            'created_at': placed_at,
             'settled_at': None,
+            'event_ts': placed_at,
+            'schema_version': BET_SCHEMA_VERSION,
         }
 
-        # Maintain legacy 'leg' field for compatibility
-        bet['leg'] = legs[0] if len(legs) == 1 else legs
-
         res = db.Bets.insert_one(bet)
 
         # Decrement user balance
         db.Users.update_one({'username': user_id}, {'$inc': {'balance': -wager}})
-        new_user = db.Users.find_one({'username': user_id})
+        new_user = db.Users.find_one({'username': user_id}, {'balance': 1})
         new_balance = float(new_user.get('balance', 0)) if new_user else balance - wager
 
         return jsonify({
             'status': 'success',
             'bet_id': str(res.inserted_id),
-            'new_balance': new_balance
+            'new_balance': new_balance,
+            'legs': [{'game_id': leg['game_id'], 'selection': leg['selection'], 'odds': leg['odds']} for leg in legs],
+            'decimal_odds': price['decimal_odds'],
+            'american_odds': price['american_odds'],
+            'potential_payout': price['potential_payout']
         }), 201
     except Exception as e:
         return jsonify({'status': 'error', 'message': 'Failed to create bet', 'error': str(e)}), 500
 
-@app.route('/api/bets/<bet_id>/cancel', methods=['PATCH'])
+def group_legs_by_sport(legs: list):
+    # Group legs by sport key; ensure game_id + sport exist.
+    # Returns (legs_by_sport, error_payload)
+    legs_by_sport = {}
+    for idx, leg in enumerate(legs):
+        gid = leg.get('game_id')
+        sport_key = (leg.get('sport') or '').strip().lower()
+        if not gid or not sport_key:
+            return None, {
+                'status': 'error',
+                'message': f'leg {idx} missing game_id or sport'
+            }
+        legs_by_sport.setdefault(sport_key, []).append(gid)
+    return legs_by_sport, None
+
+def cancellation_denial(sport_key: str, ids: list, events_map: dict, now: datetime):
+    # Returns an error payload if any leg's event is unknown or already started, else None
+
+    # If any requested id is not in the response -> return false immediately
+    for gid in ids:
+        if str(gid) not in events_map:
+            return {
+                'status': 'error',
+                'allowed': False,
+                'message': f'Event not found for game_id={gid} (sport={sport_key})'
+            }
+
+    # Check commence_time for each event; deny if any started
+    for gid in ids:
+        evt = events_map[str(gid)]
+        ct_raw = evt.get('commence_time')  
+        try:
+            ct = parse_iso_z(ct_raw).astimezone(timezone.utc)
+        except Exception:
+            return {
+                'status': 'error',
+                'allowed': False,
+                'message': f'Invalid commence_time for game_id={gid}'
+            }
+
+        if now >= ct:
+            return {
+                'status': 'error',
+                'allowed': False,
+                'message': f'Cannot cancel: game {gid} (sport={sport_key}) already started',
+                'game_id': gid,
+                'commence_time': ct.isoformat()
+            }
+    return None
+
+@api.route('/api/bets/<bet_id>/cancel', methods=['PATCH'])
 @auth_required
 def cancel_bet(bet_id):
     try:
@@ -1326,7 +2615,7 @@ def cancel_bet(bet_id):
         except Exception:
             return jsonify({'status': 'error', 'message': 'Invalid bet_id'}), 400
 
-        bet = db.Bets.find_one({'_id': _id})
+        bet = db.Bets.find_one({'_id': _id}, {'user_id': 1, 'status': 1, 'legs': 1, 'wagered_amount': 1})
         if not bet:
             return jsonify({'status': 'error', 'message': 'Bet not found'}), 404
 
@@ -1341,23 +2630,17 @@ def cancel_bet(bet_id):
         if not isinstance(legs, list) or not legs:
             return jsonify({'status': 'error', 'message': 'Bet has no legs; cannot verify pre-game'}), 409
 
-        # Group legs by sport key; ensure game_id + sport exist
-        legs_by_sport = {}
-        for idx, leg in enumerate(legs):
-            gid = leg.get('game_id')
-            sport_key = (leg.get('sport') or '').strip().lower()
-            if not gid or not sport_key:
-                return jsonify({
-                    'status': 'error',
-                    'message': f'leg {idx} missing game_id or sport'
-                }), 409
-            legs_by_sport.setdefault(sport_key, []).append(gid)
+        legs_by_sport, error = group_legs_by_sport(legs)
+        if error:
+            return jsonify(error), 409
 
         # Query The Odds API events endpoint per sport
         now = datetime.now(timezone.utc)
         for sport_key, ids in legs_by_sport.items():
             try:
                 events_map = fetch_events_for_sport(sport_key, ids)
+            except CircuitOpenError as e:
+                return circuit_open_response(e)
             except Exception as api_err:
                 return jsonify({
                     'status': 'error',
@@ -1365,41 +2648,15 @@ def cancel_bet(bet_id):
                     'error': str(api_err)
                 }), 502  # upstream failure
 
-            # If any requested id is not in the response -> return false immediately
-            for gid in ids:
-                if str(gid) not in events_map:
-                    return jsonify({
-                        'status': 'error',
-                        'allowed': False,
-                        'message': f'Event not found for game_id={gid} (sport={sport_key})'
-                    }), 409
-
-            # Check commence_time for each event; deny if any started
-            for gid in ids:
-                evt = events_map[str(gid)]
-                ct_raw = evt.get('commence_time')  
-                try:
-                    ct = parse_iso_z(ct_raw).astimezone(timezone.utc)
-                except Exception:
-                    return jsonify({
-                        'status': 'error',
-                        'allowed': False,
-                        'message': f'Invalid commence_time for game_id={gid}'
-                    }), 409
-
-                if now >= ct:
-                    return jsonify({
-                        'status': 'error',
-                        'allowed': False,
-                        'message': f'Cannot cancel: game {gid} (sport={sport_key}) already started',
-                        'game_id': gid,
-                        'commence_time': ct.isoformat()
-                    }), 409
+            denial = cancellation_denial(sport_key, ids, events_map, now)
+            if denial:
+                return jsonify(denial), 409
 
         # If we get here: all legs exist and none have started -> cancel + refund
         wager = float(bet.get('wagered_amount', 0) or 0.0)
         user_id = bet.get('user_id')
 
+        cancelled_at = bet_timestamp()
         upd = db.Bets.update_one(
             {'_id': _id, 'status': 'active'},
             {'$set': {
@@ -1407,12 +2664,17 @@ def cancel_bet(bet_id):
                 'outcome': 'cancelled',
                 'payout': 0,
                 'profit': 0,
-                'settled_at': datetime.now(timezone.utc)
+                'settled_at': cancelled_at,
+                'event_ts': cancelled_at,
             }}
         )
         if upd.modified_count != 1:
             return jsonify({'status': 'error', 'message': 'Cancellation failed'}), 500
 
+        # Refill first if the day rolled over since the bet was placed, then refund on top
+        user = db.Users.find_one({'username': user_id}, CREDIT_FIELDS)
+        if user:
+            refresh_credit(user_id, user, credit_period(fresh=True))
         db.Users.update_one({'username': user_id}, {'$inc': {'balance': wager}})
         new_user = db.Users.find_one({'username': user_id}, {'balance': 1})
         new_balance = float(new_user.get('balance', 0)) if new_user else None
@@ -1434,63 +2696,102 @@ def cancel_bet(bet_id):
         return jsonify({'status': 'error', 'message': 'Failed to cancel bet', 'error': str(e)}), 500
     
 
-@app.route('/api/reset', methods=['POST'])
+@api.route('/api/reset', methods=['POST'])
 def reset_balances():
     try:
-        result = db.Users.update_many({}, {"$set": {"balance": DAILY_CREDIT}})
+        # Start a new credit period; balances refill on next use (see refresh_credit)
+        meta = db.Meta.find_one_and_update(
+            {'_id': CREDIT_META_ID},
+            {'$inc': {'generation': 1}},
+            projection={'generation': 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        generation = remember_credit_generation(meta)
+        bump_leaderboard_version()
         return jsonify({
             'status': 'success',
-            'users_reset': result.modified_count,
+            # Every user refills on their next balance read or write; the count keeps the old response shape
+            'users_reset': db.Users.estimated_document_count(),
+            'generation': generation,
             'new_balance': DAILY_CREDIT
         }), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': 'Failed to reset balances', 'error': str(e)}), 500
 
-@app.route('/api/leaderboard', methods=['GET'])
+def leaderboard_page_args():
+    # Returns (limit, offset) from the query string, or None if malformed
+    try:
+        limit = int((request.args.get('limit') or '50').strip())
+        offset = int((request.args.get('offset') or '0').strip())
+    except Exception:
+        return None
+    if limit < 1 or limit > 100:
+        limit = 50
+    if offset < 0:
+        offset = 0
+    return limit, offset
+
+def current_leaderboard_etag():
+    # ETag of the cached page, if any; lets unchanged pages 304 without touching Mongo
+    page = leaderboard_page_args()
+    cached = get_cached_leaderboard(*page) if page else None
+    return cached[0] if cached else None
+
+@api.route('/api/leaderboard', methods=['GET'])
+@cache_response('leaderboard', etag_fn=current_leaderboard_etag)
 def get_leaderboard():
     try:
-        try:
-            limit = int((request.args.get('limit') or '50').strip())
-            offset = int((request.args.get('offset') or '0').strip())
-        except Exception:
+        page = leaderboard_page_args()
+        if page is None:
             return jsonify({'status': 'error', 'message': 'limit and offset must be integers'}), 400
-        if limit < 1 or limit > 100:
-            limit = 50
-        if offset < 0:
-            offset = 0
-
-        total_users = db.Users.count_documents({"profit": {"$exists": True}})
-        cursor = (
-            db.Users
-            .find({"profit": {"$exists": True}})
-            .sort("profit", -1)
-            .skip(offset)
-            .limit(limit)
-        )
-        users_page = list(cursor)
-
-        results = []
-        rank_base = offset + 1
-        for idx, u in enumerate(users_page):
-            results.append({
-                'rank': rank_base + idx,
-                'user_id': u.get('username'),
-                'profit': u.get('profit', 0),
-                'balance': u.get('balance', 0)
-            })
+        limit, offset = page
 
-        return jsonify({
-            'status': 'success',
-            'total_users': total_users,
-            'limit': limit,
-            'offset': offset,
-            'results': results
-        }), 200
+        cached = get_cached_leaderboard(limit, offset)
+        if cached:
+            etag, payload = cached
+        else:
+            version = _leaderboard_version
+            total_users = db.Users.count_documents({"profit": {"$exists": True}})
+            cursor = (
+                db.Users
+                .find({"profit": {"$exists": True}}, {"username": 1, "profit": 1, "_id": 0, **CREDIT_FIELDS})
+                .sort("profit", -1)
+                .skip(offset)
+                .limit(limit)
+            )
+            users_page = list(cursor)
+
+            results = []
+            rank_base = offset + 1
+            period = credit_period()
+            for idx, u in enumerate(users_page):
+                results.append({
+                    'rank': rank_base + idx,
+                    'user_id': u.get('username'),
+                    'profit': u.get('profit', 0),
+                    'balance': effective_balance(u, period)
+                })
+
+            payload = {
+                'status': 'success',
+                'total_users': total_users,
+                'limit': limit,
+                'offset': offset,
+                'results': results
+            }
+            etag = leaderboard_etag(payload)
+            store_cached_leaderboard(limit, offset, version, etag, payload)
+
+        resp = make_response(jsonify(payload), 200)
+        resp.set_etag(etag)
+        return resp
     except Exception as e:
         return jsonify({'status': 'error', 'message': 'Failed to get leaderboard', 'error': str(e)}), 500
 
 
-@app.route('/api/bets/<bet_id>', methods=['GET'])
+@api.route('/api/bets/<bet_id>', methods=['GET'])
+@cache_response('bet_detail')
 def get_bet_by_id(bet_id):
     try:
         try:
@@ -1498,72 +2799,36 @@ def get_bet_by_id(bet_id):
         except Exception:
             return jsonify({'status': 'error', 'message': 'Invalid bet_id'}), 400
 
-        bet = db.Bets.find_one({'_id': _id})
+        projection = DETAIL_VIEW.projection
+        bet = db.Bets.find_one({'_id': _id}, projection) or db[ARCHIVE_COLLECTION].find_one({'_id': _id}, projection)
         if not bet:
             return jsonify({'status': 'error', 'message': 'Bet not found'}), 404
 
-        def to_iso(v):
-            from datetime import datetime as dt
-            return v.isoformat() if isinstance(v, dt) else v
-
-        # Normalize legs for consistent output
-        legs = bet.get('legs')
-        if not isinstance(legs, list):
-            legacy_leg = bet.get('leg')
-            if isinstance(legacy_leg, list):
-                legs = legacy_leg
-            elif isinstance(legacy_leg, dict):
-                legs = [legacy_leg]
-            else:
-                legs = []
-
-        bet_json = {
-            'bet_id': str(bet.get('_id')),
-            'user_id': bet.get('user_id'),
-            'bet_type': bet.get('bet_type'),
-            'wagered_amount': bet.get('wagered_amount'),
-            'leg': [
-                {
-                    'game_id': leg.get('game_id'),
-                    'selection': leg.get('selection'),
-                    'odds': leg.get('odds'),
-                    'status': leg.get('status')
-                } for leg in legs
-            ],
-            'status': bet.get('status'),
-            'outcome': bet.get('outcome'),
-            'payout': bet.get('payout'),
-            'profit': bet.get('profit'),
-            'created_at': to_iso(bet.get('created_at')),
-            'settled_at': to_iso(bet.get('settled_at')),
-        
-        }
-
-        return jsonify({'status': 'success', 'data': bet_json}), 200
+        return jsonify({'status': 'success', 'data': DETAIL_VIEW.render(bet)}), 200
     except Exception as e:
         return jsonify({'status': 'error', 'message': 'Failed to fetch bet', 'error': str(e)}), 500
 
-@app.route('/api/users/<user_id>/stats', methods=['GET'])
-@auth_required
-def get_user_stats(user_id):
-    if g.user_claims.get('sub') != user_id:
-        return jsonify({'status': 'error', 'message': 'forbidden'}), 403
-
-    active_count  = db.Bets.count_documents({'user_id': user_id, 'status': 'active'})
-    settled_count = db.Bets.count_documents({'user_id': user_id, 'status': 'settled'})
-
-    # wins/losses + totals from settled bets
-    pipeline = [
-        {'$match': {'user_id': user_id, 'status': 'settled'}},
+def user_stats_pipeline(user_id: str) -> list:
+    # wins/losses + totals from settled bets, archive included
+    return [
+        *with_archive({'user_id': user_id, 'status': 'settled'}),
         {'$group': {
             '_id': None,
+            'settled_count': {'$sum': 1},
             'wins':   {'$sum': {'$cond': [{'$eq': ['$outcome', 'win']}, 1, 0]}},
             'losses': {'$sum': {'$cond': [{'$eq': ['$outcome', 'loss']}, 1, 0]}},
             'wagered_total': {'$sum': {'$ifNull': ['$wagered_amount', 0]}},
             'profit_total':  {'$sum': {'$ifNull': ['$profit', 0]}},
         }}
     ]
-    agg = list(db.Bets.aggregate(pipeline))
+
+def settled_odds_pipeline(user_id: str) -> list:
+    # Legs' odds of every settled bet, archive included
+    return with_archive({'user_id': user_id, 'status': 'settled'}, [{'$project': {'_id': 0, 'legs.odds': 1}}])
+
+def summarize_user_stats(active_count, agg: list, settled_bets) -> dict:
+    # Shapes the stats payload from the active count, the pipeline result and settled bets' legs
+    settled_count = int(agg[0]['settled_count']) if agg else 0
     wins = int(agg[0]['wins']) if agg else 0
     losses = int(agg[0]['losses']) if agg else 0
     wagered_total = float(agg[0]['wagered_total']) if agg else 0.0
@@ -1572,15 +2837,10 @@ def get_user_stats(user_id):
     win_pct = (wins / (wins + losses)) if (wins + losses) > 0 else 0.0
     roi = (profit_total / wagered_total) if wagered_total > 0 else 0.0
 
-    # average odds over settled bets' single leg
-    settled_bets = db.Bets.find(
-        {'user_id': user_id, 'status': 'settled'},
-        {'leg.odds': 1}
-    )
     odds_sum = 0.0
     odds_n = 0
     for b in settled_bets:
-        legs = b.get('leg') or []
+        legs = b.get('legs') or []
         for leg in legs:
             try:
                 odds_sum += float(leg['odds'])
@@ -1589,23 +2849,86 @@ def get_user_stats(user_id):
                 pass
     avg_odds = (odds_sum / odds_n) if odds_n else 0.0
 
+    return {
+        'wins': wins,
+        'losses': losses,
+        'win_pct': round(win_pct, 4),
+        'roi': round(roi, 4),
+        'avg_odds': round(avg_odds, 2),
+        'active_count': int(active_count),
+        'settled_count': int(settled_count),
+        'wagered_total': wagered_total,
+        'profit_total': profit_total,
+    }
+
+@api.route('/api/users/<user_id>/stats', methods=['GET'])
+@auth_required
+def get_user_stats(user_id):
+    if g.user_claims.get('sub') != user_id:
+        return jsonify({'status': 'error', 'message': 'forbidden'}), 403
+
+    # Active bets are never archived; settled totals and odds cover both collections
+    active_count  = db.Bets.count_documents({'user_id': user_id, 'status': 'active'})
+    agg = list(db.Bets.aggregate(user_stats_pipeline(user_id)))
+
+    # average odds over settled bets' legs
+    settled_bets = db.Bets.aggregate(settled_odds_pipeline(user_id))
+
     return jsonify({
         'status': 'success',
         'user_id': user_id,
-        'stats': {
-            'wins': wins,
-            'losses': losses,
-            'win_pct': round(win_pct, 4),
-            'roi': round(roi, 4),
-            'avg_odds': round(avg_odds, 2),
-            'active_count': int(active_count),
-            'settled_count': int(settled_count),
-            'wagered_total': wagered_total,
-            'profit_total': profit_total,
-        }
+        'stats': summarize_user_stats(active_count, agg, settled_bets)
     }), 200
 
+def create_app(config: dict = None) -> Flask:
+    """
+    Build the Flask app. Nothing connects here: the Mongo client and the
+    upstream HTTP session are created on first use, so importing the module
+    or building an app for tests needs no live database.
+    """
+    load_dotenv()
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config.from_mapping(config_from_env())
+    if config:
+        app.config.from_mapping(config)
+
+    app.extensions['mongo'] = LazyMongo(
+        app.config['MONGODB_URI'], app.config['MONGO_DB_NAME'], app.config['MONGO_MAX_POOL_SIZE'],
+        event_listeners=[MongoCommandMetrics()],
+    )
+    # This process's share of the deployment-wide hourly budget
+    processes = max(1, app.config['ODDS_BUDGET_PROCESSES'])
+    budget = app.extensions['credit_budget'] = CreditBudget(
+        app.config['ODDS_CREDITS_PER_HOUR'] / processes,
+        app.config['ODDS_SPORT_CREDITS_PER_HOUR'] / processes,
+        app.config['ODDS_CREDIT_RESERVE'],
+    )
+
+    def observe_odds_api(endpoint, response, elapsed):
+        record_odds_api_call(endpoint, response, elapsed)
+        if response is not None:
+            budget.observe_remaining(response.headers.get('x-requests-remaining'))
+
+    app.extensions['odds_api'] = OddsApiClient(
+        app.config['ODDS_API_KEY'],
+        base_url=app.config['ODDS_API_BASE'],
+        timeout=app.config['ODDS_API_TIMEOUT'],
+        observer=observe_odds_api,
+        breaker=CircuitBreaker(app.config['ODDS_BREAKER_FAILURES'], app.config['ODDS_BREAKER_RESET_SECONDS']),
+    )
+    app.extensions['claims_cache'] = ClaimsCache(app.config['JWT_CLAIMS_CACHE_SIZE'])
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'], app.config['PASSWORD_HASH_MAX_PENDING'],
+    )
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_REQUEST_SAMPLE_RATE'])
+    app.register_blueprint(api)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
-    print("🎰 Starting Gambling App API with optimized The Odds API usage...")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    log.info("starting development server")
+    app.run(debug=os.getenv("FLASK_DEBUG", "1") == "1", host='0.0.0.0', port=5000)
 
@@ -0,0 +1,434 @@
+"""
+Async serving mode. From backend/:
+
+    uvicorn asgi:application --workers 4
+    hypercorn asgi:application --workers 4
+
+The I/O-bound routes (upcoming games, event streams, cancel bet, user
+stats) are served by a Quart app that awaits Motor and httpx, so one process
+can hold thousands of concurrent requests while they wait on Mongo or The
+Odds API. Odds refreshes are the exception: they run app.current_odds on a
+thread, so both apps share one refresh per sport. Every other path falls through to the Flask app via a WSGI
+adapter, so route contracts are identical in both modes.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+
+import httpx
+import requests
+from asgiref.wsgi import WsgiToAsgi
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from quart import Quart, Response, g, has_request_context, request
+from werkzeug.exceptions import HTTPException
+
+from app import (
+    AUTH_FIELDS, COOKIE_NAME, CREDIT_FIELDS, STREAM_HEADERS, CREDIT_META_ID, CREDIT_REFILLS, SPORT_MAPPING, STALE_WARNING,
+    MONGO_COMMAND_SECONDS, MONGO_COMMANDS, OddsUnavailable,
+    app as flask_app, bet_timestamp, cache_control_header, cached_odds_body,
+    cancellation_denial, close_odds_stream, close_user_events, credit_is_current, credit_period_of, credit_refill,
+    current_odds, group_legs_by_sport, open_odds_stream, open_user_events,
+    observe_request, record_cache_hit, settled_odds_pipeline, stream_frame,
+    summarize_user_stats, token_claims, token_current, user_stats_pipeline,
+)
+from compression import ENCODINGS
+from odds_api import CircuitOpenError, is_upstream_failure
+from serialization import dumps_bytes
+
+# Config, caches and helpers are shared with the Flask app
+config = flask_app.config
+
+async_app = Quart(__name__)
+
+# Built in before_serving so they bind to the worker's event loop
+_mongo = None
+_http = None
+
+
+def request_route() -> str:
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+class MotorCommandMetrics(monitoring.CommandListener):
+    # app.MongoCommandMetrics for Motor. Motor runs pymongo on executor threads with the
+    # awaiting task's contextvars copied, so the Quart request (and its g) is visible here
+    _lock = threading.Lock()  # a request's gathered queries finish on different threads
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        seconds = event.duration_micros / 1e6
+        if has_request_context():
+            route = request_route()
+            with self._lock:
+                g.mongo_commands = g.get('mongo_commands', 0) + 1
+                g.mongo_seconds = g.get('mongo_seconds', 0.0) + seconds
+        else:
+            route = 'background'
+        MONGO_COMMANDS.inc(route=route, command=event.command_name)
+        MONGO_COMMAND_SECONDS.inc(seconds, route=route, command=event.command_name)
+
+
+@async_app.before_serving
+async def open_clients():
+    global _mongo, _http
+    _mongo = AsyncIOMotorClient(
+        config['MONGODB_URI'], maxPoolSize=config['MONGO_MAX_POOL_SIZE'], event_listeners=[MotorCommandMetrics()],
+    )
+    _http = httpx.AsyncClient(timeout=config['ODDS_API_TIMEOUT'])
+
+
+@async_app.after_serving
+async def close_clients():
+    # Graceful shutdown: in-flight requests have drained by now
+    await _http.aclose()
+    _mongo.close()
+
+
+@async_app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.mongo_commands = 0
+    g.mongo_seconds = 0.0
+
+
+@async_app.after_request
+async def record_request_metrics(resp):
+    # As app.record_request_metrics; for the event streams this times up to the first byte
+    started = g.get('request_started')
+    if started is not None:
+        observe_request(
+            request_route(), request.method, request.path, resp.status_code, time.perf_counter() - started,
+            g.get('mongo_commands', 0), g.get('mongo_seconds', 0.0), config['LOG_SLOW_REQUEST_MS'],
+        )
+        resp.headers['X-Request-ID'] = g.request_id
+    return resp
+
+
+def mdb():
+    return _mongo[config['MONGO_DB_NAME']]
+
+
+async def refresh_credit(username: str):
+    # app.refresh_credit with credit_period(fresh=True), awaiting Motor; only the refill matters to callers here
+    db = mdb()
+    user = await db.Users.find_one({'username': username}, CREDIT_FIELDS)
+    if not user:
+        return
+    period = credit_period_of(await db.Meta.find_one({'_id': CREDIT_META_ID}, {'generation': 1}))
+    if credit_is_current(user, period):
+        return
+    if await db.Users.find_one_and_update(*credit_refill(username, period), projection={'_id': 1}) is not None:
+        CREDIT_REFILLS.inc(source='request')
+
+
+async def odds_api_get(endpoint: str, path: str, params: dict) -> httpx.Response:
+    # Same circuit breaker, metrics and credit tracking (the client's observer) as the sync OddsApiClient
+    client = flask_app.extensions['odds_api']
+    breaker = client.breaker
+    if not breaker.allow(time.monotonic()):
+        raise CircuitOpenError(breaker.retry_after(time.monotonic()))
+    started = time.perf_counter()
+    try:
+        response = await _http.get(f"{config['ODDS_API_BASE']}{path}", params={'apiKey': config['ODDS_API_KEY'], **params})
+    except httpx.HTTPError:
+        breaker.record_failure(time.monotonic())
+        client.observer(endpoint, None, time.perf_counter() - started)
+        raise
+    if is_upstream_failure(response.status_code):
+        breaker.record_failure(time.monotonic())
+    else:
+        breaker.record_success(time.monotonic())
+    client.observer(endpoint, response, time.perf_counter() - started)
+    return response
+
+
+def circuit_open_response(e: CircuitOpenError) -> Response:
+    resp = json_response({'status': 'error', 'message': 'The Odds API is unavailable; try again later', 'error': str(e)}, 503)
+    resp.headers['Retry-After'] = str(e.retry_after)
+    return resp
+
+
+def in_flask_context(fn):
+    # The shared helpers read current_app.config and the Flask JSON provider
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with flask_app.app_context():
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+def json_response(payload: dict, status: int = 200) -> Response:
+    return Response(dumps_bytes(payload, sort_keys=True) + b"\n", status=status, mimetype='application/json')
+
+
+def sse_response(sub, first: bytes, on_close) -> Response:
+    # app.sse_response, awaiting the subscription instead of blocking a thread
+    keepalive = config['STREAM_KEEPALIVE_SECONDS']
+
+    async def events():
+        try:
+            yield first
+            while True:
+                frame = stream_frame(sub, await sub.get_async(keepalive))
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            on_close(sub)
+
+    resp = Response(events(), mimetype='text/event-stream', headers=STREAM_HEADERS)
+    resp.timeout = None  # Quart would otherwise cut the stream at RESPONSE_TIMEOUT
+    return resp
+
+
+def async_auth_required(fn):
+    # Same checks as app.auth_required, awaiting the user lookup
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        claims = token_claims(request.cookies.get(COOKIE_NAME))
+        if not claims or not token_current(claims, await mdb().Users.find_one({"username": claims["sub"]}, AUTH_FIELDS)):
+            return json_response({"status": "error", "message": "unauthorized"}, 401)
+        g.user_claims = claims
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+@async_app.route('/api/games/upcoming', methods=['GET'])
+@in_flask_context
+async def get_upcoming_games():
+    try:
+        sport = request.args.get('sport', '').strip().lower()
+
+        if not sport:
+            return json_response({
+                'status': 'error',
+                'message': 'sport parameter is required',
+                'available_sports': list(SPORT_MAPPING.keys()),
+                'example': '/api/games/upcoming?sport=baseball_mlb'
+            }, 400)
+
+        if sport not in SPORT_MAPPING:
+            return json_response({
+                'status': 'error',
+                'message': f'Invalid sport: {sport}',
+                'available_sports': list(SPORT_MAPPING.keys())
+            }, 400)
+
+        # The same single-flight refresh as the Flask route, stream pollers and bet pricing
+        entry, stale = await asyncio.to_thread(current_odds, sport)
+
+        lean = config['JSON_LEAN'] or request.args.get('lean', '').lower() in ('1', 'true')
+        body, etag, encoding = cached_odds_body(sport, entry, lean, request.accept_encodings.best_match(ENCODINGS), stale)
+        not_modified = request.if_none_match.contains_weak(etag)
+        # Counted like app.cache_response, so /api/cache/stats covers both modes
+        record_cache_hit('games_upcoming', not_modified, len(body))
+        if not_modified:
+            resp = Response(b'', status=304)
+        else:
+            resp = Response(body, status=200, mimetype='application/json')
+            if encoding:
+                resp.headers['Content-Encoding'] = encoding
+        resp.set_etag(etag, weak=encoding is not None)
+        resp.headers['Cache-Control'] = cache_control_header('games_upcoming')
+        if stale:
+            resp.headers['Warning'] = STALE_WARNING
+        resp.vary.add('Accept-Encoding')
+        return resp
+
+    except OddsUnavailable as e:
+        resp = json_response(e.payload, e.status)
+        if e.retry_after:
+            resp.headers['Retry-After'] = str(e.retry_after)
+        return resp
+    except CircuitOpenError as e:
+        return circuit_open_response(e)
+    except requests.exceptions.Timeout:
+        return json_response({'status': 'error', 'message': 'Request to The Odds API timed out'}, 500)
+    except requests.exceptions.RequestException as e:
+        return json_response({'status': 'error', 'message': 'Failed to connect to The Odds API', 'error': str(e)}, 500)
+    except Exception as e:
+        return json_response({'status': 'error', 'message': 'Internal server error', 'error': str(e)}, 500)
+
+
+@async_app.route('/api/games/stream', methods=['GET'])
+@in_flask_context
+async def stream_odds():
+    # Same events as app.stream_odds; an open stream is a parked coroutine, not a thread
+    sport = request.args.get('sport', '').strip().lower()
+    if sport not in SPORT_MAPPING:
+        return json_response({
+            'status': 'error',
+            'message': f'Invalid sport: {sport}' if sport else 'sport parameter is required',
+            'available_sports': list(SPORT_MAPPING.keys())
+        }, 400)
+
+    sub, snapshot = open_odds_stream(sport, asyncio.get_running_loop())
+    return sse_response(sub, snapshot, close_odds_stream)
+
+
+@async_app.route('/api/users/<user_id>/events', methods=['GET'])
+@in_flask_context
+@async_auth_required
+async def stream_user_events(user_id):
+    # Same events as app.stream_user_events
+    if g.user_claims.get('sub') != user_id:
+        return json_response({'status': 'error', 'message': 'forbidden'}, 403)
+    # The snapshot read is a sync find_one: keep it off the event loop
+    sub, snapshot = await asyncio.to_thread(open_user_events, user_id, asyncio.get_running_loop())
+    return sse_response(sub, snapshot, close_user_events)
+
+
+async def fetch_events_for_sport(sport_key: str, event_ids: list) -> dict:
+    resp = await odds_api_get('events', f"/sports/{sport_key}/events", {
+        'dateFormat': 'iso',
+        'eventIds': ','.join(map(str, event_ids))
+    })
+    if resp.status_code != 200:
+        raise RuntimeError(f"Events API error {resp.status_code} for sport={sport_key}")
+    events = resp.json() or []
+    return {e.get('id'): e for e in events}
+
+
+@async_app.route('/api/bets/<bet_id>/cancel', methods=['PATCH'])
+@in_flask_context
+@async_auth_required
+async def cancel_bet(bet_id):
+    try:
+        try:
+            _id = ObjectId(bet_id)
+        except Exception:
+            return json_response({'status': 'error', 'message': 'Invalid bet_id'}, 400)
+
+        db = mdb()
+        bet = await db.Bets.find_one({'_id': _id}, {'user_id': 1, 'status': 1, 'legs': 1, 'wagered_amount': 1})
+        if not bet:
+            return json_response({'status': 'error', 'message': 'Bet not found'}, 404)
+
+        if bet.get('user_id') != g.user_claims.get('sub'):
+            return json_response({'status': 'error', 'message': 'forbidden'}, 403)
+
+        if bet.get('status') != 'active':
+            return json_response({'status': 'error', 'message': 'Only active bets can be cancelled'}, 409)
+
+        legs = bet.get('legs')
+        if not isinstance(legs, list) or not legs:
+            return json_response({'status': 'error', 'message': 'Bet has no legs; cannot verify pre-game'}, 409)
+
+        legs_by_sport, error = group_legs_by_sport(legs)
+        if error:
+            return json_response(error, 409)
+
+        # One events call per sport, all in flight at once
+        sports = list(legs_by_sport)
+        results = await asyncio.gather(
+            *(fetch_events_for_sport(sport_key, legs_by_sport[sport_key]) for sport_key in sports),
+            return_exceptions=True,
+        )
+        now = datetime.now(timezone.utc)
+        for sport_key, events_map in zip(sports, results):
+            if isinstance(events_map, CircuitOpenError):
+                return circuit_open_response(events_map)
+            if isinstance(events_map, Exception):
+                return json_response({
+                    'status': 'error',
+                    'message': f'Failed to fetch events for sport={sport_key}',
+                    'error': str(events_map)
+                }, 502)
+            denial = cancellation_denial(sport_key, legs_by_sport[sport_key], events_map, now)
+            if denial:
+                return json_response(denial, 409)
+
+        wager = float(bet.get('wagered_amount', 0) or 0.0)
+        user_id = bet.get('user_id')
+
+        cancelled_at = bet_timestamp()
+        upd = await db.Bets.update_one(
+            {'_id': _id, 'status': 'active'},
+            {'$set': {
+                'status': 'cancelled',
+                'outcome': 'cancelled',
+                'payout': 0,
+                'profit': 0,
+                'settled_at': cancelled_at,
+                'event_ts': cancelled_at,
+            }}
+        )
+        if upd.modified_count != 1:
+            return json_response({'status': 'error', 'message': 'Cancellation failed'}, 500)
+
+        # Refill first if the day rolled over since the bet was placed, then refund on top
+        await refresh_credit(user_id)
+        await db.Users.update_one({'username': user_id}, {'$inc': {'balance': wager}})
+        new_user = await db.Users.find_one({'username': user_id}, {'balance': 1})
+        new_balance = float(new_user.get('balance', 0)) if new_user else None
+
+        return json_response({
+            'status': 'success',
+            'allowed': True,
+            'message': 'bet cancelled and refunded',
+            'bet_id': bet_id,
+            'refund': wager,
+            'new_balance': new_balance
+        })
+
+    except httpx.HTTPError as e:
+        return json_response({'status': 'error', 'message': 'Events API request failed', 'error': str(e)}, 502)
+    except Exception as e:
+        return json_response({'status': 'error', 'message': 'Failed to cancel bet', 'error': str(e)}, 500)
+
+
+@async_app.route('/api/users/<user_id>/stats', methods=['GET'])
+@in_flask_context
+@async_auth_required
+async def get_user_stats(user_id):
+    if g.user_claims.get('sub') != user_id:
+        return json_response({'status': 'error', 'message': 'forbidden'}, 403)
+
+    db = mdb()
+    active_count, agg, settled_bets = await asyncio.gather(
+        db.Bets.count_documents({'user_id': user_id, 'status': 'active'}),
+        db.Bets.aggregate(user_stats_pipeline(user_id)).to_list(None),
+        db.Bets.aggregate(settled_odds_pipeline(user_id)).to_list(None),
+    )
+
+    return json_response({
+        'status': 'success',
+        'user_id': user_id,
+        'stats': summarize_user_stats(active_count, agg, settled_bets)
+    })
+
+
+_flask_asgi = WsgiToAsgi(flask_app)
+_async_routes = async_app.url_map.bind('')
+
+
+def _is_async_route(path: str, method: str) -> bool:
+    try:
+        _async_routes.match(path, method=method)
+        return True
+    except HTTPException:
+        return False
+
+
+async def application(scope, receive, send):
+    # Lifespan and the async routes go to Quart; everything else to Flask
+    if scope['type'] == 'lifespan' or (
+        scope['type'] == 'http' and _is_async_route(scope['path'], scope['method'])
+    ):
+        await async_app(scope, receive, send)
+    else:
+        await _flask_asgi(scope, receive, send)
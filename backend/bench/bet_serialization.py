@@ -0,0 +1,138 @@
+"""
+Bet serialization micro-benchmark: documents to response dicts, per route shape.
+
+Compares the hand-built dicts the bet list, history and bet-by-id routes used
+to assemble against bet_view's shared render functions, on --bets synthetic
+settled bets. Reports best-of --repeat time, microseconds per bet and peak
+bytes allocated while rendering (tracemalloc), then the same including JSON
+encoding.
+
+    cd backend && python -m bench.bet_serialization --bets 10000 --legs 3
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from bench.json_serialization import bet_docs
+from bet_view import DETAIL_VIEW, LIST_VIEW
+from serialization import dumps_bytes
+
+
+def list_before(bets: list) -> list:
+    # get_user_bets before BetView
+    data = []
+    for bet in bets:
+        legs = bet.get('legs', [])
+        data.append({
+            'bet_id': str(bet.get('_id')),
+            'user_id': bet.get('user_id'),
+            'title': bet.get('title', ''),
+            'status': bet.get('status'),
+            'wagered_amount': bet.get('wagered_amount'),
+            'outcome': bet.get('outcome'),
+            'payout': bet.get('payout'),
+            'profit': bet.get('profit'),
+            'created_at': bet.get('created_at'),
+            'settled_at': bet.get('settled_at'),
+            'legs': [
+                {
+                    'game_id': leg.get('game_id'),
+                    'selection': leg.get('selection'),
+                    'odds': leg.get('odds'),
+                    'status': leg.get('status')
+                } for leg in legs
+            ]
+        })
+    return data
+
+
+def detail_before(bets: list) -> list:
+    # get_user_history / get_bet_by_id before BetView
+    data = []
+    for bet in bets:
+        legs = bet.get('legs', [])
+        data.append({
+            'bet_id': str(bet.get('_id')),
+            'user_id': bet.get('user_id'),
+            'bet_type': bet.get('bet_type'),
+            'leg': [
+                {
+                    'game_id': leg.get('game_id'),
+                    'selection': leg.get('selection'),
+                    'odds': leg.get('odds'),
+                    'status': leg.get('status')
+                } for leg in legs
+            ],
+            'wagered_amount': bet.get('wagered_amount'),
+            'status': bet.get('status'),
+            'outcome': bet.get('outcome'),
+            'payout': bet.get('payout'),
+            'profit': bet.get('profit'),
+            'created_at': bet.get('created_at'),
+            'settled_at': bet.get('settled_at'),
+        })
+    return data
+
+
+def timeit(fn, repeat: int) -> float:
+    # GC off while timing, as the timeit module does: otherwise collections triggered by
+    # the previous case's garbage land on whichever case runs next
+    best = float('inf')
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bets', type=int, default=10000)
+    parser.add_argument('--legs', type=int, default=1, help='legs per bet')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = bet_docs(args.bets, rng)
+    for doc in docs:
+        doc['bet_type'] = 'parlay' if args.legs > 1 else 'single'
+        doc['legs'] = doc['legs'] * args.legs
+
+    rows = [
+        ('list', lambda: list_before(docs), lambda: LIST_VIEW.render_all(docs)),
+        ('detail', lambda: detail_before(docs), lambda: DETAIL_VIEW.render_all(docs)),
+        ('list + json', lambda: dumps_bytes(list_before(docs)), lambda: dumps_bytes(LIST_VIEW.render_all(docs))),
+        ('detail + json', lambda: dumps_bytes(detail_before(docs)), lambda: dumps_bytes(DETAIL_VIEW.render_all(docs))),
+    ]
+
+    assert list_before(docs) == LIST_VIEW.render_all(docs)
+    assert detail_before(docs) == DETAIL_VIEW.render_all(docs)
+
+    print(f"{args.bets} bets x {args.legs} legs")
+    print(f"{'case':<16}{'before ms':>11}{'after ms':>10}{'before us/bet':>15}{'after us/bet':>14}"
+          f"{'before peak KB':>16}{'after peak KB':>15}")
+    for name, before, after in rows:
+        b, a = timeit(before, args.repeat), timeit(after, args.repeat)
+        print(f"{name:<16}{b * 1000:>11.2f}{a * 1000:>10.2f}{b * 1e6 / args.bets:>15.2f}{a * 1e6 / args.bets:>14.2f}"
+              f"{peak_bytes(before) / 1024:>16.0f}{peak_bytes(after) / 1024:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Serialization benchmark for the largest payloads we serve.
+
+Compares the old path (per-handler to_iso rebuild + stdlib json, as Flask's
+default provider does it) against serialization.dumps_bytes, and reports
+payload size with and without the verbose envelope fields.
+
+    cd backend && python -m bench.json_serialization --games 300 --bets 10000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+import serialization
+from serialization import dumps_bytes
+
+
+def upcoming_payload(n_games: int, rng: random.Random, lean: bool = False) -> dict:
+    games = []
+    for i in range(n_games):
+        home, away = f"Home Team {i}", f"Away Team {i}"
+        games.append({
+            'game_id': f"{rng.getrandbits(128):032x}",
+            'sport': 'basketball',
+            'league': 'NBA',
+            'home_team': home,
+            'away_team': away,
+            'game_time': (datetime(2025, 1, 1) + timedelta(hours=i)).isoformat() + 'Z',
+            'odds': {
+                'moneyline': {
+                    home: {'odds': rng.randint(-300, -101), 'bookmaker': 'draftkings'},
+                    away: {'odds': rng.randint(100, 300), 'bookmaker': 'fanduel'},
+                },
+                'spread': {
+                    home: {'odds': -110, 'line': -4.5, 'bookmaker': 'betmgm'},
+                    away: {'odds': -110, 'line': 4.5, 'bookmaker': 'betmgm'},
+                },
+                'total': {
+                    'over': {'odds': -105, 'line': 221.5, 'bookmaker': 'caesars'},
+                    'under': {'odds': -115, 'line': 221.5, 'bookmaker': 'caesars'},
+                },
+            },
+            'total_bookmakers': rng.randint(5, 12),
+        })
+    usage = {'credits_used': '3', 'credits_remaining': '497'}
+    if not lean:
+        usage['cost_breakdown'] = '3 markets × 1 region = 3 credits'
+    return {
+        'status': 'success',
+        'data': {
+            'games': games,
+            'total_games': len(games),
+            'sport': 'basketball_nba',
+            'league': 'NBA',
+            'fetch_timestamp': datetime.now().isoformat(),
+            'source': 'The Odds API',
+        },
+        'api_usage': usage,
+    }
+
+
+def bet_docs(n_bets: int, rng: random.Random) -> list:
+    now = datetime.now()
+    docs = []
+    for _ in range(n_bets):
+        created = now - timedelta(minutes=rng.randint(0, 100000))
+        docs.append({
+            '_id': ObjectId(),
+            'user_id': f"user{rng.randint(1, 5000)}",
+            'title': '',
+            'status': 'settled',
+            'wagered_amount': float(rng.randint(5, 500)),
+            'outcome': rng.choice(['win', 'loss']),
+            'payout': 0,
+            'profit': 0,
+            'created_at': created,
+            'settled_at': created + timedelta(hours=3),
+            'legs': [{'game_id': f"{rng.getrandbits(64):016x}", 'selection': 'Lakers', 'odds': -110, 'status': 'settled'}],
+        })
+    return docs
+
+
+def bets_payload_old(docs: list) -> dict:
+    # What get_user_bets did before: nested to_iso per field
+    def to_iso(v):
+        return v.isoformat() if isinstance(v, datetime) else v
+
+    data = [{
+        'bet_id': str(b['_id']),
+        'user_id': b['user_id'],
+        'title': b['title'],
+        'status': b['status'],
+        'wagered_amount': b['wagered_amount'],
+        'outcome': b['outcome'],
+        'payout': b['payout'],
+        'profit': b['profit'],
+        'created_at': to_iso(b['created_at']),
+        'settled_at': to_iso(b['settled_at']),
+        'legs': [dict(leg) for leg in b['legs']],
+    } for b in docs]
+    return {'status': 'success', 'data': data, 'total_bets': len(data)}
+
+
+def bets_payload_new(docs: list) -> dict:
+    data = [{
+        'bet_id': str(b['_id']),
+        'user_id': b['user_id'],
+        'title': b['title'],
+        'status': b['status'],
+        'wagered_amount': b['wagered_amount'],
+        'outcome': b['outcome'],
+        'payout': b['payout'],
+        'profit': b['profit'],
+        'created_at': b['created_at'],
+        'settled_at': b['settled_at'],
+        'legs': [dict(leg) for leg in b['legs']],
+    } for b in docs]
+    return {'status': 'success', 'data': data, 'total_bets': len(data)}
+
+
+def stdlib_dumps(obj) -> bytes:
+    # Flask's DefaultJSONProvider with compact output
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--bets', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    upcoming = upcoming_payload(args.games, rng)
+    upcoming_lean = upcoming_payload(args.games, rng, lean=True)
+    docs = bet_docs(args.bets, rng)
+
+    print(f"encoder: {'orjson' if serialization.orjson else 'stdlib json (orjson not installed)'}")
+    print(f"{'case':<34}{'before ms':>12}{'after ms':>12}{'before B':>12}{'after B':>12}")
+
+    rows = [
+        ('upcoming games', lambda: stdlib_dumps(upcoming), lambda: dumps_bytes(upcoming, sort_keys=True)),
+        ('upcoming games (lean envelope)', lambda: stdlib_dumps(upcoming), lambda: dumps_bytes(upcoming_lean, sort_keys=True)),
+        ('user bets', lambda: stdlib_dumps(bets_payload_old(docs)), lambda: dumps_bytes(bets_payload_new(docs), sort_keys=True)),
+    ]
+    for name, before, after in rows:
+        print(f"{name:<34}{timeit(before, args.repeat):>12.2f}{timeit(after, args.repeat):>12.2f}"
+              f"{len(before()):>12}{len(after()):>12}")
+
+
+if __name__ == '__main__':
+    main()
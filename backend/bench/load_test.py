@@ -0,0 +1,104 @@
+"""
+HTTP load test: requests/sec and latency percentiles per path.
+
+Run it against the dev server and against gunicorn to compare:
+
+    cd backend
+    python app.py                                   # dev server on :5000
+    python -m bench.load_test --label dev
+
+    gunicorn -c gunicorn.conf.py app:app            # production mode on :5000
+    python -m bench.load_test --label gunicorn
+
+Each run appends one JSON line per path to --out so runs can be compared.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_PATHS = [
+    '/api/leaderboard?limit=50&offset=0',
+    '/api/games/upcoming?sport=basketball_nba',
+]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def run_path(base_url: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                resp = session.get(base_url + path, timeout=30)
+                if resp.status_code >= 400:
+                    local_errors += 1
+            except requests.RequestException:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'path': path,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--path', action='append', dest='paths', help='repeatable; defaults to leaderboard + upcoming games')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per path')
+    parser.add_argument('--label', default='run')
+    parser.add_argument('--out', default='bench/results/load_test.jsonl')
+    args = parser.parse_args()
+
+    results = []
+    for path in args.paths or DEFAULT_PATHS:
+        result = run_path(args.base_url.rstrip('/'), path, args.concurrency, args.duration)
+        result.update({'label': args.label, 'concurrency': args.concurrency, 'timestamp': time.time()})
+        results.append(result)
+        print(f"[{args.label}] {path}: {result['rps']} req/s, p50 {result['p50_ms']} ms, "
+              f"p99 {result['p99_ms']} ms, errors {result['errors']}/{result['requests']}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'a', encoding='utf-8') as fh:
+            for result in results:
+                fh.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
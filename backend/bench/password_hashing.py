@@ -0,0 +1,84 @@
+"""
+Login throughput: password verifications per second, total and per core.
+
+A login costs one verify, so verifies/s is the ceiling on logins/s. Runs
+--threads request threads against PasswordHasher for each hash method and
+pool size; rejected counts calls refused as saturated (the 503 path).
+
+    cd backend
+    python -m bench.password_hashing
+    python -m bench.password_hashing --methods scrypt pbkdf2:sha256:600000 pbkdf2:sha256:260000 --workers 0 1 2 4
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from password_hashing import PasswordHasher, PasswordHasherBusy, normalize_method
+
+
+def run(method: str, workers: int, threads: int, max_pending: int, duration: float) -> dict:
+    hasher = PasswordHasher(method, workers, max_pending)
+    pwhash = generate_password_hash('password123', hasher.method)
+    hasher.verify(pwhash, 'password123')  # start the pool outside the timed window
+
+    latencies, rejected = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                hasher.verify(pwhash, 'password123')
+            except PasswordHasherBusy:
+                with lock:
+                    rejected[0] += 1
+                time.sleep(0.001)
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for _ in range(threads):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+    hasher.close()
+
+    latencies.sort()
+    rate = len(latencies) / wall
+    return {
+        'method': hasher.method,
+        'workers': workers,
+        'verifies_per_s': rate,
+        'per_core': rate / max(1, workers),
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        'rejected': rejected[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', nargs='+', default=['scrypt', 'pbkdf2:sha256'])
+    parser.add_argument('--workers', nargs='+', type=int, default=[0, 1, os.cpu_count() or 1])
+    parser.add_argument('--threads', type=int, default=16, help='concurrent request threads')
+    parser.add_argument('--max-pending', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'method':<26}{'workers':>8}{'verify/s':>10}{'per core':>10}{'p50 ms':>9}{'p99 ms':>9}{'rejected':>10}")
+    for method in args.methods:
+        for workers in args.workers:
+            r = run(normalize_method(method), workers, args.threads, args.max_pending, args.duration)
+            print(f"{r['method']:<26}{r['workers']:>8}{r['verifies_per_s']:>10.1f}{r['per_core']:>10.1f}"
+                  f"{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['rejected']:>10}")
+
+
+if __name__ == '__main__':
+    main()
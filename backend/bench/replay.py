@@ -0,0 +1,490 @@
+"""
+Replay benchmark: throughput and p50/p99 of the hot routes against recorded
+Odds API payloads, with no network and no shared database.
+
+The Odds API is replaced by a local stub server that serves recorded
+/odds, /scores and /events payloads from bench/fixtures/ (capture them once
+with --record and an ODDS_API key; without fixtures a deterministic
+synthetic set of the same shape is used). Mongo is mongomock by default, or
+a throwaway database on --mongo-uri (e.g. an ephemeral `mongod --dbpath
+$(mktemp -d)`), which is what to use for the larger sizes. Users and bets
+come from tools/datagen.py, betting on the replayed games.
+
+    cd backend
+    python -m bench.replay --users 1000 --bets 10000
+    python -m bench.replay --users 100000 --bets 1000000 --mongo-uri mongodb://127.0.0.1:27018
+    python -m bench.replay --record --sport basketball_nba --sport icehockey_nhl
+
+Each run appends one JSON line per scenario to --out; --compare prints the
+change against the previous run with the same sizes and backend.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from bench.load_test import percentile
+from tools import datagen
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+ENDPOINTS = ('odds', 'scores', 'events')
+SCENARIOS = ('upcoming', 'create_bet', 'rank', 'leaderboard', 'settle')
+
+
+# Fixtures
+
+def record_fixtures(api_key: str, sports: list):
+    from odds_api import OddsApiClient
+
+    client = OddsApiClient(api_key)
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    for sport in sports:
+        odds = client.odds(sport)
+        odds.raise_for_status()
+        scores = client.scores(sport, 3)
+        scores.raise_for_status()
+        ids = [game['id'] for game in odds.json()]
+        events = client.events(sport, ids) if ids else None
+        payloads = {'odds': odds.json(), 'scores': scores.json(), 'events': events.json() if events is not None else []}
+        for endpoint, payload in payloads.items():
+            (FIXTURES_DIR / f"{endpoint}_{sport}.json").write_text(json.dumps(payload), encoding='utf-8')
+        print(f"recorded {sport}: {len(payloads['odds'])} games, {odds.headers.get('x-requests-remaining')} credits left")
+
+
+def synthetic_fixtures(sports: list, games_per_sport: int, seed: int) -> dict:
+    # Same shape as the recorded payloads: {(endpoint, sport): payload}
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    iso = lambda d: d.isoformat().replace('+00:00', 'Z')
+    fixtures = {}
+    for sport in sports:
+        odds, scores = [], []
+        for i in range(games_per_sport):
+            home, away = f"{sport} home {i}", f"{sport} away {i}"
+            commence = now + timedelta(hours=rng.randint(1, 96))
+            favourite = -rng.randint(105, 300)
+            line = rng.choice([1.5, 3.5, 5.5, 7.5])
+            total = rng.randint(5, 230) + 0.5
+            bookmakers = [{
+                'key': book,
+                'last_update': iso(now),
+                'markets': [
+                    {'key': 'h2h', 'outcomes': [
+                        {'name': home, 'price': favourite},
+                        {'name': away, 'price': rng.randint(100, 280)},
+                    ]},
+                    {'key': 'spreads', 'outcomes': [
+                        {'name': home, 'price': -110, 'point': -line},
+                        {'name': away, 'price': -110, 'point': line},
+                    ]},
+                    {'key': 'totals', 'outcomes': [
+                        {'name': 'Over', 'price': -110, 'point': total},
+                        {'name': 'Under', 'price': -110, 'point': total},
+                    ]},
+                ],
+            } for book in ('draftkings', 'fanduel', 'betmgm')]
+            game_id = f"{sport[:4]}{seed}{i:05d}"
+            odds.append({
+                'id': game_id, 'sport_key': sport, 'commence_time': iso(commence),
+                'home_team': home, 'away_team': away, 'bookmakers': bookmakers,
+            })
+            played = now - timedelta(hours=rng.randint(4, 70))
+            home_score, away_score = rng.randint(0, 120), rng.randint(0, 120)
+            scores.append({
+                'id': f"done{game_id}", 'sport_key': sport, 'commence_time': iso(played), 'completed': True,
+                'home_team': home, 'away_team': away, 'last_update': iso(now),
+                'scores': [{'name': home, 'score': str(home_score)}, {'name': away, 'score': str(away_score)}],
+            })
+        fixtures[('odds', sport)] = odds
+        fixtures[('scores', sport)] = scores
+        fixtures[('events', sport)] = [
+            {key: game[key] for key in ('id', 'sport_key', 'commence_time', 'home_team', 'away_team')} for game in odds
+        ]
+    return fixtures
+
+
+def load_fixtures(sports: list, games_per_sport: int, seed: int) -> tuple:
+    # Recorded payloads where present, synthetic for the rest; returns (fixtures, source)
+    fixtures = synthetic_fixtures(sports, games_per_sport, seed)
+    recorded = 0
+    for endpoint in ENDPOINTS:
+        for sport in sports:
+            path = FIXTURES_DIR / f"{endpoint}_{sport}.json"
+            if path.exists():
+                fixtures[(endpoint, sport)] = json.loads(path.read_text(encoding='utf-8'))
+                recorded += 1
+    if recorded == 0:
+        return fixtures, 'synthetic'
+    return fixtures, 'recorded' if recorded == len(ENDPOINTS) * len(sports) else 'mixed'
+
+
+# Stub Odds API
+
+class StubOddsApi:
+    PATH = re.compile(r'^/v4/sports/(?P<sport>[^/]+)/(?P<endpoint>odds|scores|events)$')
+    COSTS = {'odds': 3, 'scores': 2, 'events': 0}
+
+    def __init__(self, fixtures: dict):
+        self.fixtures = fixtures
+        self.remaining = 10_000_000
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v4"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                match = stub.PATH.match(url.path)
+                payload = stub.fixtures.get((match['endpoint'], match['sport'])) if match else None
+                if payload is None:
+                    self._send(404, b'{"message": "unknown path"}', 0)
+                    return
+                if match['endpoint'] == 'events':
+                    wanted = set(','.join(parse_qs(url.query).get('eventIds', [''])).split(','))
+                    payload = [event for event in payload if event['id'] in wanted]
+                self._send(200, json.dumps(payload).encode('utf-8'), stub.COSTS[match['endpoint']])
+
+            def _send(self, status: int, body: bytes, cost: int):
+                with stub._lock:
+                    stub.calls += 1
+                    stub.remaining -= cost
+                    remaining = stub.remaining
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('x-requests-last', str(cost))
+                self.send_header('x-requests-remaining', str(remaining))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, name='stub-odds-api', daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# App and data
+
+class ArrayFiltersCollection:
+    """
+    A mongomock collection whose find_one_and_update applies arrayFilters,
+    which mongomock ignores: settle_bets sets `legs.$[name].field` on
+    matching legs only. Wraps the collection rather than patching mongomock,
+    so nothing outside the bench's database sees it.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find_one_and_update(self, filter, update, projection=None, array_filters=None, **kwargs):
+        from mongomock.filtering import filter_applies
+
+        collection = self._collection
+        if not array_filters:
+            return collection.find_one_and_update(filter, update, projection=projection, **kwargs)
+        doc = collection.find_one(filter)
+        if doc is None:
+            return None
+        conditions = {}
+        for array_filter in array_filters:
+            for path, condition in array_filter.items():
+                name, _, field = path.partition('.')
+                conditions.setdefault(name, {})[field] = condition
+        sets = {}
+        for path, value in update['$set'].items():
+            array, placeholder, field = path.split('.', 2)
+            name = placeholder[2:-1]
+            for i, element in enumerate(doc[array]):
+                if filter_applies(conditions[name], element):
+                    sets[f"{array}.{i}.{field}"] = value
+        return collection.find_one_and_update({'_id': doc['_id']}, {'$set': sets}, projection=projection, **kwargs)
+
+
+class ArrayFiltersDatabase:
+    # A mongomock database handing out ArrayFiltersCollections
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        from mongomock import Collection
+
+        attr = getattr(self._database, name)
+        return ArrayFiltersCollection(attr) if isinstance(attr, Collection) else attr
+
+    def __getitem__(self, name):
+        return ArrayFiltersCollection(self._database[name])
+
+
+class MongomockMongo:
+    # Stands in for app.LazyMongo
+    def __init__(self, db_name: str):
+        import mongomock
+        self._db = ArrayFiltersDatabase(mongomock.MongoClient()[db_name])
+
+    def db(self):
+        return self._db
+
+    def close(self):
+        pass
+
+
+def build_app(stub_url: str, mongo_uri: str, db_name: str, odds_ttl: int):
+    from app import create_app
+
+    app = create_app({
+        'MONGODB_URI': mongo_uri,
+        'MONGO_DB_NAME': db_name,
+        'ODDS_API_BASE': stub_url,
+        'ODDS_API_KEY': 'replay',
+        'ODDS_CACHE_TTL': odds_ttl,
+        # The stub has credits to spare; measure the routes, not the budget
+        'ODDS_CREDITS_PER_HOUR': 1e12,
+        'ODDS_SPORT_CREDITS_PER_HOUR': 1e12,
+        'JWT_SECRET': os.getenv('JWT_SECRET') or 'replay-benchmark-secret-0123456789abcdef',
+        'JWT_ISSUER': 'replay',
+        'JWT_AUDIENCE': 'replay',
+        'LOG_LEVEL': 'ERROR',
+    })
+    if not mongo_uri:
+        app.extensions['mongo'] = MongomockMongo(db_name)
+    return app
+
+
+def fixture_games(fixtures: dict, sports: list) -> list:
+    # The fixture schedule in datagen's game shape, so seeded bets land on replayed games
+    from app import parse_iso_z
+
+    return [{
+        'game_id': game['id'],
+        'sport': sport,
+        'home_team': game['home_team'],
+        'away_team': game['away_team'],
+        'commence_time': parse_iso_z(game['commence_time']),
+    } for sport in sports for game in fixtures[('odds', sport)]]
+
+
+# Scenarios
+
+def make_scenarios(app, fixtures: dict, sports: list, usernames: list, seed: int) -> dict:
+    from app import COOKIE_NAME, generate_jwt
+
+    rng = random.Random(seed)
+    games = [(sport, game) for sport in sports for game in fixtures[('odds', sport)]]
+    settle_queue = list(games)
+    rng.shuffle(settle_queue)
+    tokens = {}
+
+    def login(client, username: str):
+        # Test clients ignore a raw Cookie header; set it on the client's jar
+        if username not in tokens:
+            with app.app_context():
+                tokens[username] = generate_jwt({'sub': username})
+        client.set_cookie(COOKIE_NAME, tokens[username])
+
+    def upcoming(client):
+        return client.get(f"/api/games/upcoming?sport={rng.choice(sports)}")
+
+    def home_price(game: dict):
+        # The price format_odds_games keeps (last bookmaker's), which placement is checked against
+        h2h = next(m for m in game['bookmakers'][-1]['markets'] if m['key'] == 'h2h')
+        return next(o['price'] for o in h2h['outcomes'] if o['name'] == game['home_team'])
+
+    def create_bet(client):
+        username = rng.choice(usernames)
+        sport, game = rng.choice(games)
+        login(client, username)
+        return client.post('/api/bets', json={
+            'user_id': username, 'wager': 1,
+            'legs': [{'game_id': game['id'], 'sport': sport, 'bet_type': 'moneyline',
+                      'selection': game['home_team'], 'odds': home_price(game)}],
+        })
+
+    def rank(client):
+        username = rng.choice(usernames)
+        login(client, username)
+        return client.get(f"/api/users/{username}/rank")
+
+    def leaderboard(client):
+        offset = rng.randrange(0, max(1, min(len(usernames), 1000)), 50)
+        return client.get(f"/api/leaderboard?limit=50&offset={offset}")
+
+    def settle(client):
+        # One game per call (its active bets); runs out after every fixture game has been settled once
+        if not settle_queue:
+            return None
+        _, game = settle_queue.pop()
+        return client.post('/api/bets/settle', json={'game_id': game['id'], 'winner': game['home_team']})
+
+    return {'upcoming': upcoming, 'create_bet': create_bet, 'rank': rank, 'leaderboard': leaderboard, 'settle': settle}
+
+
+def run_scenario(app, fn, requests_per_scenario: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = [requests_per_scenario]
+
+    def worker():
+        nonlocal errors
+        client = app.test_client()
+        local_latencies, local_errors = [], 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            start = time.perf_counter()
+            resp = fn(client)
+            if resp is None:
+                break
+            local_latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def previous_results(path: str, key: tuple) -> dict:
+    # Latest earlier result per scenario with the same (users, bets, backend)
+    found = {}
+    if not os.path.exists(path):
+        return found
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            result = json.loads(line)
+            if (result['users'], result['bets'], result['backend']) == key:
+                found[result['scenario']] = result
+    return found
+
+
+def main():
+    from app import SPORT_MAPPING
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--bets', type=int, default=10000)
+    parser.add_argument('--sport', action='append', dest='sports', help='repeatable; defaults to every sport')
+    parser.add_argument('--games-per-sport', type=int, default=30, help='synthetic fixtures only')
+    parser.add_argument('--parlay-rate', type=float, default=0.25)
+    parser.add_argument('--scenario', action='append', dest='scenarios', choices=SCENARIOS)
+    parser.add_argument('--requests', type=int, default=500, help='per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='keep at 1 with mongomock')
+    parser.add_argument('--odds-ttl', type=int, default=0, help='ODDS_CACHE_TTL; 0 replays upstream every request')
+    parser.add_argument('--mongo-uri', help='throwaway mongod; default is mongomock')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='run')
+    parser.add_argument('--out', default='bench/results/replay.jsonl')
+    parser.add_argument('--compare', action='store_true', help='print the change against the previous matching run')
+    parser.add_argument('--record', action='store_true', help='capture fixtures from The Odds API (needs ODDS_API)')
+    args = parser.parse_args()
+
+    sports = args.sports or list(SPORT_MAPPING)
+    if args.record:
+        record_fixtures(os.environ['ODDS_API'], sports)
+        return
+
+    fixtures, source = load_fixtures(sports, args.games_per_sport, args.seed)
+    backend = 'mongod' if args.mongo_uri else 'mongomock'
+    db_name = f"replay_bench_{os.getpid()}"
+
+    with StubOddsApi(fixtures) as stub:
+        app = build_app(stub.base_url, args.mongo_uri, db_name, args.odds_ttl)
+        with app.app_context():
+            from app import credit_period, get_db
+            from indexes import ensure_indexes
+
+            database = get_db()
+            ensure_indexes(database)
+            summary = datagen.generate(
+                database, args.users, args.bets, seed=args.seed, games=fixture_games(fixtures, sports),
+                parlay_rate=args.parlay_rate, period=credit_period(), progress=None,
+            )
+            usernames = [datagen.username(i) for i in range(args.users)]
+            print(f"seeded {args.users} users / {args.bets} bets ({backend}, {source} fixtures) "
+                  f"in {summary['seconds']}s")
+
+        scenarios = make_scenarios(app, fixtures, sports, usernames, args.seed)
+        previous = previous_results(args.out, (args.users, args.bets, backend)) if args.compare else {}
+        results = []
+        try:
+            for name in args.scenarios or SCENARIOS:
+                result = run_scenario(app, scenarios[name], args.requests, args.concurrency)
+                result.update({
+                    'scenario': name, 'label': args.label, 'users': args.users, 'bets': args.bets,
+                    'backend': backend, 'fixtures': source, 'concurrency': args.concurrency,
+                    'odds_ttl': args.odds_ttl, 'revision': git_revision(), 'timestamp': time.time(),
+                })
+                results.append(result)
+                line = (f"[{args.label}] {name}: {result['rps']} req/s, p50 {result['p50_ms']} ms, "
+                        f"p99 {result['p99_ms']} ms, errors {result['errors']}/{result['requests']}")
+                before = previous.get(name)
+                if before and before['p50_ms']:
+                    line += (f"  (p50 {result['p50_ms'] / before['p50_ms'] - 1:+.0%}, "
+                             f"p99 {result['p99_ms'] / max(before['p99_ms'], 1e-9) - 1:+.0%} vs {before['revision']})")
+                print(line)
+        finally:
+            if args.mongo_uri:
+                app.extensions['mongo'].client().drop_database(db_name)
+            app.extensions['mongo'].close()
+        print(f"stub served {stub.calls} upstream calls")
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'a', encoding='utf-8') as fh:
+            for result in results:
+                fh.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+In-process fan-out for Server-Sent Events.
+
+Publishers (the odds refresh, the user change stream) and many subscribers
+(open stream connections) per topic. Each event is encoded once as an SSE frame and the
+same bytes are handed to every subscriber, so a change costs one
+serialization however many clients are listening.
+
+Subscriber queues are bounded. A subscriber that falls behind is dropped
+instead of buffering without limit; its EventSource reconnects and starts
+again from a snapshot.
+
+Subscription is consumed from a thread (Flask); AsyncSubscription from an
+event loop (asgi.py). Publishing is thread-safe for both.
+"""
+import asyncio
+import itertools
+import queue
+import threading
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def sse_frame(event: str, data: bytes, event_id: int = None) -> bytes:
+    head = f"event: {event}\n" + (f"id: {event_id}\n" if event_id is not None else "")
+    return head.encode('utf-8') + b"data: " + data + b"\n\n"
+
+
+class Subscription:
+    def __init__(self, broadcaster: 'Broadcaster', topic: str, max_queue: int):
+        self.broadcaster = broadcaster
+        self.topic = topic
+        self.dropped = False
+        self._queue = queue.Queue(max_queue)
+
+    def deliver(self, frame: bytes) -> bool:
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout: float):
+        # Next frame, or None after `timeout` seconds without one
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    def __init__(self, broadcaster: 'Broadcaster', topic: str, max_queue: int, loop: asyncio.AbstractEventLoop):
+        super().__init__(broadcaster, topic, max_queue)
+        self._loop = loop
+        self._queue = asyncio.Queue(max_queue)
+
+    def deliver(self, frame: bytes) -> bool:
+        # Called from the publishing thread; the put itself runs on the subscriber's loop
+        if self._queue.full():
+            return False
+        try:
+            self._loop.call_soon_threadsafe(self._put, frame)
+        except RuntimeError:  # loop closed under us
+            return False
+        return True
+
+    def _put(self, frame: bytes):
+        try:
+            self._queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped = True
+            self.broadcaster.unsubscribe(self)
+
+    async def get_async(self, timeout: float):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broadcaster:
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._topics = {}  # topic -> set of subscriptions
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str, loop: asyncio.AbstractEventLoop = None) -> Subscription:
+        if loop is None:
+            sub = Subscription(self, topic, self.max_queue)
+        else:
+            sub = AsyncSubscription(self, topic, self.max_queue, loop)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._topics.get(sub.topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._topics[sub.topic]
+
+    def subscribers(self, topic: str) -> int:
+        with self._lock:
+            return len(self._topics.get(topic, ()))
+
+    def total(self) -> int:
+        # Subscribers across all topics
+        with self._lock:
+            return sum(len(subs) for subs in self._topics.values())
+
+    def publish(self, topic: str, event: str, data: bytes) -> tuple:
+        """Returns (delivered, dropped) subscriber counts."""
+        with self._lock:
+            subs = list(self._topics.get(topic, ()))
+        if not subs:
+            return 0, 0
+        frame = sse_frame(event, data, next(self._ids))
+        delivered = dropped = 0
+        for sub in subs:
+            if sub.deliver(frame):
+                delivered += 1
+            else:
+                sub.dropped = True
+                self.unsubscribe(sub)
+                dropped += 1
+        return delivered, dropped
@@ -0,0 +1,62 @@
+"""
+Circuit breaker for upstream calls.
+
+CLOSED: calls go through; `failure_threshold` consecutive failures open it.
+OPEN: calls are refused without touching the network for `reset_timeout`
+seconds, so a sick upstream can't hold worker threads for its full timeout.
+HALF_OPEN: one trial call is let through; success closes the circuit,
+failure opens it for another `reset_timeout`.
+
+No clocks or I/O here; callers pass `now`, so the sync client and the async
+app share one breaker.
+"""
+import threading
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self, now: float) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, now: float):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self, now: float):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = now
+            self._trial_in_flight = False
+
+    def retry_after(self, now: float) -> int:
+        # Seconds until the next trial call, for Retry-After
+        with self._lock:
+            if self.state != OPEN:
+                return 0
+            return max(1, int(self.reset_timeout - (now - self.opened_at) + 0.999))
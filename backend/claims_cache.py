@@ -0,0 +1,58 @@
+"""
+LRU cache of verified JWT claims.
+
+The auth cookie is replayed on every request of a session, and each replay
+used to pay a full jwt.decode (HMAC plus claim checks). Tokens are immutable,
+so once one has verified, its claims can be reused until it expires.
+
+Keys are a SHA-256 digest of the token, so the cache never holds bearer
+tokens. Entries are dropped at the token's own `exp`, and evicted least
+recently used past `max_size`. A cache lives in one process; it never makes a
+token valid that jwt.decode would reject, it only skips re-checking it.
+Revocation isn't done here: auth_required compares the token's `gen` claim
+with the user's token_gen on every request, cache hit or not.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class ClaimsCache:
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # digest -> claims
+        self._lock = threading.Lock()
+
+    def get(self, token: str, now: float):
+        key = token_digest(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims['exp'] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: dict, now: float):
+        if self.max_size <= 0 or claims.get('exp', 0) <= now:
+            return
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        # A revoked token would fail auth anyway; this just frees its entry early
+        with self._lock:
+            self._entries.pop(token_digest(token), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,24 @@
+"""
+Response body compression. brotli is optional; gzip is always available.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+# Preference order used when the client accepts several with equal weight
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Only text-like bodies are worth compressing
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        # Quality 5 is close to gzip speed with noticeably smaller output
+        return brotli.compress(data, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    raise ValueError(f"unsupported encoding: {encoding}")
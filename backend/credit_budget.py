@@ -0,0 +1,107 @@
+"""
+Credit budget for The Odds API.
+
+Every odds/scores call spends monthly quota. The budget decides whether a
+cache refresh may spend credits now or should keep serving what is cached:
+
+- a global token bucket refilled at ODDS_CREDITS_PER_HOUR,
+- a per-sport bucket so one busy sport can't starve the rest,
+- a hard floor: once x-requests-remaining drops to the reserve, only
+  high-priority refreshes with nothing cached may spend.
+
+Priority is decided by the caller: out-of-season sports are LOW (served
+from cache whenever anything is cached), sports with a game near kickoff or
+in progress are HIGH (may skip their per-sport bucket).
+
+No clocks or I/O here; callers pass `now`, so the sync and async apps share it.
+
+A CreditBudget lives in one process. create_app gives each serving process
+an equal share of the configured hourly rates (ODDS_BUDGET_PROCESSES), so
+the deployment as a whole stays within them; the quota floor needs no
+sharing since every process sees x-requests-remaining.
+"""
+import threading
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_seconds: float = 3600.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.tokens = self.capacity
+        self.updated = None
+
+    def _refill(self, now: float):
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def take(self, cost: float, now: float):
+        self._refill(now)
+        self.tokens -= cost
+
+
+class CreditBudget:
+    def __init__(self, credits_per_hour: float, sport_credits_per_hour: float, reserve: int):
+        self.reserve = reserve
+        self.sport_credits_per_hour = sport_credits_per_hour
+        self.remaining = None  # last x-requests-remaining seen, None until the first call
+        self._global = TokenBucket(credits_per_hour)
+        self._sports = {}
+        self._lock = threading.Lock()
+
+    def _sport_bucket(self, sport: str) -> TokenBucket:
+        bucket = self._sports.get(sport)
+        if bucket is None:
+            bucket = self._sports[sport] = TokenBucket(self.sport_credits_per_hour)
+        return bucket
+
+    def acquire(self, sport: str, cost: int, priority: int, have_cache: bool, now: float) -> tuple:
+        """
+        Returns (allowed, reason). When allowed, `cost` credits are taken from
+        the buckets; when denied, reason says why the caller should serve cache.
+        """
+        with self._lock:
+            if self.remaining is not None:
+                if self.remaining < cost:
+                    return False, 'quota_exhausted'
+                if self.remaining - cost < self.reserve and (have_cache or priority < PRIORITY_HIGH):
+                    return False, 'quota_reserve'
+
+            if priority == PRIORITY_LOW and have_cache:
+                return False, 'out_of_season'
+
+            sport_bucket = self._sport_bucket(sport)
+            if self._global.available(now) < cost:
+                return False, 'hourly_budget'
+            if priority < PRIORITY_HIGH and sport_bucket.available(now) < cost:
+                return False, 'sport_budget'
+
+            self._global.take(cost, now)
+            sport_bucket.take(cost, now)
+            return True, 'ok'
+
+    def observe_remaining(self, remaining):
+        # Fed from every upstream response's x-requests-remaining header
+        try:
+            value = int(float(remaining))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self.remaining = value
+
+    def snapshot(self, now: float) -> dict:
+        with self._lock:
+            return {
+                'remaining': self.remaining,
+                'reserve': self.reserve,
+                'hourly_available': round(self._global.available(now), 2),
+                'sports_available': {sport: round(b.available(now), 2) for sport, b in sorted(self._sports.items())},
+            }
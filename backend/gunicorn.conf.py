@@ -0,0 +1,52 @@
+"""
+Production serving config. From backend/:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Routes spend most of their time waiting on Mongo and The Odds API, so the
+default is a few processes with a pool of threads each (gthread). Every
+worker has its own in-process caches (leaderboard pages, odds bodies) and
+its own MongoClient, created lazily after fork. The Odds API credit budget is
+split evenly between the workers: ODDS_BUDGET_PROCESSES is exported below
+(see app.py). Running several hosts, set it to the total worker count.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+
+# Read by create_app, which runs after this file in the master (preload) or the workers
+os.environ.setdefault("ODDS_BUDGET_PROCESSES", str(workers))
+
+# Upstream calls time out after 10s; leave room for a slow one plus Mongo
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+# On SIGTERM workers stop accepting and get this long to finish in-flight requests
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "20"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+
+# Recycle workers periodically if set (guards against slow leaks)
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "0"))
+
+# Import the app once in the master so workers fork with it warm
+preload_app = os.getenv("WEB_PRELOAD", "1") == "1"
+
+accesslog = os.getenv("WEB_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("WEB_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Never reuse a client (and its sockets/monitor threads) from the master
+    from app import app
+    app.extensions['mongo'].close()
+
+
+def worker_exit(server, worker):
+    from app import app
+    app.extensions['mongo'].close()
+    app.extensions['odds_api'].close()
+    app.extensions['password_hasher'].close()
@@ -0,0 +1,36 @@
+"""
+Indexes the app's queries rely on. Apply (idempotent) with:
+
+    cd backend && python -m tools.ensure_indexes
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDEXES = {
+    # settle_bets: {legs.game_id, status: 'active'} for singles and parlays alike
+    'Bets': [
+        IndexModel([('legs.game_id', ASCENDING), ('status', ASCENDING)], name='legs_game_id_status'),
+        # get_user_history / daily profits: {user_id, event_ts in range}
+        IndexModel([('user_id', ASCENDING), ('event_ts', ASCENDING)], name='user_id_event_ts'),
+        # get_user_bets: {user_id}, newest first; get_user_history: {user_id, created_at in range}
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)], name='user_id_created_at'),
+        # tools/archive_bets: {status in settled/cancelled, created_at < horizon}
+        IndexModel([('status', ASCENDING), ('created_at', ASCENDING)], name='status_created_at'),
+    ],
+    # history/stats union the archive in by {user_id, status}, newest first
+    'BetsArchive': [
+        IndexModel([('user_id', ASCENDING), ('status', ASCENDING), ('created_at', DESCENDING)],
+                   name='user_id_status_created_at'),
+        IndexModel([('user_id', ASCENDING), ('event_ts', ASCENDING)], name='user_id_event_ts'),
+        # get_user_bets without ?active: {user_id}, newest first; get_user_history's created_at range
+        IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)], name='user_id_created_at'),
+    ],
+    # get_completed_games: {sport, commence_time >= since}, sorted by commence_time
+    'CompletedGames': [
+        IndexModel([('sport', ASCENDING), ('commence_time', ASCENDING)], name='sport_commence_time'),
+    ],
+}
+
+
+def ensure_indexes(database) -> dict:
+    # Returns {collection: [index names]}
+    return {name: database[name].create_indexes(models) for name, models in INDEXES.items()}
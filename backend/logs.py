@@ -0,0 +1,141 @@
+"""
+Structured JSON logging for the app.
+
+Records are handed to a queue on the calling thread and written to stdout by
+a background listener, so a request never blocks on a slow pipe. One JSON
+object per line: ts, level, logger, msg, request_id (inside a request) and
+any `extra={...}` fields passed to the log call.
+
+Use %-style arguments (log.debug("bet %s", bet_id)) so disabled levels skip
+the formatting entirely.
+"""
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from serialization import dumps_bytes
+
+ROOT_LOGGER = 'gambling'
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return dumps_bytes(entry).decode('utf-8')
+
+
+def current_request_id():
+    # The Flask request's id, or the Quart one's when serving through asgi.py
+    from flask import g, has_request_context
+    if has_request_context():
+        return g.get('request_id')
+    if 'quart' in sys.modules:
+        from quart import g as quart_g, has_request_context as quart_has_request_context
+        if quart_has_request_context():
+            return quart_g.get('request_id')
+    return None
+
+
+class RequestIdFilter(logging.Filter):
+    # Stamps the request id while still on the request thread (or task)
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id'):
+            record.request_id = current_request_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps `rate` of the records below `always_at`; warnings and errors always pass
+    def __init__(self, rate: float, always_at: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.always_at = always_at
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.always_at or self.rate >= 1.0 or random.random() < self.rate
+
+
+class _ForkSafeQueueHandler(QueueHandler):
+    """
+    Starts the stdout listener on first use in each process. The listener is a
+    thread, and threads don't survive fork, so a listener started in the
+    gunicorn master would leave workers queueing into the void.
+    """
+    def __init__(self, target: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.queue = queue.SimpleQueue()
+                    self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                    self._listener.start()
+                    self._pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare formats the message eagerly; keep exc_info for the formatter instead
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self._ensure_listener()
+        self.queue.put_nowait(record)
+
+    def stop(self):
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+
+_handler = None
+
+
+def configure_logging(level: str = 'INFO', request_sample_rate: float = 1.0):
+    """Idempotent; safe to call from every create_app."""
+    global _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level.upper())
+    root.propagate = False
+
+    if _handler is None:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter())
+        _handler = _ForkSafeQueueHandler(stream)
+        _handler.addFilter(RequestIdFilter())
+        root.addHandler(_handler)
+        atexit.register(_handler.stop)
+
+    request_log = logging.getLogger(f'{ROOT_LOGGER}.request')
+    for f in [f for f in request_log.filters if isinstance(f, SamplingFilter)]:
+        request_log.removeFilter(f)
+    request_log.addFilter(SamplingFilter(request_sample_rate))
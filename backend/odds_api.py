@@ -0,0 +1,96 @@
+"""
+Client for The Odds API v4.
+
+The HTTP session (and its connection pool) is opened on the first request,
+so building a client costs nothing at import or app-creation time.
+
+With a CircuitBreaker attached, calls made while the circuit is open raise
+CircuitOpenError immediately instead of waiting out the timeout.
+"""
+import threading
+import time
+
+import requests
+
+from circuit_breaker import CircuitBreaker
+
+ODDS_API_BASE = "https://api.the-odds-api.com/v4"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    def __init__(self, retry_after: int):
+        super().__init__(f"The Odds API circuit is open; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(status_code: int) -> bool:
+    # Statuses that say the upstream is unhealthy or shedding load (not our request's fault)
+    return status_code >= 500 or status_code == 429
+
+
+class OddsApiClient:
+    def __init__(self, api_key: str, base_url: str = ODDS_API_BASE, timeout: float = 10, observer=None,
+                 breaker: CircuitBreaker = None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # observer(endpoint, response_or_None, elapsed_seconds), e.g. for metrics
+        self.observer = observer
+        self.breaker = breaker
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = requests.Session()
+        return self._session
+
+    def _get(self, endpoint: str, path: str, params: dict) -> requests.Response:
+        if self.breaker and not self.breaker.allow(time.monotonic()):
+            raise CircuitOpenError(self.breaker.retry_after(time.monotonic()))
+
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.session.get(
+                f"{self.base_url}{path}", params={'apiKey': self.api_key, **params}, timeout=self.timeout,
+            )
+            return response
+        finally:
+            if self.breaker:
+                if response is None or is_upstream_failure(response.status_code):
+                    self.breaker.record_failure(time.monotonic())
+                else:
+                    self.breaker.record_success(time.monotonic())
+            if self.observer:
+                self.observer(endpoint, response, time.perf_counter() - started)
+
+    def odds(self, sport: str) -> requests.Response:
+        # Single region, three markets: 3 credits
+        return self._get('odds', f"/sports/{sport}/odds", {
+            'regions': 'us',
+            'markets': 'h2h,spreads,totals',
+            'oddsFormat': 'american'
+        })
+
+    def scores(self, sport: str, days_from: int) -> requests.Response:
+        # With daysFrom: 2 credits
+        return self._get('scores', f"/sports/{sport}/scores", {
+            'daysFrom': days_from,
+            'dateFormat': 'iso'
+        })
+
+    def events(self, sport: str, event_ids: list) -> requests.Response:
+        return self._get('events', f"/sports/{sport}/events", {
+            'dateFormat': 'iso',
+            'eventIds': ','.join(map(str, event_ids))
+        })
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,87 @@
+"""
+Password hashing off the request thread.
+
+Hashing is deliberately slow CPU work, so running it on a gthread worker's
+request threads lets a login storm pin every worker. PasswordHasher sends it
+to a small process pool instead and bounds how many hashes may be running or
+queued: past `max_pending` callers get PasswordHasherBusy immediately (the
+routes answer 503) rather than waiting behind everyone else.
+
+The pool is started on first use and per process, like LazyMongo, so gunicorn
+workers never share one started in the master. workers=0 hashes on the
+calling thread (still bounded), for development and benchmarks.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def normalize_method(method: str) -> str:
+    # Spell out werkzeug's defaults so stored hashes can be compared to the config
+    name, *params = method.split(':')
+    if name == 'scrypt' and not params:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2':
+        if not params:
+            params = ['sha256']
+        if len(params) == 1:
+            params.append(str(DEFAULT_PBKDF2_ITERATIONS))
+    return ':'.join([name, *params])
+
+
+def hash_method(pwhash: str) -> str:
+    return pwhash.split('$', 1)[0]
+
+
+class PasswordHasher:
+    def __init__(self, method: str = 'scrypt', workers: int = 1, max_pending: int = 8):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max(1, workers) + max_pending)
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    # spawn, not fork: the caller is a threaded web worker
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy('password hashing is saturated')
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        return hash_method(pwhash) != self.method
+
+    def close(self):
+        # Shut down our own pool; one inherited across fork is only dropped
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pid = None
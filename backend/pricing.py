@@ -0,0 +1,145 @@
+"""
+Server-side pricing for bet placement.
+
+Clients send the American odds they were shown on each leg. Placement
+re-prices every leg from the cached odds tree (format_odds_games) instead
+of trusting that number: the leg is matched to its market and side, the
+quoted price must be within a relative tolerance of the client's (compared
+as decimal odds), a quoted line must match exactly, and the quote must be
+younger than a maximum age for a game that hasn't started.
+
+Accepted legs carry the cached price. The parlay's price is the product of
+the legs' decimal odds, and the potential payout is the wager times that.
+Everything here is pure and in-memory (dict lookups on the cached slate),
+so it runs inline on every placement.
+"""
+import math
+
+MARKETS = ('moneyline', 'spread', 'total')
+
+
+class PriceRejected(Exception):
+    """A leg can't be placed at the price asked; `reason` is machine-readable."""
+
+    def __init__(self, reason: str, message: str, leg: int = None, quoted_odds=None):
+        super().__init__(message)
+        self.reason = reason
+        self.leg = leg
+        self.quoted_odds = quoted_odds
+
+    def payload(self) -> dict:
+        payload = {'status': 'error', 'message': str(self), 'reason': self.reason}
+        if self.leg is not None:
+            payload['leg'] = self.leg
+        if self.quoted_odds is not None:
+            payload['quoted_odds'] = self.quoted_odds
+        return payload
+
+
+def american_to_decimal(odds) -> float:
+    # +150 -> 2.5, -200 -> 1.5; American prices live at or beyond +/-100
+    if odds >= 100:
+        return 1 + odds / 100
+    if odds <= -100:
+        return 1 + 100 / -odds
+    raise ValueError(f"invalid American odds: {odds}")
+
+
+def decimal_to_american(decimal: float) -> int:
+    if decimal >= 2:
+        return round((decimal - 1) * 100)
+    return round(-100 / (decimal - 1))
+
+
+def parlay_decimal(decimals) -> float:
+    return math.prod(decimals)
+
+
+def potential_payout(wager: float, decimal: float) -> float:
+    return round(wager * decimal, 2)
+
+
+def split_line(selection: str):
+    # "Lakers -4.5" -> ("Lakers", -4.5); "Over 221.5" -> ("Over", 221.5); "Lakers" -> ("Lakers", None)
+    head, _, tail = selection.rpartition(' ')
+    try:
+        return head, float(tail)
+    except ValueError:
+        return selection, None
+
+
+def find_quote(game: dict, leg: dict):
+    # Returns (market, quote) for the leg's side of the game's odds tree; quote is None if not offered
+    odds = game['odds']
+    name, line = split_line(leg['selection'].strip())
+    market = (leg.get('bet_type') or '').strip().lower()
+    if market not in MARKETS:
+        # Older clients don't send bet_type: infer it from the selection
+        if name.lower() in ('over', 'under'):
+            market = 'total'
+        elif line is None:
+            market = 'moneyline'
+        else:
+            market = 'spread'
+
+    if market == 'total':
+        return market, odds['total'].get(name.lower())
+    if market == 'moneyline':
+        name = leg['selection'].strip()
+    lowered = name.lower()
+    for team, quote in odds[market].items():
+        if team.lower() == lowered:
+            return market, quote
+    return market, None
+
+
+def price_leg(index: int, leg: dict, game: dict, tolerance: float) -> dict:
+    # The leg at the cached price, or PriceRejected
+    market, quote = find_quote(game, leg)
+    if quote is None:
+        raise PriceRejected('not_offered', f"leg {index}: {leg['selection']!r} is not offered on {market}", index)
+
+    quoted = quote['odds']
+    _, line = split_line(leg['selection'].strip())
+    if leg.get('line') is not None:
+        line = leg['line']
+    if market != 'moneyline' and line is not None and quote.get('line') is not None and float(line) != quote['line']:
+        raise PriceRejected('line_moved', f"leg {index}: line is now {quote['line']}", index, quoted)
+
+    asked = american_to_decimal(leg['odds'])
+    current = american_to_decimal(quoted)
+    if abs(current - asked) > tolerance * asked:
+        raise PriceRejected('price_moved', f"leg {index}: price is now {quoted}", index, quoted)
+
+    priced = {**leg, 'bet_type': market, 'odds': quoted}
+    if market != 'moneyline' and quote.get('line') is not None:
+        priced['line'] = quote['line']
+    return priced
+
+
+def price_bet(legs: list, slates: dict, wager: float, now: float, max_age: float, tolerance: float,
+              started) -> dict:
+    """
+    Price `legs` against `slates` ({sport: cached odds entry or None}).
+
+    `started(game)` says whether a game has kicked off. Returns
+    {'legs', 'decimal_odds', 'american_odds', 'potential_payout'}; raises
+    PriceRejected on the first leg that can't be placed as asked.
+    """
+    priced = []
+    for index, leg in enumerate(legs):
+        entry = slates.get(leg['sport'])
+        if entry is None or now - entry['fetched_at'] > max_age:
+            raise PriceRejected('stale_odds', f"leg {index}: no current odds for {leg['sport']}", index)
+        game = entry['games_by_id'].get(leg['game_id'])
+        if game is None or started(game):
+            raise PriceRejected('not_offered', f"leg {index}: game {leg['game_id']} is not open for betting", index)
+        priced.append(price_leg(index, leg, game, tolerance))
+
+    decimal = parlay_decimal(american_to_decimal(leg['odds']) for leg in priced)
+    return {
+        'legs': priced,
+        'decimal_odds': round(decimal, 4),
+        'american_odds': decimal_to_american(decimal),
+        'potential_payout': potential_payout(wager, decimal),
+    }
@@ -0,0 +1,40 @@
+"""
+JSON encoding shared by the Flask JSON provider and the benchmarks.
+
+orjson is used when installed (datetimes are written as ISO 8601 natively);
+otherwise we fall back to the stdlib encoder with the same output shape.
+"""
+import json
+from datetime import date, datetime
+
+from bson import ObjectId
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def json_default(o):
+    # Types neither encoder handles natively (stdlib also lands here for datetimes)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, sort_keys: bool = False) -> bytes:
+    # Compact UTF-8 JSON
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=json_default, option=option)
+    return json.dumps(
+        obj,
+        default=json_default,
+        sort_keys=sort_keys,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    ).encode('utf-8')
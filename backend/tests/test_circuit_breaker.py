@@ -0,0 +1,51 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def opened(now=0.0) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        assert breaker.allow(now)
+        breaker.record_failure(now)
+    return breaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    breaker.record_success(0)
+    breaker.record_failure(0)
+    assert breaker.state == CLOSED
+    assert opened().state == OPEN
+
+
+def test_open_refuses_until_reset_timeout():
+    breaker = opened()
+    assert not breaker.allow(29.9)
+    assert breaker.retry_after(20) == 10
+    assert breaker.allow(30)
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = opened()
+    assert breaker.allow(30)
+    assert not breaker.allow(30)
+    assert not breaker.allow(45)
+
+
+def test_trial_success_closes():
+    breaker = opened()
+    breaker.allow(30)
+    breaker.record_success(31)
+    assert breaker.state == CLOSED
+    assert breaker.allow(31) and breaker.allow(31)
+
+
+def test_trial_failure_reopens_for_another_timeout():
+    breaker = opened()
+    breaker.allow(30)
+    breaker.record_failure(31)
+    assert breaker.state == OPEN
+    assert not breaker.allow(60)
+    assert breaker.allow(61)
@@ -0,0 +1,63 @@
+from credit_budget import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, CreditBudget
+
+
+def budget(per_hour=100, sport_per_hour=10, reserve=50) -> CreditBudget:
+    return CreditBudget(per_hour, sport_per_hour, reserve)
+
+
+def test_low_priority_served_from_cache():
+    b = budget()
+    assert b.acquire('nhl', 3, PRIORITY_LOW, True, 0) == (False, 'out_of_season')
+    assert b.acquire('nhl', 3, PRIORITY_LOW, False, 0) == (True, 'ok')
+
+
+def test_sport_bucket_limits_one_sport_only():
+    b = budget()
+    for _ in range(3):
+        assert b.acquire('nba', 3, PRIORITY_NORMAL, True, 0) == (True, 'ok')
+    assert b.acquire('nba', 3, PRIORITY_NORMAL, True, 0) == (False, 'sport_budget')
+    assert b.acquire('nfl', 3, PRIORITY_NORMAL, True, 0) == (True, 'ok')
+
+
+def test_high_priority_skips_sport_bucket_not_global():
+    b = budget(per_hour=12)
+    for _ in range(3):
+        b.acquire('nba', 3, PRIORITY_NORMAL, True, 0)
+    assert b.acquire('nba', 3, PRIORITY_HIGH, True, 0) == (True, 'ok')
+    assert b.acquire('nba', 3, PRIORITY_HIGH, True, 0) == (False, 'hourly_budget')
+
+
+def test_buckets_refill_over_the_hour():
+    b = budget()
+    for _ in range(3):
+        b.acquire('nba', 3, PRIORITY_NORMAL, True, 0)
+    assert b.acquire('nba', 3, PRIORITY_NORMAL, True, 0)[0] is False
+    # 10 credits/hour: 3 more after 1080 s
+    assert b.acquire('nba', 3, PRIORITY_NORMAL, True, 1080) == (True, 'ok')
+
+
+def test_denied_acquire_spends_nothing():
+    b = budget()
+    b.acquire('nhl', 3, PRIORITY_LOW, True, 0)
+    assert b.snapshot(0)['hourly_available'] == 100
+
+
+def test_reserve_kept_for_high_priority_without_cache():
+    b = budget()
+    b.observe_remaining('52')
+    assert b.acquire('nba', 3, PRIORITY_NORMAL, False, 0) == (False, 'quota_reserve')
+    assert b.acquire('nba', 3, PRIORITY_HIGH, True, 0) == (False, 'quota_reserve')
+    assert b.acquire('nba', 3, PRIORITY_HIGH, False, 0) == (True, 'ok')
+
+
+def test_quota_exhausted():
+    b = budget()
+    b.observe_remaining(2)
+    assert b.acquire('nba', 3, PRIORITY_HIGH, False, 0) == (False, 'quota_exhausted')
+
+
+def test_unparseable_remaining_ignored():
+    b = budget()
+    b.observe_remaining('unknown')
+    assert b.remaining is None
+    assert b.acquire('nba', 3, PRIORITY_NORMAL, True, 0) == (True, 'ok')
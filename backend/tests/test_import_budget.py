@@ -0,0 +1,17 @@
+"""Cold-start budget for `import app` (tools/import_budget.py)."""
+from tools.import_budget import DEFAULT_BUDGET_MS, budget_failures, import_app
+
+
+def test_app_import_within_budget():
+    timings, threads = import_app()
+    assert 'app' in timings
+    assert budget_failures(timings, threads, DEFAULT_BUDGET_MS) == []
+
+
+def test_budget_failures_name_each_rule():
+    timings = {'app': 900_000, 'tkinter': 1_000}
+    assert budget_failures(timings, 'MainThread,pymongo_server_monitor_thread', 800) == [
+        "banned modules imported: tkinter",
+        "Mongo client started at import (MainThread,pymongo_server_monitor_thread)",
+        "over budget: 900.0 ms > 800 ms",
+    ]
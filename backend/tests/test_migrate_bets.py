@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from app import BET_SCHEMA_VERSION
+from tools.migrate_bets import migrate, update_for, upgrade
+
+PLACED = datetime(2025, 3, 1, 18, 30)
+
+
+def v1_single(**fields) -> dict:
+    return {
+        'user_id': 'u', 'status': 'settled', 'wagered_amount': 10, 'created_at': PLACED,
+        'legs': [{'game_id': 'g1', 'sport': 'basketball_nba', 'selection': 'Lakers', 'odds': -150}],
+        # Old settlement only updated the legacy copy
+        'leg': {'game_id': 'g1', 'selection': 'Lakers', 'odds': -150, 'status': 'settled', 'outcome': True},
+        **fields,
+    }
+
+
+def test_v1_single_takes_settled_legacy_leg():
+    bet = upgrade(v1_single(settled_at=datetime(2025, 3, 2, 1, 0)))
+    assert bet['schema_version'] == BET_SCHEMA_VERSION == 3
+    assert 'leg' not in bet
+    assert bet['legs'] == [{
+        'game_id': 'g1', 'sport': 'basketball_nba', 'selection': 'Lakers', 'odds': -150,
+        'status': 'settled', 'outcome': True,
+    }]
+    assert bet['event_ts'] == datetime(2025, 3, 2, 1, 0)
+
+
+def test_v1_parlay_takes_legacy_list_and_drops_unknown_fields():
+    legacy = [
+        {'game_id': 'g1', 'selection': 'Lakers', 'odds': -150, 'status': 'settled', 'outcome': True, 'note': 'x'},
+        {'game_id': 'g2', 'selection': 'Over 5.5', 'odds': 100, 'status': 'settled', 'outcome': False},
+    ]
+    bet = upgrade(v1_single(leg=legacy, legs=[]))
+    assert [leg['game_id'] for leg in bet['legs']] == ['g1', 'g2']
+    assert 'note' not in bet['legs'][0]
+
+
+def test_settled_legs_win_over_legacy():
+    settled = [{'game_id': 'g1', 'selection': 'Lakers', 'odds': -150, 'status': 'settled', 'outcome': False}]
+    assert upgrade(v1_single(legs=settled))['legs'] == settled
+
+
+def test_string_settled_at_becomes_local_datetime():
+    settled = datetime(2025, 3, 2, 1, 0, tzinfo=timezone.utc)
+    bet = upgrade({**v1_single(settled_at=settled.isoformat()), 'schema_version': 2})
+    assert bet['settled_at'] == settled.astimezone().replace(tzinfo=None)
+    assert bet['event_ts'] == bet['settled_at']
+
+
+def test_event_ts_falls_back_to_placement():
+    assert upgrade(v1_single(status='active', leg=None))['event_ts'] == PLACED
+    assert upgrade(v1_single(created_at=None, date=PLACED - timedelta(days=1)))['event_ts'] == PLACED - timedelta(days=1)
+    assert upgrade(v1_single(settled_at='not a date'))['settled_at'] is None
+
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()['test']
+
+
+def test_update_sets_changed_fields_and_unsets_legacy():
+    before = {'_id': 1, **v1_single()}
+    update = update_for(before, upgrade(before))
+    assert update['$unset'] == {'leg': ''}
+    assert set(update['$set']) == {'legs', 'settled_at', 'event_ts', 'schema_version'}
+    assert update_for(upgrade(before), upgrade(before)) == {}
+
+
+def test_migrate_walks_outdated_bets_in_batches(database):
+    database.BetsArchive.insert_many([v1_single(), v1_single(status='active'), upgrade(v1_single())])
+    seen = []
+    assert migrate(database, batch_size=1, pause=0, dry_run=True, progress=seen.append, collection='BetsArchive') == 2
+    assert seen == ['BetsArchive: would migrate 1 bets', 'BetsArchive: would migrate 2 bets']
+    # A dry run writes nothing
+    assert database.BetsArchive.count_documents({'schema_version': BET_SCHEMA_VERSION}) == 1
@@ -0,0 +1,97 @@
+import pytest
+
+from pricing import PriceRejected, american_to_decimal, find_quote, price_bet
+
+NOW = 1_000_000.0
+GAME = {
+    'game_id': 'g1',
+    'odds': {
+        'moneyline': {'Lakers': {'odds': -150}, 'Celtics': {'odds': 130}},
+        'spread': {'Lakers': {'odds': -110, 'line': -4.5}, 'Celtics': {'odds': -110, 'line': 4.5}},
+        'total': {'over': {'odds': -105, 'line': 221.5}, 'under': {'odds': -115, 'line': 221.5}},
+    },
+}
+
+
+def slates(fetched_at=NOW, game=GAME):
+    return {'nba': {'fetched_at': fetched_at, 'games_by_id': {game['game_id']: game}}}
+
+
+def leg(selection, odds, **fields):
+    return {'sport': 'nba', 'game_id': 'g1', 'selection': selection, 'odds': odds, **fields}
+
+
+def price(legs, entries=None, max_age=120, tolerance=0.02, started=lambda game: False):
+    return price_bet(legs, slates() if entries is None else entries, 10, NOW, max_age, tolerance, started)
+
+
+def rejection(legs, **kwargs) -> PriceRejected:
+    with pytest.raises(PriceRejected) as info:
+        price(legs, **kwargs)
+    return info.value
+
+
+@pytest.mark.parametrize('selection, bet_type, market, odds', [
+    ('Lakers', None, 'moneyline', -150),
+    ('celtics +4.5', None, 'spread', -110),
+    ('Over 221.5', None, 'total', -105),
+    ('Under 221.5', 'Total', 'total', -115),
+])
+def test_find_quote_infers_market(selection, bet_type, market, odds):
+    found, quote = find_quote(GAME, {'selection': selection, 'bet_type': bet_type})
+    assert found == market
+    assert quote['odds'] == odds
+
+
+def test_find_quote_unknown_side():
+    assert find_quote(GAME, {'selection': 'Knicks'}) == ('moneyline', None)
+
+
+def test_parlay_priced_from_cache():
+    priced = price([leg('Lakers', -150), leg('Over 221.5', -105)])
+    decimal = american_to_decimal(-150) * american_to_decimal(-105)
+    assert priced['decimal_odds'] == round(decimal, 4)
+    assert priced['potential_payout'] == round(10 * decimal, 2)
+    assert [p['bet_type'] for p in priced['legs']] == ['moneyline', 'total']
+    assert priced['legs'][1]['line'] == 221.5
+
+
+def test_price_within_tolerance_takes_cached_price():
+    # -152 is 1.658 decimal against the cached 1.667: inside 2%
+    priced = price([leg('Lakers', -152)])
+    assert priced['legs'][0]['odds'] == -150
+
+
+def test_price_outside_tolerance_rejected():
+    e = rejection([leg('Lakers', -200)])
+    assert (e.reason, e.leg, e.quoted_odds) == ('price_moved', 0, -150)
+
+
+def test_moved_line_rejected():
+    e = rejection([leg('Lakers -3.5', -110)])
+    assert (e.reason, e.quoted_odds) == ('line_moved', -110)
+
+
+def test_explicit_line_overrides_selection():
+    assert rejection([leg('Lakers', -110, bet_type='spread', line=-3.5)]).reason == 'line_moved'
+    assert price([leg('Lakers', -110, bet_type='spread', line=-4.5)])['legs'][0]['line'] == -4.5
+
+
+def test_stale_or_missing_odds_rejected():
+    assert rejection([leg('Lakers', -150)], entries=slates(fetched_at=NOW - 121)).reason == 'stale_odds'
+    assert rejection([leg('Lakers', -150)], entries={}).reason == 'stale_odds'
+    assert price([leg('Lakers', -150)], entries=slates(fetched_at=NOW - 120))['legs'][0]['odds'] == -150
+
+
+def test_unknown_or_started_game_rejected():
+    assert rejection([{**leg('Lakers', -150), 'game_id': 'g2'}]).reason == 'not_offered'
+    assert rejection([leg('Lakers', -150)], started=lambda game: True).reason == 'not_offered'
+    assert rejection([leg('Knicks', -150)]).reason == 'not_offered'
+
+
+def test_first_bad_leg_reported():
+    e = rejection([leg('Lakers', -150), leg('Celtics', 200)])
+    assert (e.reason, e.leg) == ('price_moved', 1)
+    assert e.payload() == {
+        'status': 'error', 'message': 'leg 1: price is now 130', 'reason': 'price_moved', 'leg': 1, 'quoted_odds': 130,
+    }
@@ -0,0 +1,28 @@
+"""Every Mongo read in the backend passes an inclusion projection (tools/check_projections.py)."""
+from tools.check_projections import BACKEND_DIR, check_file
+
+
+def test_backend_reads_are_projected():
+    problems = [
+        f"{path.name}:{lineno}: {message}"
+        for path in sorted(BACKEND_DIR.glob('*.py'))
+        for lineno, message in check_file(path)
+    ]
+    assert problems == []
+
+
+def test_unprojected_reads_are_caught(tmp_path):
+    source = tmp_path / 'routes.py'
+    source.write_text(
+        "db.Users.find_one({'username': name})\n"
+        "db.Bets.find({'user_id': name}, {'password': 0})\n"
+        "db.Bets.find_one_and_update({'_id': bet_id}, {'$set': {'status': 'settled'}})\n"
+        "mdb().Users.find_one({'username': name}, {'balance': 1})\n"
+        "'text'.find('x')\n",
+        encoding='utf-8',
+    )
+    assert check_file(source) == [
+        (1, "find_one() without a projection"),
+        (2, "find() with an exclusion-only projection"),
+        (3, "find_one_and_update() without a projection"),
+    ]
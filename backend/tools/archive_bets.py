@@ -0,0 +1,84 @@
+"""
+Move settled and cancelled bets older than BETS_ARCHIVE_DAYS into BetsArchive.
+
+Keeps Bets (and the indexes settlement and the hot routes use) sized to the
+working set; history, stats and bet lookups union BetsArchive back in (see
+app.with_archive). Batches are copied first and deleted second, in _id order
+with a pause between them, so a crash or a rerun at worst re-copies a batch
+(duplicate keys are skipped) and never loses a bet.
+
+    cd backend
+    python -m tools.archive_bets --dry-run
+    python -m tools.archive_bets --days 180 --batch-size 1000 --pause 0.5
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import BulkWriteError
+
+from app import ARCHIVE_COLLECTION, ARCHIVED_STATUSES, app, get_db
+
+DUPLICATE_KEY = 11000
+
+
+def archivable(cutoff: datetime) -> dict:
+    return {'status': {'$in': ARCHIVED_STATUSES}, 'created_at': {'$lt': cutoff}}
+
+
+def copy_to_archive(archive, batch: list):
+    try:
+        archive.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        # Already copied by an interrupted run; anything else is a real failure
+        if any(err['code'] != DUPLICATE_KEY for err in e.details['writeErrors']):
+            raise
+
+
+def archive(database, cutoff: datetime, batch_size: int = 1000, pause: float = 0.5,
+            dry_run: bool = False, progress=print) -> int:
+    query = archivable(cutoff)
+    archived = 0
+    last_id = None
+    while True:
+        page = query if last_id is None else {**query, '_id': {'$gt': last_id}}
+        batch = list(database.Bets.find(page).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        if dry_run:
+            archived += len(batch)
+        else:
+            now = datetime.now(timezone.utc)
+            copy_to_archive(database[ARCHIVE_COLLECTION], [{**bet, 'archived_at': now} for bet in batch])
+            # Settled/cancelled is final, but keep the condition so nothing live is ever removed
+            ids = [bet['_id'] for bet in batch]
+            archived += database.Bets.delete_many({'_id': {'$in': ids}, **query}).deleted_count
+        last_id = batch[-1]['_id']
+        if progress:
+            progress(f"{'would archive' if dry_run else 'archived'} {archived} bets")
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause)
+    return archived
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=app.config['BETS_ARCHIVE_DAYS'],
+                        help='archive bets placed more than this many days ago')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--pause', type=float, default=0.5, help='seconds to sleep between batches')
+    parser.add_argument('--dry-run', action='store_true', help='count archivable bets without moving them')
+    args = parser.parse_args()
+
+    # created_at is written with a naive datetime.now(), so compare like with like
+    cutoff = datetime.now() - timedelta(days=args.days)
+    with app.app_context():
+        archived = archive(get_db(), cutoff, args.batch_size, args.pause, args.dry_run)
+    print(f"{'would archive' if args.dry_run else 'archived'} {archived} bets placed before {cutoff.isoformat()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
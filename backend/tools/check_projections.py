@@ -0,0 +1,75 @@
+"""
+Fail if any Mongo read in the backend fetches whole documents.
+
+Every find/find_one-style call must pass an explicit inclusion projection
+(a second positional argument or projection=...), so routes only pull the
+fields they emit. Pure exclusion projections like {'password': 0} still
+ship every other field and are rejected too.
+
+    cd backend && python tools/check_projections.py [files...]
+
+Exits 1 and lists offending lines when a query is unprojected.
+tests/test_projections.py runs the same check under pytest.
+"""
+import ast
+import sys
+from pathlib import Path
+
+READ_METHODS = {'find', 'find_one', 'find_one_and_update', 'find_one_and_delete', 'find_one_and_replace'}
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _is_collection_call(node: ast.Call) -> bool:
+    # Matches db.<Collection>.find(...) (or mdb() in asgi.py); str.find etc. don't hang off db
+    func = node.func
+    if not isinstance(func, ast.Attribute) or func.attr not in READ_METHODS:
+        return False
+    target = func.value
+    while isinstance(target, (ast.Attribute, ast.Subscript, ast.Call)):
+        target = target.func if isinstance(target, ast.Call) else target.value
+    return isinstance(target, ast.Name) and target.id in ('db', 'mdb')
+
+
+def _projection(node: ast.Call):
+    for kw in node.keywords:
+        if kw.arg == 'projection':
+            return kw.value
+    # find_one_and_update(filter, update, projection=...) only takes it by keyword
+    if node.func.attr.startswith('find_one_and_'):
+        return None
+    return node.args[1] if len(node.args) >= 2 else None
+
+
+def _is_exclusion_only(projection) -> bool:
+    if not isinstance(projection, ast.Dict) or not projection.values:
+        return False
+    values = [v.value for v in projection.values if isinstance(v, ast.Constant)]
+    return len(values) == len(projection.values) and all(v in (0, False) for v in values)
+
+
+def check_file(path: Path) -> list:
+    tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+    problems = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not _is_collection_call(node):
+            continue
+        projection = _projection(node)
+        if projection is None:
+            problems.append((node.lineno, f"{node.func.attr}() without a projection"))
+        elif _is_exclusion_only(projection):
+            problems.append((node.lineno, f"{node.func.attr}() with an exclusion-only projection"))
+    return problems
+
+
+def main(argv: list) -> int:
+    paths = [Path(p) for p in argv] or sorted(BACKEND_DIR.glob('*.py'))
+    failed = False
+    for path in paths:
+        for lineno, message in check_file(path):
+            print(f"{path}:{lineno}: {message}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,53 @@
+"""
+Refill balances for users who haven't been seen since the daily credit rolled over.
+
+Balances refill lazily on first use (see app.refresh_credit); this catches up
+everyone else, e.g. from cron shortly after midnight in CREDIT_TIMEZONE.
+Users are walked in _id order in small batches with a pause between them, so
+the write rate stays bounded instead of one update_many over the collection.
+
+    cd backend && python -m tools.credit_sweeper --batch-size 500 --pause 0.2
+"""
+import argparse
+import sys
+import time
+
+from app import app, credit_period, credit_refill_update, credit_stale_filter, get_db
+
+
+def sweep(database, period: dict, batch_size: int = 500, pause: float = 0.2, progress=print) -> int:
+    stale = credit_stale_filter(period)
+    refilled = 0
+    last_id = None
+    while True:
+        query = stale if last_id is None else {**stale, '_id': {'$gt': last_id}}
+        ids = [u['_id'] for u in database.Users.find(query, {'_id': 1}).sort('_id', 1).limit(batch_size)]
+        if not ids:
+            break
+        # Re-check staleness: a request may have refilled (and spent from) a user since the find
+        result = database.Users.update_many({'_id': {'$in': ids}, **stale}, credit_refill_update(period))
+        refilled += result.modified_count
+        last_id = ids[-1]
+        if progress:
+            progress(f"refilled {refilled} users")
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return refilled
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--pause', type=float, default=0.2, help='seconds to sleep between batches')
+    args = parser.parse_args()
+
+    with app.app_context():
+        period = credit_period()
+        refilled = sweep(get_db(), period, args.batch_size, args.pause)
+    print(f"credit period {period['credit_day']} generation {period['credit_gen']}: refilled {refilled} users")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Bulk synthetic users and bets for benchmarks and load tests.
+
+Writes straight to Mongo with insert_many (no HTTP, one password hash for
+everyone), so millions of documents take minutes, not days. Output is
+deterministic for a given --seed and --anchor:
+
+- bettor activity is Pareto-skewed: a few users place most of the bets;
+- sports follow SPORT_MAPPING with rough popularity weights;
+- --parlay-rate of bets are 2-6 leg parlays, the rest singles;
+- bets on games before the anchor are settled (win/loss drawn from the
+  implied probability of the odds, a few cancelled), later ones are active;
+- user profit/losses/balance/rank are consistent with their bets.
+
+Bet documents have the same shape create_bet and settle_bets produce.
+
+    cd backend
+    python -m tools.datagen --users 100000 --bets 2000000 --seed 7 --drop
+    python -m tools.datagen --users 1000 --bets 20000 --mongo-uri mongodb://127.0.0.1:27018 --db scratch
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from pricing import american_to_decimal
+
+# Relative bet volume per sport
+SPORT_WEIGHTS = {
+    'americanfootball_nfl': 30,
+    'basketball_nba': 20,
+    'baseball_mlb': 15,
+    'americanfootball_ncaaf': 12,
+    'icehockey_nhl': 10,
+    'basketball_ncaab': 8,
+    'soccer_usa_mls': 5,
+}
+
+# Pareto shape for bets per user; ~1.16 puts ~80% of bets on ~20% of users
+ACTIVITY_ALPHA = 1.16
+
+MARKETS = ('moneyline', 'spread', 'total')
+MARKET_WEIGHTS = (50, 30, 20)
+
+# Parlay leg counts 2..6, mostly short
+PARLAY_LEGS = (2, 3, 4, 5, 6)
+PARLAY_LEG_WEIGHTS = (40, 30, 15, 10, 5)
+
+CANCEL_RATE = 0.02
+TEAMS_PER_LEAGUE = 30
+
+
+def username(i: int) -> str:
+    return f"user{i:07d}"
+
+
+def synthetic_games(rng: random.Random, sport_mapping: dict, anchor: datetime, days: int, per_day: int) -> list:
+    # Games spread from `days` before the anchor to a week after it
+    games = []
+    for sport in sport_mapping:
+        league = sport_mapping[sport]['league']
+        teams = [f"{league} Team {n:02d}" for n in range(1, TEAMS_PER_LEAGUE + 1)]
+        for day in range(-days, 8):
+            for slot in range(per_day):
+                home, away = rng.sample(teams, 2)
+                games.append({
+                    'game_id': f"{sport[:6]}{day + days:04d}{slot:02d}",
+                    'sport': sport,
+                    'home_team': home,
+                    'away_team': away,
+                    'commence_time': anchor + timedelta(days=day, hours=rng.randint(12, 23)),
+                })
+    return games
+
+
+def make_leg(rng: random.Random, game: dict) -> dict:
+    market = rng.choices(MARKETS, MARKET_WEIGHTS)[0]
+    team = rng.choice((game['home_team'], game['away_team']))
+    if market == 'moneyline':
+        selection, odds = team, rng.choice((-300, -200, -150, -120, 110, 130, 160, 220, 300))
+    elif market == 'spread':
+        selection, odds = f"{team} {rng.choice(('-', '+'))}{rng.choice((1.5, 3.5, 6.5, 7.5))}", -110
+    else:
+        selection, odds = f"{rng.choice(('Over', 'Under'))} {rng.randint(5, 230) + 0.5}", -110
+    return {
+        'game_id': game['game_id'],
+        'sport': game['sport'],
+        'bet_type': market,
+        'selection': selection,
+        'odds': odds,
+    }
+
+
+def generate(database, users: int, bets: int, seed: int = 42, games: list = None, anchor: datetime = None,
+             days: int = 90, parlay_rate: float = 0.25, batch_size: int = 10000,
+             password: str = 'password123', period: dict = None, progress=print) -> dict:
+    """
+    Insert `users` users and `bets` bets into database.Users / database.Bets.
+    `games` ({'game_id', 'sport', 'home_team', 'away_team', 'commence_time'})
+    defaults to a synthetic schedule; pass real or recorded games to bet on those.
+    `period` (app.credit_period()) marks balances current, so they aren't
+    refilled on first use.
+    """
+    from werkzeug.security import generate_password_hash
+    from app import BET_SCHEMA_VERSION, DAILY_CREDIT, SPORT_MAPPING, parlay_payout
+
+    rng = random.Random(seed)
+    anchor = anchor or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    games = games or synthetic_games(rng, SPORT_MAPPING, anchor, days, per_day=6)
+
+    games_by_sport = {}
+    for game in games:
+        games_by_sport.setdefault(game['sport'], []).append(game)
+    sports = [s for s in SPORT_WEIGHTS if s in games_by_sport] + [s for s in games_by_sport if s not in SPORT_WEIGHTS]
+    sport_weights = [SPORT_WEIGHTS.get(s, 1) for s in sports]
+
+    # Cumulative activity weights so rng.choices picks users in O(log n)
+    cum_activity, total = [], 0.0
+    for _ in range(users):
+        total += rng.paretovariate(ACTIVITY_ALPHA)
+        cum_activity.append(total)
+
+    profit = [0.0] * users
+    losses = [0.0] * users
+    active_wagers = [0.0] * users
+
+    started = time.perf_counter()
+    for batch_start in range(0, bets, batch_size):
+        n = min(batch_size, bets - batch_start)
+        bettors = rng.choices(range(users), cum_weights=cum_activity, k=n)
+        docs = []
+        for u in bettors:
+            leg_count = rng.choices(PARLAY_LEGS, PARLAY_LEG_WEIGHTS)[0] if rng.random() < parlay_rate else 1
+            picked = [rng.choice(games_by_sport[sport]) for sport in rng.choices(sports, sport_weights, k=leg_count)]
+            legs = [make_leg(rng, game) for game in picked]
+            latest = max(game['commence_time'] for game in picked)
+            wager = float(min(500, max(1, round(rng.lognormvariate(3.0, 1.0)))))
+            created_at = latest - timedelta(hours=rng.uniform(1, 72))
+
+            bet = {
+                'user_id': username(u),
+                'bet_type': 'parlay' if leg_count > 1 else 'single',
+                'wagered_amount': wager,
+                'legs': legs,
+                'status': 'active',
+                'outcome': None,
+                'payout': 0,
+                'profit': 0,
+                'created_at': created_at.replace(tzinfo=None),
+                'settled_at': None,
+                'event_ts': created_at.replace(tzinfo=None),
+                'schema_version': BET_SCHEMA_VERSION,
+            }
+            if latest < anchor:
+                if rng.random() < CANCEL_RATE:
+                    cancelled_at = created_at.replace(tzinfo=None)
+                    bet.update(status='cancelled', outcome='cancelled', settled_at=cancelled_at, event_ts=cancelled_at)
+                else:
+                    won = True
+                    for leg in legs:
+                        # Implied probability less a little vig
+                        leg['outcome'] = rng.random() < 0.95 / american_to_decimal(leg['odds'])
+                        leg['status'] = 'settled'
+                        won = won and leg['outcome']
+                    payout = parlay_payout(wager, legs) if won else 0
+                    settled_at = (latest + timedelta(hours=3)).replace(tzinfo=None)
+                    bet.update(
+                        status='settled',
+                        outcome='win' if won else 'loss',
+                        payout=round(payout, 2),
+                        profit=round(payout - wager, 2),
+                        settled_at=settled_at,
+                        event_ts=settled_at,
+                    )
+                    profit[u] += bet['profit']
+                    if not won:
+                        losses[u] += wager
+            else:
+                active_wagers[u] += wager
+            docs.append(bet)
+        database.Bets.insert_many(docs, ordered=False)
+        done = batch_start + n
+        if progress and (done % (batch_size * 10) == 0 or done == bets):
+            progress(f"bets {done}/{bets} ({done / (time.perf_counter() - started):,.0f}/s)")
+
+    # Ordinal rank by profit, as settle_bets stores it
+    order = sorted(range(users), key=lambda u: -profit[u])
+    rank = [0] * users
+    for position, u in enumerate(order, 1):
+        rank[u] = position
+
+    password_hash = generate_password_hash(password)
+    created_at = (anchor - timedelta(days=days + 1)).replace(tzinfo=None)
+    for batch_start in range(0, users, batch_size):
+        database.Users.insert_many([{
+            'username': username(u),
+            'password': password_hash,
+            'balance': max(0.0, DAILY_CREDIT - active_wagers[u]),
+            'rank': rank[u],
+            'profit': round(profit[u], 2),
+            'wagered_amount': 0,
+            'losses': round(losses[u], 2),
+            'history_visible': True,
+            'created_at': created_at,
+            **(period or {}),
+        } for u in range(batch_start, min(users, batch_start + batch_size))], ordered=False)
+
+    elapsed = time.perf_counter() - started
+    return {'users': users, 'bets': bets, 'games': len(games), 'seconds': round(elapsed, 1)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--bets', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--anchor', help='ISO date bets settle up to (default: today, UTC); fix it for identical data')
+    parser.add_argument('--days', type=int, default=90, help='days of settled history before the anchor')
+    parser.add_argument('--parlay-rate', type=float, default=0.25)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--password', default='password123', help='shared by every generated user')
+    parser.add_argument('--mongo-uri', help='defaults to MONGODB_URI')
+    parser.add_argument('--db', help='defaults to MONGO_DB_NAME')
+    parser.add_argument('--drop', action='store_true', help='drop Users and Bets first')
+    args = parser.parse_args()
+
+    from app import create_app, credit_period, get_db
+
+    overrides = {k: v for k, v in (('MONGODB_URI', args.mongo_uri), ('MONGO_DB_NAME', args.db)) if v}
+    app = create_app(overrides)
+    anchor = datetime.fromisoformat(args.anchor).replace(tzinfo=timezone.utc) if args.anchor else None
+
+    with app.app_context():
+        database = get_db()
+        if args.drop:
+            database.Users.drop()
+            database.Bets.drop()
+        elif database.Users.estimated_document_count() or database.Bets.estimated_document_count():
+            print('Users/Bets are not empty; pass --drop to replace them')
+            return 1
+        summary = generate(
+            database, args.users, args.bets, seed=args.seed, anchor=anchor, days=args.days,
+            parlay_rate=args.parlay_rate, batch_size=args.batch_size, password=args.password,
+            period=credit_period(),
+        )
+    print(f"inserted {summary['users']} users and {summary['bets']} bets "
+          f"over {summary['games']} games in {summary['seconds']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+Create the indexes listed in indexes.py on the configured database.
+
+    cd backend && python -m tools.ensure_indexes
+"""
+import sys
+
+from app import app, get_db
+from indexes import ensure_indexes
+
+
+def main() -> int:
+    with app.app_context():
+        for collection, names in ensure_indexes(get_db()).items():
+            print(f"{collection}: {', '.join(names)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Import-time budget for the app module.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter (with no
+database reachable) and fails if the import is slower than the budget,
+pulls in a banned module, or starts Mongo client threads.
+
+    cd backend && python tools/import_budget.py --budget-ms 800
+
+tests/test_import_budget.py asserts the same budget under pytest.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET_MS = 800.0
+
+# Modules that have no business in a worker's cold start
+BANNED_MODULES = ('turtle', 'tkinter', '_tkinter')
+
+# Runs after the import; prints the threads the import started
+PROBE = (
+    "import threading, app; "
+    "print('THREADS', ','.join(sorted(t.name for t in threading.enumerate())))"
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    # "import time: self [us] | cumulative | imported package" -> {module: cumulative_us}
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _self_us, cumulative_us, name = line.split(':', 1)[1].split('|', 2)
+        timings[name.strip()] = int(cumulative_us)
+    return timings
+
+
+def import_app():
+    """
+    Import app in a fresh interpreter under -X importtime. Returns
+    ({module: cumulative_us}, names of the threads running afterwards), or
+    raises RuntimeError with the child's stderr if the import failed.
+    """
+    env = dict(os.environ)
+    # Point at a closed port: importing must not need a live database
+    env['MONGODB_URI'] = 'mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=1'
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    threads = next((line.split(' ', 1)[1] for line in proc.stdout.splitlines() if line.startswith('THREADS')), '')
+    return parse_importtime(proc.stderr), threads
+
+
+def budget_failures(timings: dict, threads: str, budget_ms: float) -> list:
+    # One message per broken rule; empty when the import is within budget
+    failures = []
+    banned = [m for m in BANNED_MODULES if m in timings]
+    if banned:
+        failures.append(f"banned modules imported: {', '.join(banned)}")
+    if 'pymongo' in threads.lower() or 'monitor' in threads.lower():
+        failures.append(f"Mongo client started at import ({threads})")
+    total_ms = timings.get('app', 0) / 1000.0
+    if total_ms > budget_ms:
+        failures.append(f"over budget: {total_ms:.1f} ms > {budget_ms:.0f} ms")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=10, help='show the N slowest imports')
+    args = parser.parse_args()
+
+    try:
+        timings, threads = import_app()
+    except RuntimeError as e:
+        print(e)
+        print('FAIL: importing app raised')
+        return 1
+
+    total_ms = timings.get('app', 0) / 1000.0
+    print(f"import app: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, us in sorted(timings.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000.0:8.1f} ms  {name}")
+
+    failures = budget_failures(timings, threads, args.budget_ms)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Rewrite Bets and BetsArchive to the current schema (app.BET_SCHEMA_VERSION) in throttled batches.
+
+MIGRATIONS[n] takes a document at version n-1 to version n; documents without
+schema_version are version 1. Batches are walked in _id order with a pause
+between them, and each write is conditioned on the version and status it was
+computed from, so the tool can run next to the live app and be stopped and
+rerun at any point.
+
+    cd backend
+    python -m tools.migrate_bets --dry-run
+    python -m tools.migrate_bets --batch-size 1000 --pause 0.5
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app import ARCHIVE_COLLECTION, BET_SCHEMA_VERSION, app, canonical_leg, get_db
+
+
+def to_v2(bet: dict) -> dict:
+    # Version 1 stored legs twice and old settlement only updated the legacy `leg`
+    # (a dict for singles, the list for parlays); `legs` wins once it carries a settled leg.
+    bet = dict(bet)
+    legacy = bet.pop('leg', None)
+    legs = bet.get('legs') or []
+    if not any(isinstance(leg, dict) and 'status' in leg for leg in legs):
+        if isinstance(legacy, dict):
+            legs = [{**(legs[0] if len(legs) == 1 else {}), **legacy}]
+        elif isinstance(legacy, list) and legacy:
+            legs = legacy
+    bet['legs'] = [canonical_leg(leg) for leg in legs if isinstance(leg, dict)]
+    return bet
+
+
+def as_datetime(value):
+    # Version 2 settlement wrote isoformat() strings; offsets become local time like created_at
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+    return value if isinstance(value, datetime) else None
+
+
+def to_v3(bet: dict) -> dict:
+    # Typed settled_at, and event_ts: the latest of placed/settled, which history now ranges over
+    bet = dict(bet)
+    settled_at = as_datetime(bet.get('settled_at'))
+    bet['settled_at'] = settled_at
+    bet['event_ts'] = settled_at or as_datetime(bet.get('created_at')) or as_datetime(bet.get('date'))
+    return bet
+
+
+MIGRATIONS = {
+    2: to_v2,
+    3: to_v3,
+}
+
+
+def upgrade(bet: dict) -> dict:
+    version = bet.get('schema_version', 1)
+    while version < BET_SCHEMA_VERSION:
+        version += 1
+        bet = MIGRATIONS[version](bet)
+    return {**bet, 'schema_version': version}
+
+
+def update_for(before: dict, after: dict) -> dict:
+    update = {}
+    changed = {k: v for k, v in after.items() if k != '_id' and (k not in before or before[k] != v)}
+    removed = {k: '' for k in before if k not in after}
+    if changed:
+        update['$set'] = changed
+    if removed:
+        update['$unset'] = removed
+    return update
+
+
+def migrate(database, batch_size: int = 1000, pause: float = 0.5, dry_run: bool = False, progress=print,
+            collection: str = 'Bets') -> int:
+    outdated = {'schema_version': {'$not': {'$gte': BET_SCHEMA_VERSION}}}
+    bets = database[collection]
+    migrated = 0
+    last_id = None
+    while True:
+        query = outdated if last_id is None else {**outdated, '_id': {'$gt': last_id}}
+        batch = list(bets.find(query).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        ops = [
+            UpdateOne(
+                # Skip documents the app rewrote since we read them; a rerun picks them up
+                {'_id': bet['_id'], 'schema_version': bet.get('schema_version'), 'status': bet.get('status')},
+                update_for(bet, upgrade(bet)),
+            )
+            for bet in batch
+        ]
+        if dry_run:
+            migrated += len(ops)
+        else:
+            migrated += bets.bulk_write(ops, ordered=False).modified_count
+        last_id = batch[-1]['_id']
+        if progress:
+            progress(f"{collection}: {'would migrate' if dry_run else 'migrated'} {migrated} bets")
+        if len(batch) < batch_size:
+            break
+        time.sleep(pause)
+    return migrated
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--pause', type=float, default=0.5, help='seconds to sleep between batches')
+    parser.add_argument('--dry-run', action='store_true', help='count outdated bets without writing')
+    args = parser.parse_args()
+
+    with app.app_context():
+        for collection in ('Bets', ARCHIVE_COLLECTION):
+            migrated = migrate(get_db(), args.batch_size, args.pause, args.dry_run, collection=collection)
+            print(f"{collection}: {'would migrate' if args.dry_run else 'migrated'} {migrated} bets"
+                  f" to schema_version {BET_SCHEMA_VERSION}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())